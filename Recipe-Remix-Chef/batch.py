@@ -0,0 +1,308 @@
+"""
+Batch mode: recipes for many pantry profiles, without any questions.
+
+Profiles are read from a CSV file (one row per profile) or a JSON lines file (one
+object per line) with these fields; only ``ingredients`` is required:
+
+    id, ingredients ("rice, eggs, onion" or a list), cuisine, diet, time, skill,
+    healthy (yes/no), specialty (yes/no: has the cuisine's spices/herbs)
+
+Each profile is checked the way the interactive app does it, with the answers a
+batch cannot give filled in: ingredients the diet excludes are dropped (and listed
+in the output). Profiles with the same canonical request (see canonical_request)
+are generated once. Up to ``workers`` profiles are generated at a time, and each
+result is written as one JSON line as soon as it is complete:
+
+    python main.py --batch profiles.csv --output recipes.jsonl --workers 4
+
+Recipes using ingredients outside the profile's pantry are regenerated once with a
+correction (see compliance.py). A summary with throughput, failure counts and each
+model's ingredient violation rate is printed at the end and saved next to the output
+(``recipes.stats.json``).
+"""
+
+import contextvars
+import csv
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import compliance
+import gai_lib
+from gai_lib.result import OK
+from recipe_generator import (create_recipe_prompt, canonical_request, pantry_notes, request_recipes,
+                              recipe_records, recipe_index, known_recipe, seed_request, remember_recipes,
+                              recipe_pantry, recipe_choices, served_recipes, CUISINES, DIETS, TIMES, SKILLS)
+import taxonomy
+
+DEFAULT_WORKERS = 4
+# Time budget of one profile (all its variants, retries and failover included)
+PROFILE_TIMEOUT = 180
+
+DEFAULTS = {"cuisine": "Any", "diet": "No specific restrictions", "time": "30 minutes", "skill": "Intermediate"}
+_CHOICES = {"cuisine": CUISINES, "diet": DIETS, "time": TIMES, "skill": SKILLS}
+_YES = {"yes", "y", "true", "1"}
+# Set by read_profiles on rows that are not profiles, reported by prepare()
+_INVALID = "_invalid"
+
+
+class ProfileError(ValueError):
+    """A profile that cannot be turned into a request."""
+
+
+def read_profiles(path):
+    """
+    Reads the profiles of a .csv or .jsonl file.
+
+    Returns:
+        list: Dicts of the profile fields, each with an ``id`` (its row number if the
+              file has no id column). JSON lines that are not objects are kept as
+              profiles that prepare() reports as invalid.
+    """
+    with open(path, encoding="utf-8", newline="") as f:
+        if path.lower().endswith(".csv"):
+            rows = list(csv.DictReader(f))
+        else:
+            rows = [_json_row(line) for line in f if line.strip()]
+    for number, row in enumerate(rows, 1):
+        if not row.get("id"):
+            row["id"] = str(number)
+    return rows
+
+
+def _json_row(line):
+    try:
+        row = json.loads(line)
+    except ValueError as e:
+        return {_INVALID: f"Invalid JSON: {e}"}
+    if not isinstance(row, dict):
+        return {_INVALID: f"Expected a JSON object, got {type(row).__name__}"}
+    return row
+
+
+def _choice(profile, field):
+    value = str(profile.get(field) or DEFAULTS[field]).strip()
+    for option in _CHOICES[field]:
+        if option.casefold() == value.casefold():
+            return option
+    if field == "diet":
+        # The diet decides the validation, so it has to be a known one
+        raise ProfileError(f"Unknown diet {value!r}; expected one of {', '.join(DIETS)}")
+    return value
+
+
+def _flag(value):
+    if value is None or value == "":
+        return None
+    return value if isinstance(value, bool) else str(value).strip().casefold() in _YES
+
+
+def prepare(profile):
+    """
+    Validates a profile and turns it into a request, without asking anything:
+    ingredients the diet excludes are dropped, and a Non-Vegetarian profile without
+    any non-vegetarian ingredient is kept as it is (with a warning).
+
+    Raises:
+        ProfileError: No ingredients (left), an unknown diet, or a row that is not a profile.
+
+    Returns:
+        dict: The normalized request fields plus "dropped" and "warnings".
+    """
+    if profile.get(_INVALID):
+        raise ProfileError(profile[_INVALID])
+    ingredients = profile.get("ingredients") or []
+    if isinstance(ingredients, str):
+        ingredients = ingredients.split(",")
+    ingredients = [str(item).strip() for item in ingredients if str(item).strip()]
+    diet = _choice(profile, "diet")
+    cuisine = _choice(profile, "cuisine")
+
+    matches = taxonomy.classify(ingredients)
+    dropped = taxonomy.conflicts(matches, diet)
+    warnings = []
+    if dropped:
+        ingredients = [item for item in ingredients if item not in dropped]
+        warnings.append(f"Dropped ingredients that are not {diet.lower()}: {', '.join(dropped)}")
+    elif diet == "Non-Vegetarian" and not taxonomy.contains(matches, taxonomy.NON_VEG):
+        warnings.append("Non-Vegetarian diet without any non-vegetarian ingredient")
+    if not ingredients:
+        raise ProfileError("No ingredients" + (" left after the dietary check" if dropped else ""))
+
+    return {"ingredients": ingredients, "cuisine": cuisine, "restrictions": diet,
+            "time": _choice(profile, "time"), "skill": _choice(profile, "skill"),
+            "healthy": bool(_flag(profile.get("healthy"))),
+            "specialty_info": pantry_notes(cuisine, _flag(profile.get("specialty"))),
+            "dropped": dropped, "warnings": warnings}
+
+
+def _fields(request):
+    # Arguments of create_recipe_prompt / canonical_request
+    return [request[name] for name in ("ingredients", "cuisine", "restrictions", "time", "skill", "healthy",
+                                       "specialty_info")]
+
+
+def generate(request, api_keys):
+    """
+    Recipes for one prepared request: saved recipes the pantry fully covers and that
+    were written for the same cuisine, time, skill and health choices are used as they
+    are; otherwise the best saved fit seeds the new recipes, or they are generated from
+    scratch.
+
+    Returns:
+        dict: recipe_records() output plus "source", "cache_key" and "latency".
+    """
+    start = time.perf_counter()
+    prompt = create_recipe_prompt(*_fields(request))
+    cache_key = canonical_request(*_fields(request))
+    pantry = recipe_pantry(request["ingredients"], request["specialty_info"])
+    choices = recipe_choices(request["cuisine"], request["time"], request["skill"], request["healthy"])
+    served = served_recipes(request["ingredients"], request["restrictions"], choices)
+    if served:
+        results = [gai_lib.GenerationResult(status=OK, payload=match.recipe.markdown, provider="corpus", cached=True)
+                   for match in served]
+        source = "corpus"
+    else:
+        prompt, cache_key = seed_request(prompt, cache_key, known_recipe(request["ingredients"],
+                                                                         request["restrictions"]))
+        # Variants using ingredients outside the pantry are regenerated with a correction
+        results = request_recipes(prompt, api_keys, gai_lib.Deadline(PROFILE_TIMEOUT), cache_key, pantry)
+        remember_recipes(results, choices)
+        succeeded = [result for result in results if result.ok]
+        source = "cache" if succeeded and all(result.cached for result in succeeded) else "generated"
+    records = recipe_records(results, pantry)
+    records.update(source=source, cache_key=cache_key, latency=round(time.perf_counter() - start, 3))
+    return records
+
+
+class BatchStats:
+    """Counts of a batch run. Thread-safe."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.start = time.perf_counter()
+        self.profiles = 0
+        self.unique = 0
+        self.invalid = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.recipes = 0
+        self.sources = {}
+        self.errors = {}
+        self.latencies = []
+
+    def add(self, record, copies):
+        with self._lock:
+            status = record["status"]
+            if status == "invalid":
+                self.invalid += copies
+                return
+            self.latencies.append(record["latency"])
+            if status == "ok":
+                self.succeeded += copies
+                self.recipes += len(record["recipes"]) * copies
+                self.sources[record["source"]] = self.sources.get(record["source"], 0) + copies
+            else:
+                self.failed += copies
+            for error in record["errors"]:
+                kind = error["error"].split(":", 1)[-1].strip()[:80]
+                self.errors[kind] = self.errors.get(kind, 0) + 1
+
+    def to_dict(self):
+        with self._lock:
+            elapsed = time.perf_counter() - self.start
+            latencies = sorted(self.latencies)
+            done = self.succeeded + self.failed
+
+            def percentile(p):
+                return latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))] if latencies else None
+
+            return {"profiles": self.profiles, "unique": self.unique, "invalid": self.invalid,
+                    "succeeded": self.succeeded, "failed": self.failed,
+                    "failure_rate": self.failed / done if done else 0.0,
+                    "recipes": self.recipes, "sources": dict(self.sources), "errors": dict(self.errors),
+                    "elapsed": round(elapsed, 2),
+                    "profiles_per_minute": round(done / elapsed * 60, 1) if elapsed else 0.0,
+                    "recipes_per_minute": round(self.recipes / elapsed * 60, 1) if elapsed else 0.0,
+                    "latency_p50": percentile(50), "latency_p95": percentile(95),
+                    "compliance": compliance.stats.summary()}
+
+    def print_summary(self):
+        data = self.to_dict()
+        print(f"Profiles: {data['profiles']} ({data['unique']} unique, {data['invalid']} invalid)")
+        print(f"  Succeeded: {data['succeeded']}, failed: {data['failed']} ({data['failure_rate']:.1%})")
+        print(f"  Recipes: {data['recipes']} in {data['elapsed']:.1f}s "
+              f"({data['profiles_per_minute']} profiles/min, {data['recipes_per_minute']} recipes/min)")
+        if data["latency_p50"] is not None:
+            print(f"  Latency per profile: p50 {data['latency_p50']:.2f}s, p95 {data['latency_p95']:.2f}s")
+        if data["sources"]:
+            print("  Sources: " + ", ".join(f"{source} {count}" for source, count in sorted(data["sources"].items())))
+        for error, count in sorted(data["errors"].items(), key=lambda item: -item[1]):
+            print(f"  {count:>5} x {error}")
+        for model, stats in sorted(data["compliance"].items()):
+            print(f"  Ingredient check {model}: {stats['violation_rate']:.1%} of {stats['checked']} recipes "
+                  f"used other ingredients, {stats['corrected']} corrected")
+
+
+def run_batch(profiles, api_keys, output, workers=DEFAULT_WORKERS):
+    """
+    Generates recipes for every profile and writes one JSON line per profile to
+    ``output``, in the order the profiles complete.
+
+    Args:
+        profiles (list): Profile dicts (see read_profiles).
+        api_keys (dict): Provider API keys.
+        output (str): JSON lines file, overwritten.
+        workers (int): Profiles generated at the same time (each sends one request per variant).
+
+    Returns:
+        BatchStats: Counts and timings of the run.
+    """
+    stats = BatchStats()
+    stats.profiles = len(profiles)
+    groups = {}
+    invalid = []
+    for profile in profiles:
+        try:
+            request = prepare(profile)
+        except ProfileError as e:
+            invalid.append({"id": profile["id"], "status": "invalid", "error": str(e), "recipes": [], "errors": []})
+            continue
+        # Identical profiles (after normalization) share one generation
+        groups.setdefault(canonical_request(*_fields(request)), (request, []))[1].append(profile["id"])
+    stats.unique = len(groups)
+    # Load the corpus once, before the workers search it
+    recipe_index()
+
+    def run(request):
+        try:
+            return generate(request, api_keys)
+        except Exception as e:
+            return {"recipes": [], "errors": [{"variant": None, "error": f"An error occurred: {e}"}],
+                    "source": None, "latency": 0.0}
+
+    with open(output, "w", encoding="utf-8") as out:
+        for record in invalid:
+            stats.add(record, 1)
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+        with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="recipe-batch") as pool:
+            futures = {pool.submit(contextvars.copy_context().run, run, request): (request, ids)
+                       for request, ids in groups.values()}
+            for future in as_completed(futures):
+                request, ids = futures[future]
+                records = future.result()
+                status = "ok" if records["recipes"] else "failed"
+                stats.add({"status": status, **records}, len(ids))
+                for number, profile_id in enumerate(ids):
+                    record = {"id": profile_id, "status": status,
+                              "duplicate_of": ids[0] if number else None,
+                              "request": {key: value for key, value in request.items() if key != "specialty_info"},
+                              **records}
+                    out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                out.flush()
+
+    with open(os.path.splitext(output)[0] + ".stats.json", "w", encoding="utf-8") as f:
+        json.dump(stats.to_dict(), f, indent=2)
+    return stats
@@ -0,0 +1,100 @@
+"""
+Checks that a generated recipe only uses the user's ingredients plus the basic
+staples, as the prompt requires.
+
+Ingredient names are matched with the taxonomy (normalized words, synonyms, longest
+phrase first), so "basmati rice" is allowed by a pantry with "Rice" and "olive oil"
+by the cooking-oil staple, while "butter" in a pantry of rice and eggs is reported.
+Ingredients the taxonomy does not know are allowed only if they share a word with
+a pantry item.
+
+    pantry = compliance.Pantry(["rice", "eggs", "onion"])
+    pantry.violations(recipes)          # ["2 tbsp butter"]
+    compliance.stats.summary()          # violation rate per model
+"""
+
+import functools
+import threading
+
+import taxonomy
+from corpus import STAPLES
+
+
+@functools.lru_cache(maxsize=16384)
+def _ids(name):
+    match = taxonomy.default_taxonomy().match(name)
+    return frozenset(entry.id for entry in match.entries if entry.id is not None)
+
+
+class Pantry:
+    """The ingredients a recipe may use, compiled once per request."""
+
+    def __init__(self, ingredients, extras=()):
+        """
+        Args:
+            ingredients (list): The user's ingredients.
+            extras (iterable): Also allowed, e.g. the specialty spices the user confirmed.
+        """
+        self.ingredients = list(ingredients)
+        extras = list(extras)
+        self.ids = frozenset().union(*(_ids(name) for name in [*self.ingredients, *extras, *STAPLES]))
+        # Unknown ingredients are compared with the words of the pantry (not of the staples)
+        self.words = {word for name in [*self.ingredients, *extras] for word in taxonomy.words(name)}
+
+    def allows(self, name):
+        ids = _ids(name)
+        if ids:
+            return ids <= self.ids
+        return bool(self.words & set(taxonomy.words(name)))
+
+    def violations(self, recipes):
+        """Ingredient lines of ``recipes`` (recipe_parser.Recipe) that the pantry does not allow."""
+        return [ingredient.text for recipe in recipes for ingredient in recipe.ingredients
+                if not self.allows(ingredient.name)]
+
+
+class ComplianceStats:
+    """Per-model counts of checked recipes, violations and corrections. Thread-safe."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._models = {}
+
+    def _stats(self, provider, model):
+        # Caller holds the lock
+        return self._models.setdefault(f"{provider} ({model})" if model else str(provider),
+                                       {"checked": 0, "violations": 0, "corrected": 0})
+
+    def record(self, provider, model, violations):
+        """Counts one checked recipe and the ingredient lines it should not have used."""
+        with self._lock:
+            stats = self._stats(provider, model)
+            stats["checked"] += 1
+            if violations:
+                stats["violations"] += 1
+
+    def record_correction(self, provider, model):
+        """Counts a violation of ``provider``/``model`` fixed by a corrected regeneration."""
+        with self._lock:
+            self._stats(provider, model)["corrected"] += 1
+
+    def summary(self):
+        """Returns {"PROVIDER (model)": {"checked", "violations", "violation_rate", "corrected"}}."""
+        with self._lock:
+            return {
+                model: {
+                    "checked": stats["checked"],
+                    "violations": stats["violations"],
+                    "violation_rate": stats["violations"] / stats["checked"] if stats["checked"] else 0.0,
+                    "corrected": stats["corrected"],
+                }
+                for model, stats in self._models.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._models.clear()
+
+
+# Counts of this process
+stats = ComplianceStats()
@@ -1,11 +1,16 @@
-import os
+import gai_lib
 
-def get_api_key():
+def get_api_keys():
     """
-    Retrieves the Google AI API key from the environment variables.
-    main.py is responsible for loading the .env file.
+    Retrieves the provider API keys from the environment variables.
+    main.py is responsible for loading the .env file. GOOGLE_API_KEY (written by
+    install.py) is used for Gemini; GROQ_API_KEY / OPENAI_API_KEY add failover providers.
     """
-    api_key = os.getenv("GOOGLE_API_KEY")
-    if not api_key:
+    api_keys = gai_lib.read_api_keys()
+    google_key = api_keys.pop("GOOGLE", None)
+    if google_key and "GEMINI" not in api_keys:
+        api_keys["GEMINI"] = google_key
+    api_keys = {provider: key for provider, key in api_keys.items() if provider in gai_lib.PROVIDERS}
+    if not api_keys:
         raise ValueError("API key not found. Please run install.py to configure it.")
-    return api_key
+    return api_keys
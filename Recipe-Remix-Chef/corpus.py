@@ -0,0 +1,283 @@
+"""
+Index of known recipes, searched by what the pantry can cover.
+
+Each recipe's ingredients are encoded as a bitset over the taxonomy's ingredient ids
+(one bit per ``Entry.id``), packed in 64-bit words, one row per recipe. A pantry is
+encoded the same way (plus the staples every recipe may assume), and a search is a
+few vectorized operations over all rows at once:
+
+    missing = popcount(recipe & ~pantry)        # ingredients the pantry lacks
+    uses    = popcount(recipe & pantry)         # pantry items the recipe uses
+
+    index = RecipeIndex.load("recipe_corpus.jsonl")
+    matches = index.search(["rice", "eggs", "onion"], diet="Vegetarian")
+    matches[0].recipe.name, matches[0].missing, matches[0].coverage
+
+Recipes are stored as JSON lines ({"name", "ingredients", "text", "key"}, plus the
+optional "request" choices a generated recipe was written for), so the recipes the
+app generates and any exported corpus use the same file format.
+NumPy is used when installed; without it the same counts are done per recipe in
+plain Python.
+"""
+
+import functools
+import json
+import os
+import threading
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+import taxonomy
+
+# Always available, as in the prompt's "basic staples"
+STAPLES = ("salt", "black pepper", "water", "oil")
+
+# Ingredients per recipe the pantry may lack, and the share of them it must cover
+MAX_MISSING = 2
+MIN_COVERAGE = 0.75
+
+_WORD_BITS = 64
+
+
+def _popcount(words):
+    # Set bits per row of a (rows, words) uint64 array
+    if hasattr(numpy, "bitwise_count"):
+        return numpy.bitwise_count(words).sum(axis=1, dtype=numpy.int64)
+    return _BYTE_BITS[words.view(numpy.uint8)].reshape(len(words), -1).sum(axis=1, dtype=numpy.int64)
+
+
+if numpy is not None:
+    _BYTE_BITS = numpy.array([bin(byte).count("1") for byte in range(256)], dtype=numpy.uint8)
+
+
+class CorpusRecipe:
+    """
+    One indexed recipe. ``ingredients`` are the ingredient names; ``text`` is its
+    markdown; ``request`` the choices it was generated for (cuisine, time...), if known.
+    """
+
+    __slots__ = ("id", "name", "ingredients", "text", "key", "bits", "unknown", "tags", "request")
+
+    def __init__(self, id, name, ingredients, text, key, bits, unknown, tags, request=None):
+        self.id = id
+        self.name = name
+        self.ingredients = ingredients
+        self.text = text
+        self.key = key
+        self.bits = bits
+        self.unknown = unknown
+        self.tags = tags
+        self.request = request
+
+    @property
+    def markdown(self):
+        """The recipe text, or a minimal one (name and ingredients) if the corpus has none."""
+        if self.text:
+            return self.text
+        ingredients = "\n".join(f"- {name}" for name in self.ingredients)
+        return f"### Recipe Name\n{self.name}\n\n### Ingredients\n{ingredients}"
+
+    def to_dict(self):
+        record = {"name": self.name, "ingredients": self.ingredients, "text": self.text, "key": self.key}
+        if self.request is not None:
+            record["request"] = self.request
+        return record
+
+    def __repr__(self):
+        return f"CorpusRecipe({self.name!r}, {len(self.ingredients)} ingredients)"
+
+
+class CorpusMatch:
+    """A search result: the recipe, the ingredients the pantry lacks and the share it covers."""
+
+    __slots__ = ("recipe", "missing", "coverage", "uses")
+
+    def __init__(self, recipe, missing, coverage, uses):
+        self.recipe = recipe
+        self.missing = missing
+        self.coverage = coverage
+        self.uses = uses
+
+    @property
+    def complete(self):
+        """True if the pantry (and staples) has every ingredient."""
+        return not self.missing
+
+    def __repr__(self):
+        return f"CorpusMatch({self.recipe.name!r}, missing={self.missing}, coverage={self.coverage:.0%})"
+
+
+class RecipeIndex:
+    """Bitset index of recipes over taxonomy ingredient ids. Thread-safe."""
+
+    def __init__(self, index=None, path=None):
+        """
+        Args:
+            index (taxonomy.Taxonomy, optional): Taxonomy whose entry ids are the bits.
+                                                 Defaults to the bundled one.
+            path (str, optional): JSON lines file that ``add(..., save=True)`` appends to.
+        """
+        self.taxonomy = index or taxonomy.default_taxonomy()
+        self.path = path
+        self.words = max(1, -(-self.taxonomy.size // _WORD_BITS))
+        self.recipes = []
+        self._keys = set()
+        self._lock = threading.Lock()
+        self._matrix = None
+        self._totals = None
+        self._tags = None
+        self._ids = functools.lru_cache(maxsize=16384)(self._ingredient_ids)
+        self.staples = self.bits(STAPLES)
+
+    @classmethod
+    def load(cls, path, index=None):
+        """The index of the recipes in a JSON lines file (empty if the file does not exist yet)."""
+        corpus = cls(index, path)
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        corpus._add_record(json.loads(line))
+        return corpus
+
+    def _ingredient_ids(self, name):
+        match = self.taxonomy.match(name)
+        return tuple(entry.id for entry in match.entries if entry.id is not None), match.tags
+
+    def bits(self, ingredients):
+        """Bitset (a Python int) of the known ingredients among ``ingredients`` (names)."""
+        bits = 0
+        for name in ingredients:
+            for id in self._ids(name)[0]:
+                bits |= 1 << id
+        return bits
+
+    def _add_record(self, record):
+        names = [item["name"] if isinstance(item, dict) else item for item in record.get("ingredients", [])]
+        return self.add(record.get("name"), names, record.get("text"), record.get("key"), request=record.get("request"))
+
+    def add(self, name, ingredients, text=None, key=None, save=False, request=None):
+        """
+        Adds a recipe, unless one with the same ``key`` is already indexed.
+
+        Args:
+            name (str): Recipe name.
+            ingredients (list): Ingredient names ("basmati rice", "eggs").
+            text (str, optional): The recipe as markdown, to show it when it is served.
+            key (str, optional): Identity of the recipe (e.g. its request's cache key).
+            save (bool): Also append it to ``path``.
+            request (dict, optional): The choices the recipe was generated for.
+
+        Returns:
+            CorpusRecipe: The new recipe, or None if ``key`` was already indexed.
+        """
+        bits = tags = unknown = 0
+        for ingredient in ingredients:
+            ids, ingredient_tags = self._ids(ingredient)
+            tags |= ingredient_tags
+            if not ids:
+                # Not in the taxonomy: it cannot be checked against the pantry, so it counts as missing
+                unknown += 1
+            for id in ids:
+                bits |= 1 << id
+        with self._lock:
+            if key is not None and key in self._keys:
+                return None
+            recipe = CorpusRecipe(len(self.recipes), name, list(ingredients), text, key, bits, unknown, tags, request)
+            self.recipes.append(recipe)
+            if key is not None:
+                self._keys.add(key)
+            if save and self.path:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(recipe.to_dict(), ensure_ascii=False) + "\n")
+        return recipe
+
+    def __len__(self):
+        return len(self.recipes)
+
+    def _arrays(self):
+        # Caller holds the lock. Rows added since the last search are packed and appended.
+        done = 0 if self._matrix is None else len(self._matrix)
+        if done < len(self.recipes):
+            new = self.recipes[done:]
+            mask = (1 << _WORD_BITS) - 1
+            rows = numpy.array([[(recipe.bits >> (_WORD_BITS * w)) & mask for w in range(self.words)]
+                                for recipe in new], dtype=numpy.uint64)
+            # Ingredients per recipe, unknown ones included
+            totals = _popcount(rows) + numpy.array([recipe.unknown for recipe in new], dtype=numpy.int64)
+            tags = numpy.array([recipe.tags for recipe in new], dtype=numpy.int64)
+            if self._matrix is None:
+                self._matrix, self._totals, self._tags = rows, totals, tags
+            else:
+                self._matrix = numpy.concatenate([self._matrix, rows])
+                self._totals = numpy.concatenate([self._totals, totals])
+                self._tags = numpy.concatenate([self._tags, tags])
+        return self._matrix, self._totals, self._tags
+
+    def _pack(self, bits):
+        mask = (1 << _WORD_BITS) - 1
+        return numpy.array([(bits >> (_WORD_BITS * w)) & mask for w in range(self.words)], dtype=numpy.uint64)
+
+    def search(self, pantry, diet=None, max_missing=MAX_MISSING, min_coverage=MIN_COVERAGE, limit=5):
+        """
+        Recipes the pantry fully or mostly covers.
+
+        Args:
+            pantry (list): Available ingredient names; the staples are always added.
+            diet (str, optional): A dietary choice of taxonomy.DIET_EXCLUDES; recipes with
+                                  ingredients it excludes are skipped.
+            max_missing (int): At most this many ingredients may be missing.
+            min_coverage (float): At least this share of the ingredients must be available.
+            limit (int): Number of matches returned.
+
+        Returns:
+            list: CorpusMatch objects, fewest missing ingredients first, then the ones
+                  using most of the pantry.
+        """
+        pantry_bits = self.bits(pantry)
+        available = pantry_bits | self.staples
+        excluded = taxonomy.DIET_EXCLUDES.get(diet, 0)
+        with self._lock:
+            if not self.recipes:
+                return []
+            if numpy is None:
+                recipes = list(self.recipes)
+            else:
+                matrix, total, tags = self._arrays()
+        if numpy is None:
+            scored = []
+            for recipe in recipes:
+                if recipe.tags & excluded:
+                    continue
+                missing = bin(recipe.bits & ~available).count("1") + recipe.unknown
+                total = bin(recipe.bits).count("1") + recipe.unknown
+                if total and missing <= max_missing and (total - missing) / total >= min_coverage:
+                    scored.append((missing, -bin(recipe.bits & pantry_bits).count("1"), -(total - missing) / total,
+                                   recipe.id))
+            scored.sort()
+            best = [(recipe_id, -coverage, -uses) for _, uses, coverage, recipe_id in scored[:limit]]
+        else:
+            # Known ingredients the pantry lacks, plus the unknown ones
+            missing = total - _popcount(matrix & self._pack(available))
+            coverage = (total - missing) / numpy.maximum(total, 1)
+            fits = (total > 0) & (missing <= max_missing) & (coverage >= min_coverage)
+            if excluded:
+                fits &= (tags & excluded) == 0
+            candidates = numpy.flatnonzero(fits)
+            uses = _popcount(matrix[candidates] & self._pack(pantry_bits))
+            # Fewest missing first, then most pantry items used, then highest coverage
+            order = numpy.lexsort((-coverage[candidates], -uses, missing[candidates]))
+            best = [(int(candidates[i]), float(coverage[candidates[i]]), int(uses[i])) for i in order[:limit]]
+        return [CorpusMatch(self.recipes[i], self._missing(self.recipes[i], available), coverage, uses)
+                for i, coverage, uses in best]
+
+    def _missing(self, recipe, available):
+        missing = []
+        for name in recipe.ingredients:
+            ids = self._ids(name)[0]
+            if not ids or any(not available >> id & 1 for id in ids):
+                missing.append(name)
+        return missing
@@ -1,6 +1,10 @@
+import argparse
+import contextlib
+import json
 import os
 import sys
 from pathlib import Path
+from time import perf_counter
 from dotenv import load_dotenv, find_dotenv
 
 
@@ -16,8 +20,16 @@ load_dotenv(dotenv_path)
 try:
     from dotenv import load_dotenv
     from colorama import Fore, Style, init
-    from recipe_generator import create_recipe_prompt, generate_recipe
-    from utils import format_recipe
+    from recipe_generator import (create_recipe_prompt, stream_recipes, request_recipes, recipe_records,
+                                  response_text, canonical_request, variant_cache_key, recipe_cache, VARIANT_HINTS,
+                                  known_recipe, seed_request, remember_recipes, recipe_choices, pantry_notes,
+                                  recipe_pantry, check_recipe, correct_recipe, create_variant_prompt,
+                                  SPECIALTY_INGREDIENTS, CUISINES, DIETS, TIMES, SKILLS)
+    from config import get_api_keys
+    from utils import StreamingRecipePrinter, format_recipe
+    import batch
+    import compliance
+    import taxonomy
 except ImportError:
     print("Error: Required packages are not installed.")
     print("Please run the setup script first to install dependencies:")
@@ -32,19 +44,8 @@ init(autoreset=True)
 load_dotenv()
 
 # --- Data for Smart Checks ---
-NON_VEG_KEYWORDS = [
-    'beef', 'pork', 'lamb', 'goat', 'venison', 'chicken', 'duck', 'turkey', 
-    'quail', 'sausage', 'ham', 'bacon', 'salami', 'fish', 'salmon', 'tuna', 
-    'cod', 'shrimp', 'crab', 'lobster', 'mussel', 'oyster', 'squid', 
-    'octopus', 'egg', 'eggs', 'anchovy', 'gelatin', 'lard'
-]
-SPECIALTY_INGREDIENTS = {
-    "Indian": "common Indian spices (like cumin, coriander, turmeric, and garam masala)",
-    "Italian": "common Italian herbs (like oregano, basil, and rosemary)",
-    "Mexican": "common Mexican spices (like chili powder, cumin, and paprika)",
-    "Chinese": "common Chinese sauces and spices (like soy sauce, ginger, and five-spice powder)",
-    "Thai": "common Thai ingredients (like lemongrass, fish sauce, and curry paste)"
-}
+# Ingredients are classified with the taxonomy in taxonomy.py (diet tags, synonyms, phrases);
+# the menu options and cuisine pantry questions are shared with batch mode (recipe_generator.py)
 
 def get_menu_choice(prompt, options):
     """Displays a menu and gets a valid choice from the user."""
@@ -75,22 +76,24 @@ def get_yes_no(prompt):
 
 def validate_ingredients(ingredients, dietary_choice):
     """Validates ingredients against dietary choice and handles conflicts."""
-    is_veg_choice = dietary_choice in ["Vegetarian", "Vegan"]
     is_non_veg_choice = dietary_choice == "Non-Vegetarian"
-    
-    conflicting_items = [item for item in ingredients if item.lower() in NON_VEG_KEYWORDS]
-    contains_non_veg = any(item.lower() in NON_VEG_KEYWORDS for item in ingredients)
 
-    # Scenario 1: User chose a vegetarian diet but provided non-veg ingredients.
-    if is_veg_choice and conflicting_items:
-        print(Fore.RED + f"\nWarning: You selected a {dietary_choice} diet but provided non-vegetarian ingredients: {', '.join(conflicting_items)}.")
-        retry = get_yes_no("Would you like to re-enter only vegetarian ingredients? If not, I will go ahead and create recipes with ingredient list provided by you.")
+    # One pass over the list classifies every ingredient
+    matches = taxonomy.classify(ingredients)
+    conflicting_items = taxonomy.conflicts(matches, dietary_choice)
+    contains_non_veg = taxonomy.contains(matches, taxonomy.NON_VEG)
+
+    # Scenario 1: User chose a vegetarian, vegan or gluten-free diet but provided ingredients it excludes.
+    if conflicting_items:
+        diet = dietary_choice.lower()
+        print(Fore.RED + f"\nWarning: You selected a {dietary_choice} diet but provided ingredients that are not {diet}: {', '.join(conflicting_items)}.")
+        retry = get_yes_no(f"Would you like to re-enter only {diet} ingredients? If not, I will go ahead and create recipes with ingredient list provided by you.")
         if retry:
-            new_ingredients_input = input("Please enter your vegetarian ingredients: ")
+            new_ingredients_input = input(f"Please enter your {diet} ingredients: ")
             return [ing.strip() for ing in new_ingredients_input.split(',') if ing.strip()]
         else:
-            filtered_ingredients = [item for item in ingredients if item.lower() not in NON_VEG_KEYWORDS]
-            print(Fore.YELLOW + f"Proceeding with only vegetarian ingredients: {', '.join(filtered_ingredients)}")
+            filtered_ingredients = [item for item in ingredients if item not in conflicting_items]
+            print(Fore.YELLOW + f"Proceeding with only {diet} ingredients: {', '.join(filtered_ingredients)}")
             return filtered_ingredients
             
     # Scenario 2: User chose a non-veg diet but provided only vegetarian ingredients.
@@ -108,13 +111,115 @@ def check_specialty_ingredients(cuisine):
     """Asks the user if they have common spices/herbs for the selected cuisine."""
     if cuisine in SPECIALTY_INGREDIENTS:
         question = f"Do you have {SPECIALTY_INGREDIENTS[cuisine]}?"
-        has_them = get_yes_no(question)
-        if has_them:
-            return f"The user has confirmed they have {SPECIALTY_INGREDIENTS[cuisine]}."
+        return pantry_notes(cuisine, get_yes_no(question))
+    return pantry_notes(cuisine)
+
+
+def show_recipes(prompt, api_keys, cache_key=None, pantry=None):
+    """
+    Generates all recipe variants at once and prints them as they arrive: the first
+    one section by section while it is streamed, then the others (which were being
+    generated meanwhile). Returns the GenerationResults, one per variant.
+
+    With a pantry, variants using other ingredients are regenerated with a correction;
+    for the streamed one the correction is printed after it.
+    """
+    stream, others = stream_recipes(prompt, api_keys, cache_key=cache_key, pantry=pantry)
+    printer = StreamingRecipePrinter()
+    for delta in stream:
+        printer.feed(delta)
+    printer.next_recipe()
+
+    result = stream.result
+    violations = check_recipe(result, pantry)
+    if violations:
+        print(Fore.RED + f"⚠️  Recipe 1 uses ingredients you did not list: {'; '.join(violations)}")
+        corrected = correct_recipe(create_variant_prompt(prompt, 0), api_keys, result, violations, pantry,
+                                   cache_key=variant_cache_key(cache_key, 0))
+        if corrected is result:
+            print(Fore.RED + "   It could not be regenerated without them.")
         else:
-            return f"The user may not have {SPECIALTY_INGREDIENTS[cuisine]}. The recipe should be simple."
-    return "No specific spice/herb information provided."
+            print(Fore.CYAN + "   Here it is again, regenerated with that correction:")
+            printer.feed(corrected.payload)
+            printer.next_recipe()
+            result = corrected
+
+    results = [result]
+    for future in others:
+        result = future.result()
+        results.append(result)
+        if result.ok:
+            printer.feed(result.payload)
+            printer.next_recipe()
+
+    failed = [(number, result) for number, result in enumerate(results, 1) if not result.ok]
+    if failed and len(failed) < len(results):
+        for number, result in failed:
+            print(Fore.RED + f"⚠️  Variant {number} could not be generated: {response_text(result)}")
+    return results, printer.sections
+
+def json_recipes(api_keys):
+    """
+    Asks the usual questions and generates the variants, with everything shown to the
+    user sent to stderr, then writes the parsed recipes to stdout as one JSON document.
+    Returns True if at least one recipe was generated.
+    """
+    with contextlib.redirect_stdout(sys.stderr):
+        ingredients, cuisine, restrictions, time, skill, healthy, specialty_info = get_recipe_inputs()
+        prompt = create_recipe_prompt(ingredients, cuisine, restrictions, time, skill, healthy, specialty_info)
+        cache_key = canonical_request(ingredients, cuisine, restrictions, time, skill, healthy, specialty_info)
+        match = known_recipe(ingredients, restrictions)
+        prompt, seeded_key = seed_request(prompt, cache_key, match)
+        seed = match.recipe.name if seeded_key != cache_key else None
+        cache_key = seeded_key
+        print(Fore.CYAN + "\n🔄 Generating your recipes... Please wait a moment.")
+        pantry = recipe_pantry(ingredients, specialty_info)
+        results = request_recipes(prompt, api_keys, cache_key=cache_key, pantry=pantry)
+        remember_recipes(results, recipe_choices(cuisine, time, skill, healthy))
+    records = {"request": {"ingredients": ingredients, "cuisine": cuisine, "restrictions": restrictions,
+                           "time": time, "skill": skill, "healthy": healthy, "cache_key": cache_key,
+                           "seed": seed},
+               **recipe_records(results, pantry),
+               "compliance": compliance.stats.summary()}
+    json.dump(records, sys.stdout, ensure_ascii=False, indent=2)
+    print()
+    return bool(records["recipes"])
 
+def use_known_recipe(ingredients, restrictions):
+    """
+    Looks for a saved recipe that fits the pantry. A complete fit can be shown right
+    away; otherwise (or if the user wants new recipes) it can seed the new ones.
+
+    Returns:
+        tuple: (served, match). ``served`` is True if the saved recipe was shown.
+    """
+    match = known_recipe(ingredients, restrictions)
+    if match is None:
+        return False, None
+    if match.complete:
+        print(Fore.CYAN + f"\n📚 A saved recipe already fits your pantry: {match.recipe.name}")
+        if get_yes_no("Show it instead of generating new recipes?"):
+            format_recipe(match.recipe.markdown)
+            return True, match
+    else:
+        print(Fore.CYAN + f"\n📚 A saved recipe almost fits your pantry: {match.recipe.name} "
+                          f"(missing {', '.join(match.missing)})")
+    return False, match
+
+def print_compliance():
+    """Prints, per model, how many of the recipes it wrote used ingredients outside the pantry."""
+    for model, stats in sorted(compliance.stats.summary().items()):
+        print(f"  Ingredient check {model}: {stats['violations']} of {stats['checked']} recipe(s) "
+              f"used other ingredients ({stats['violation_rate']:.0%}), {stats['corrected']} corrected")
+
+def print_cache_stats(keys=None, limit=10):
+    """Prints the recipe cache's hit ratio per request key (the given keys, or the most used)."""
+    cache = recipe_cache()
+    stats = cache.stats()
+    print(Fore.CYAN + f"Recipe cache: {stats['entries']} entries, {stats['hits']} hits / "
+                      f"{stats['hits'] + stats['misses']} lookups ({stats['hit_ratio']:.0%})")
+    for stat in cache.key_stats(keys, limit=limit):
+        print(f"  {stat['hit_ratio']:>4.0%} of {stat['hits'] + stat['misses']:>3} lookups  {stat['key']}")
 
 def get_recipe_inputs():
     """Gathers all necessary inputs from the user using menus."""
@@ -123,35 +228,87 @@ def get_recipe_inputs():
     ingredients_input = input(Style.BRIGHT + Fore.GREEN + "\nEnter your available ingredients (comma-separated): ")
     ingredients = [ing.strip() for ing in ingredients_input.split(',') if ing.strip()]
 
-    cuisine_options = ["Any", "Indian", "Italian", "Mexican", "Chinese", "Thai", "Japanese", "Mediterranean", "French", "American"]
-    cuisine = get_menu_choice("Select your preferred cuisine:", cuisine_options)
+    cuisine = get_menu_choice("Select your preferred cuisine:", CUISINES)
     
     specialty_info = check_specialty_ingredients(cuisine)
 
-    dietary_options = ["Non-Vegetarian", "Vegetarian", "Vegan", "Gluten-Free", "No specific restrictions"]
-    restrictions = get_menu_choice("Select your dietary preference:", dietary_options)
+    restrictions = get_menu_choice("Select your dietary preference:", DIETS)
     
     ingredients = validate_ingredients(ingredients, restrictions)
 
-    time_options = ["15 minutes", "30 minutes", "1 hour", "More than 1 hour"]
-    time = get_menu_choice("How much time do you have?", time_options)
+    time = get_menu_choice("How much time do you have?", TIMES)
 
-    skill_options = ["Beginner", "Intermediate", "Expert"]
-    skill = get_menu_choice("What is your cooking skill level?", skill_options)
+    skill = get_menu_choice("What is your cooking skill level?", SKILLS)
 
     healthy = get_yes_no("Would you like a healthy version of the recipe?")
     
     return ingredients, cuisine, restrictions, time, skill, healthy, specialty_info
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate recipes from the ingredients you have.")
+    parser.add_argument("--cache-stats", action="store_true",
+                        help="show the recipe cache's hit ratios per request and exit")
+    parser.add_argument("--json", action="store_true",
+                        help="write the recipes to stdout as JSON (questions and progress go to stderr)")
+    parser.add_argument("--batch", metavar="PROFILES",
+                        help="generate recipes for every profile of a .csv or .jsonl file, without questions")
+    parser.add_argument("--output", help="JSON lines file of the batch results (default: <PROFILES>.recipes.jsonl)")
+    parser.add_argument("--workers", type=int, default=batch.DEFAULT_WORKERS,
+                        help="profiles generated at the same time in batch mode")
+    args = parser.parse_args()
+    if args.cache_stats:
+        print_cache_stats()
+        sys.exit(0)
+
+    try:
+        api_keys = get_api_keys()
+    except ValueError as e:
+        print(Fore.RED + f"❌ {e}")
+        sys.exit(1)
+    # Set up the provider clients and connect in the background while the user picks options
+    gai_lib.warm_up(api_keys)
+
+    if args.json:
+        sys.exit(0 if json_recipes(api_keys) else 1)
+
+    if args.batch:
+        output = args.output or os.path.splitext(args.batch)[0] + ".recipes.jsonl"
+        profiles = batch.read_profiles(args.batch)
+        print(Fore.CYAN + f"🔄 Generating recipes for {len(profiles)} profiles ({args.workers} at a time)...")
+        stats = batch.run_batch(profiles, api_keys, output, workers=args.workers)
+        stats.print_summary()
+        print(Fore.CYAN + f"Results written to {output}")
+        sys.exit(0 if stats.succeeded else 1)
+
     ingredients, cuisine, restrictions, time, skill, healthy, specialty_info = get_recipe_inputs()
 
     prompt = create_recipe_prompt(ingredients, cuisine, restrictions, time, skill, healthy, specialty_info)
+    # Equivalent requests (same ingredients in another order, plural or casing) share cached recipes
+    cache_key = canonical_request(ingredients, cuisine, restrictions, time, skill, healthy, specialty_info)
+
+    # A saved recipe that fits the pantry is served as is, or remixed instead of starting from scratch
+    served, match = use_known_recipe(ingredients, restrictions)
+    if served:
+        sys.exit(0)
+    prompt, seeded_key = seed_request(prompt, cache_key, match)
+    if seeded_key != cache_key:
+        print(Fore.CYAN + f"The new recipes will remix {match.recipe.name}.")
+    cache_key = seeded_key
     
     print(Fore.CYAN + "\n🔄 Generating your recipes... Please wait a moment.")
-    ai_response = generate_recipe(prompt)
+    # Each section is printed as soon as it is complete, while the rest is still being written
+    start = perf_counter()
+    results, sections = show_recipes(prompt, api_keys, cache_key, recipe_pantry(ingredients, specialty_info))
+    succeeded = [result for result in results if result.ok]
+    remember_recipes(results, recipe_choices(cuisine, time, skill, healthy))
 
-    if not ai_response or ai_response.startswith("An error occurred"):
-        print(Fore.RED + f"\n❌ {ai_response}")
+    if not succeeded:
+        print(Fore.RED + f"\n❌ {response_text(results[0])}")
+    elif not sections:
+        print(Fore.RED + "Sorry, I couldn't generate a recipe with those constraints. Please try different ingredients.")
     else:
-        format_recipe(ai_response)
\ No newline at end of file
+        sources = ", ".join(dict.fromkeys("cache" if result.cached else f"{result.provider} ({result.model})"
+                                          for result in succeeded))
+        print(Fore.CYAN + f"⏱  {len(succeeded)} recipe(s) in {perf_counter() - start:.2f}s by {sources}")
+        print_compliance()
+        print_cache_stats([variant_cache_key(cache_key, variant) for variant in range(len(VARIANT_HINTS))])
\ No newline at end of file
@@ -0,0 +1,296 @@
+"""
+Nutrition computed locally from the parsed ingredient quantities, instead of asking
+the model to estimate it.
+
+A bundled table gives calories and macros per 100 g (plus grams per cup and per piece)
+for the canonical ingredients of taxonomy.py. Each ingredient line is mapped to a
+food through the taxonomy and converted to grams; a batch of recipes is then summed
+with one vectorized pass over all their ingredients:
+
+    nutrition.compute(recipes)          # fills recipe.nutrition, per serving
+    recipes[0].nutrition                # {"calories": 450.0, "protein": 21.3, ...}
+
+NumPy is used when installed; without it the same sums are done in plain Python.
+Ingredients that are not in the table (most spices and herbs) count as zero.
+"""
+
+import functools
+import threading
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+import taxonomy
+
+NUTRIENTS = ("calories", "protein", "carbohydrates", "fat")
+
+# Grams assumed when the table has no cup or piece weight for a food
+DEFAULT_CUP_GRAMS = 240.0
+DEFAULT_PIECE_GRAMS = 100.0
+
+# Unit -> (kind, factor): grams = quantity * factor * (1 | grams per cup | grams per piece)
+WEIGHT, VOLUME, PIECE = 0, 1, 2
+UNITS = {
+    "g": (WEIGHT, 1.0), "kg": (WEIGHT, 1000.0), "mg": (WEIGHT, 0.001),
+    "oz": (WEIGHT, 28.35), "lb": (WEIGHT, 453.6),
+    "can": (WEIGHT, 400.0), "pinch": (WEIGHT, 0.4), "dash": (WEIGHT, 0.6), "handful": (WEIGHT, 30.0),
+    "bunch": (WEIGHT, 100.0), "stalk": (WEIGHT, 40.0), "sprig": (WEIGHT, 1.0), "inch": (WEIGHT, 10.0),
+    "cup": (VOLUME, 1.0), "tbsp": (VOLUME, 1 / 16), "tsp": (VOLUME, 1 / 48),
+    "ml": (VOLUME, 1 / 236.6), "l": (VOLUME, 1000 / 236.6),
+    None: (PIECE, 1.0), "piece": (PIECE, 1.0), "clove": (PIECE, 1.0), "slice": (PIECE, 1.0),
+}
+
+# taxonomy name|kcal|protein g|carbohydrates g|fat g (per 100 g)|grams per cup|grams per piece
+_TABLE = """
+beef|250|26|0|15|225|
+pork|242|27|0|14|225|
+lamb|282|25|0|20|225|
+goat|109|21|0|2.3|225|
+bacon|541|37|1.4|42||20
+ham|145|21|1.5|6|140|28
+sausage|301|12|2|27||75
+salami|336|22|1|26||10
+meatball|197|12|8|13||30
+burger|254|17|0|20||113
+liver|135|20|4|4|225|
+chicken|150|22|0|6|140|170
+duck|337|19|0|28|140|
+turkey|135|24|0|4|140|
+fish|90|19|0|1|140|150
+salmon|208|20|0|13|140|150
+tuna|132|28|0|1|140|150
+cod|82|18|0|0.7||150
+tilapia|96|20|0|1.7||120
+trout|141|20|0|6.2||150
+mackerel|205|19|0|14||150
+sardine|208|25|0|11||25
+anchovy|131|20|0|5||4
+fish sauce|35|5|3.6|0|288|
+oyster sauce|51|1.4|11|0.3|288|
+shrimp|85|20|0|0.5|145|12
+crab|97|19|0|1.5|135|
+squid|92|16|3|1.4|150|
+mussel|86|12|3.7|2.2|150|
+egg|143|12.6|0.7|9.5|243|50
+mayonnaise|680|1|0.6|75|220|
+milk|61|3.2|4.8|3.3|244|
+butter|717|0.9|0.1|81|227|14
+cream|340|2.8|2.7|36|238|
+cheese|402|25|1.3|33|113|28
+paneer|321|25|3.6|25|250|
+yogurt|61|3.5|4.7|3.3|245|
+honey|304|0.3|82|0|339|
+chicken broth|15|2|1|0.5|240|
+coconut milk|230|2.3|6|24|240|
+almond milk|15|0.6|0.6|1.1|240|
+soy milk|54|3.3|6|1.8|243|
+oat milk|48|1|7|1.5|240|
+peanut butter|588|25|20|50|258|
+eggplant|25|1|6|0.2|82|450
+flour|364|10|76|1|125|
+bread|265|9|49|3.2|45|30
+breadcrumb|395|13|72|5|108|
+pasta|371|13|75|1.5|100|
+noodle|384|14|71|4.4|90|
+couscous|376|13|77|0.6|173|
+barley|352|10|78|1.2|200|
+semolina|360|13|73|1|167|
+bulgur|342|12|76|1.3|140|
+seitan|370|75|14|2|140|
+soy sauce|53|8|4.9|0.6|255|
+tortilla|312|8|52|8||45
+pita|275|9|56|1.2||60
+naan|290|9|50|6||90
+rice noodle|364|6|80|0.6|90|
+corn tortilla|218|5.7|45|2.9||26
+chickpea flour|387|22|58|6.7|92|
+corn flour|370|7|79|3.9|122|
+cornstarch|381|0.3|91|0.1|128|
+oat|389|17|66|7|81|
+rice|360|6.6|79|0.6|185|
+quinoa|368|14|64|6|170|
+corn|86|3.3|19|1.4|145|100
+potato|77|2|17|0.1|150|170
+tomato|18|0.9|3.9|0.2|180|120
+onion|40|1.1|9.3|0.1|160|110
+garlic|149|6.4|33|0.5|136|5
+ginger|80|1.8|18|0.8|96|15
+carrot|41|0.9|10|0.2|128|60
+celery|16|0.7|3|0.2|101|40
+bell pepper|31|1|6|0.3|149|120
+chili|40|1.9|9|0.4|45|15
+cucumber|15|0.7|3.6|0.1|104|200
+zucchini|17|1.2|3.1|0.3|124|200
+squash|45|1|12|0.1|140|
+broccoli|34|2.8|7|0.4|91|
+cauliflower|25|1.9|5|0.3|107|
+cabbage|25|1.3|6|0.1|89|
+spinach|23|2.9|3.6|0.4|30|
+kale|49|4.3|9|0.9|67|
+lettuce|15|1.4|2.9|0.2|47|
+mushroom|22|3.1|3.3|0.3|70|18
+pea|81|5.4|14|0.4|145|
+green bean|31|1.8|7|0.2|110|
+okra|33|1.9|7|0.2|100|12
+avocado|160|2|8.5|15|150|150
+olive|115|0.8|6|11|134|4
+lentil|352|25|63|1|192|
+chickpea|139|7|22|2.5|164|
+black bean|132|8.9|24|0.5|172|
+kidney bean|127|8.7|23|0.5|177|
+bean|140|9|25|0.5|180|
+tofu|76|8|1.9|4.8|248|
+tempeh|192|20|7.6|11|166|
+edamame|121|12|9|5|155|
+peanut|567|26|16|49|146|
+almond|579|21|22|50|143|
+cashew|553|18|30|44|137|
+walnut|654|15|14|65|117|
+sesame|573|18|23|50|144|
+coconut|354|3.3|15|33|80|
+apple|52|0.3|14|0.2|125|180
+banana|89|1.1|23|0.3|150|120
+orange|47|0.9|12|0.1|180|130
+lemon|29|1.1|9|0.3|244|60
+lime|30|0.7|11|0.2|246|45
+mango|60|0.8|15|0.4|165|200
+pineapple|50|0.5|13|0.1|165|
+strawberry|32|0.7|7.7|0.3|152|12
+blueberry|57|0.7|14|0.3|148|
+sugar|387|0|100|0|200|
+maple syrup|260|0|67|0.1|315|
+chocolate|546|4.9|61|31|175|
+salt|0|0|0|0|292|
+black pepper|251|10|64|3.3|116|
+water|0|0|0|0|240|
+oil|884|0|0|100|218|
+vinegar|18|0|0|0|239|
+mustard|66|4.4|5.8|4|250|
+ketchup|101|1|27|0.1|240|
+cumin|375|18|44|22|96|
+coriander|23|2.1|3.7|0.5|16|
+basil|23|3.2|2.7|0.6|21|
+parsley|36|3|6|0.8|60|
+mint|44|3.3|8|0.7|45|
+stock|5|0.5|0.4|0.2|240|
+miso|199|12|26|6|275|
+curry paste|130|2|12|8|240|
+hummus|166|8|14|10|246|
+salsa|36|1.5|7|0.2|260|
+jam|278|0.4|69|0.1|320|
+wine|85|0.1|2.6|0|240|
+beer|43|0.5|3.6|0|240|
+"""
+
+
+class NutrientTable:
+    """Nutrients per gram and unit weights, indexed by taxonomy entry id. Thread-safe."""
+
+    def __init__(self, rows, index=None):
+        """
+        Args:
+            rows (iterable): (taxonomy name, kcal, protein, carbohydrates, fat, grams per cup,
+                             grams per piece) tuples; the nutrients are per 100 g, see _TABLE.
+            index (taxonomy.Taxonomy, optional): Taxonomy whose entry ids index the table.
+                                                 Defaults to the bundled one.
+        """
+        self.taxonomy = index or taxonomy.default_taxonomy()
+        ids = {entry.name: entry.id for entry in self.taxonomy.entries if entry.id is not None}
+        size = self.taxonomy.size
+        # One row per taxonomy entry; entries without data stay zero and are not counted
+        self.per_gram = [[0.0] * len(NUTRIENTS) for _ in range(size)]
+        self.bases = [[1.0, DEFAULT_CUP_GRAMS, DEFAULT_PIECE_GRAMS] for _ in range(size)]
+        self.known = [False] * size
+        for name, *values in rows:
+            if name not in ids:
+                raise ValueError(f"Nutrient table food {name!r} is not in the taxonomy")
+            i = ids[name]
+            self.per_gram[i] = [float(value) / 100 for value in values[:len(NUTRIENTS)]]
+            cup, piece = values[len(NUTRIENTS):]
+            self.bases[i] = [1.0, float(cup or DEFAULT_CUP_GRAMS), float(piece or DEFAULT_PIECE_GRAMS)]
+            self.known[i] = True
+        if numpy is not None:
+            self.per_gram = numpy.array(self.per_gram)
+            self.bases = numpy.array(self.bases)
+        self.food = functools.lru_cache(maxsize=4096)(self._food)
+        # (food, grams per unit of quantity) of each known ingredient name and unit; id 0 is "not counted"
+        self._measures = [(0, 0.0)]
+        self._lock = threading.Lock()
+        self._measure = functools.lru_cache(maxsize=8192)(self._measure_id)
+
+    @classmethod
+    def from_text(cls, text, index=None):
+        rows = (line.split("|") for line in text.strip().splitlines() if line.strip() and not line.startswith("#"))
+        return cls(((name.strip(), *values) for name, *values in rows), index)
+
+    def _food(self, name):
+        # First ingredient of the name with nutrient data, e.g. "olive oil" -> oil
+        for entry in self.taxonomy.match(name).entries:
+            if entry.id is not None and self.known[entry.id]:
+                return entry.id
+        return None
+
+    def _measure_id(self, name, unit):
+        food = self.food(name)
+        if food is None:
+            return 0
+        kind, factor = UNITS.get(unit, UNITS[None])
+        # lru_cache does not serialize calls: the id must be the index of this append
+        with self._lock:
+            self._measures.append((food, factor * float(self.bases[food][kind])))
+            return len(self._measures) - 1
+
+    def totals(self, recipes):
+        """
+        Total nutrients of each recipe (the whole recipe, not per serving).
+
+        Returns:
+            list: One [calories, protein, carbohydrates, fat] row per recipe (a NumPy
+                  array of shape (len(recipes), 4) when NumPy is installed).
+        """
+        measure = self._measure
+        # Flat (recipe, quantity, measure id) triples of every ingredient with a quantity
+        flat = [value for owner, recipe in enumerate(recipes) for ingredient in recipe.ingredients if ingredient.quantity
+                for value in (owner, ingredient.quantity, measure(ingredient.name, ingredient.unit))]
+        with self._lock:
+            measures = list(self._measures)
+
+        if numpy is None:
+            totals = [[0.0] * len(NUTRIENTS) for _ in recipes]
+            for i in range(0, len(flat), 3):
+                food, grams_per_unit = measures[flat[i + 2]]
+                grams = flat[i + 1] * grams_per_unit
+                row = totals[flat[i]]
+                for n, value in enumerate(self.per_gram[food]):
+                    row[n] += grams * value
+            return totals
+
+        triples = numpy.array(flat, dtype=float).reshape(-1, 3)
+        owners, ids = triples[:, 0].astype(numpy.intp), triples[:, 2].astype(numpy.intp)
+        foods, grams_per_unit = (numpy.array(column) for column in zip(*measures))
+        contributions = self.per_gram[foods[ids]] * (triples[:, 1] * grams_per_unit[ids])[:, None]
+        return numpy.stack([numpy.bincount(owners, weights=contributions[:, n], minlength=len(recipes))
+                            for n in range(len(NUTRIENTS))], axis=1)
+
+
+@functools.lru_cache(maxsize=None)
+def default_table():
+    """The bundled nutrient table, compiled on first use."""
+    return NutrientTable.from_text(_TABLE)
+
+
+def compute(recipes, table=None):
+    """
+    Sets ``nutrition`` of every recipe to its computed nutrients per serving (for the
+    whole recipe if it does not say how many servings it makes).
+
+    Returns:
+        list: The recipes.
+    """
+    totals = (table or default_table()).totals(recipes)
+    for recipe, row in zip(recipes, totals):
+        servings = recipe.servings or 1
+        recipe.nutrition = {name: round(float(value) / servings, 1) for name, value in zip(NUTRIENTS, row)}
+    return recipes
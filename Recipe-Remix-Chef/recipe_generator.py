@@ -1,18 +1,112 @@
-import google.generativeai as genai
-from config import get_api_key
+import contextvars
+import functools
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import gai_lib
+from gai_lib.result import AUTH_ERROR
+from config import get_api_keys
+from recipe_parser import parse_recipes
+import compliance
+import corpus
+import nutrition
+import taxonomy
+
+# Providers in order of preference; the others are used if it fails
+RECIPE_PROVIDERS = ["GEMINI", "GROQ", "OPENAI"]
+RECIPE_MODELS = {"GEMINI": "gemini-1.5-flash"}
+# Output limit of one recipe (each variant is a separate request)
+RECIPE_MAX_TOKENS = 1500
+
+# One request per variant, all sent at once; the hint makes the variants differ
+VARIANT_HINTS = [
+    "A classic, familiar preparation of these ingredients.",
+    "A creative twist: use a different cooking method or style than a classic preparation would.",
+]
+
+# Menu options (also the values batch profiles may use)
+CUISINES = ["Any", "Indian", "Italian", "Mexican", "Chinese", "Thai", "Japanese", "Mediterranean", "French", "American"]
+DIETS = ["Non-Vegetarian", "Vegetarian", "Vegan", "Gluten-Free", "No specific restrictions"]
+TIMES = ["15 minutes", "30 minutes", "1 hour", "More than 1 hour"]
+SKILLS = ["Beginner", "Intermediate", "Expert"]
+
+# Cuisine -> the specialty spices/herbs the user is asked about
+SPECIALTY_INGREDIENTS = {
+    "Indian": "common Indian spices (like cumin, coriander, turmeric, and garam masala)",
+    "Italian": "common Italian herbs (like oregano, basil, and rosemary)",
+    "Mexican": "common Mexican spices (like chili powder, cumin, and paprika)",
+    "Chinese": "common Chinese sauces and spices (like soy sauce, ginger, and five-spice powder)",
+    "Thai": "common Thai ingredients (like lemongrass, fish sauce, and curry paste)"
+}
+# The ingredients those questions name, allowed by the ingredient check once confirmed
+SPECIALTY_PANTRY = {
+    "Indian": ("cumin", "coriander", "turmeric", "garam masala"),
+    "Italian": ("oregano", "basil", "rosemary"),
+    "Mexican": ("chili powder", "cumin", "paprika"),
+    "Chinese": ("soy sauce", "ginger", "five-spice powder"),
+    "Thai": ("lemongrass", "fish sauce", "curry paste"),
+}
+
+# Generated recipes are kept on disk, keyed by the canonical form of the request
+RECIPE_CACHE_PATH = os.getenv("RECIPE_CACHE_PATH", str(Path(__file__).parent / "recipe_cache.sqlite3"))
+RECIPE_CACHE_ENTRIES = 2000
+RECIPE_CACHE_TTL = 30 * 24 * 3600
+
+# Generated recipes are also added to a local corpus, searched by pantry coverage
+RECIPE_CORPUS_PATH = os.getenv("RECIPE_CORPUS_PATH", str(Path(__file__).parent / "recipe_corpus.jsonl"))
+# Complete fits looked at when searching saved recipes written for the same choices
+SERVED_CANDIDATES = 50
+
+# Constant instructions, sent as the system instruction so the provider can cache this
+# prefix across requests. Keep user input out of it: it belongs in create_recipe_prompt().
+RECIPE_SYSTEM_PROMPT = """
+You are an expert chef who creates recipes based *only* on the ingredients provided.
+
+Your task is to generate ONE unique recipe based on the user's constraints and the requested variant.
+
+Please structure your response with the following markdown headings. Do NOT use any other formatting.
+
+### Recipe Name
+[Provide a creative name for the dish]
+
+### Servings
+[The number of servings, as a single number.]
+
+### Ingredients
+[List all necessary ingredients with precise quantities, one per line, quantity and unit first (e.g. "- 2 cups rice"). **IMPORTANT: You MUST ONLY use the ingredients from the "Available Ingredients" list provided by the user.** You are allowed to assume the user also has the following **basic staples ONLY**: salt, pepper, water, and cooking oil. Do NOT include any other ingredients.]
+
+### Instructions
+[Provide clear, step-by-step instructions.]
+
+### Cooking Tips
+[Offer 1-2 practical tips relevant to the user's skill level for this recipe.]
+
+### Substitutions
+[Suggest 1-2 intelligent substitutions for key ingredients.]
+"""
+
+def pantry_notes(cuisine, has_specialty=None):
+    """
+    The "Pantry Notes" of the prompt: whether the user has the cuisine's specialty
+    spices/herbs (None: not asked).
+    """
+    if cuisine not in SPECIALTY_INGREDIENTS or has_specialty is None:
+        return "No specific spice/herb information provided."
+    if has_specialty:
+        return f"The user has confirmed they have {SPECIALTY_INGREDIENTS[cuisine]}."
+    return f"The user may not have {SPECIALTY_INGREDIENTS[cuisine]}. The recipe should be simple."
 
 def create_recipe_prompt(ingredients, cuisine, restrictions, time, skill, healthy, specialty_info):
     """
-    Creates a detailed and structured prompt for the AI model.
+    Creates the user part of the prompt: only the constraints for this request.
+    The output format is described once in RECIPE_SYSTEM_PROMPT.
     """
     health_preference = "The user wants a healthy version of the recipe." if healthy else "The user is open to a standard recipe."
     cuisine_preference = f"The user prefers {cuisine} cuisine." if cuisine != "Any" else "The user is open to any cuisine."
 
     prompt = f"""
-You are an expert chef and nutritionist who creates recipes based *only* on the ingredients provided.
-
-Your task is to generate TWO different and unique recipes based on the user's constraints.
-
 **User Constraints:**
 - **Available Ingredients:** {', '.join(ingredients)}
 - **Cuisine Preference:** {cuisine_preference}
@@ -21,43 +115,303 @@ Your task is to generate TWO different and unique recipes based on the user's co
 - **Skill Level:** The recipe should be suitable for a {skill} cook.
 - **Health Preference:** {health_preference}
 - **Pantry Notes:** {specialty_info}
+"""
+    return prompt
 
-Please provide the output as two distinct recipes, separated by a line containing only '---'.
+@functools.lru_cache(maxsize=None)
+def recipe_cache():
+    """
+    The persistent recipe cache (least recently used entries are evicted beyond
+    RECIPE_CACHE_ENTRIES, and entries expire after RECIPE_CACHE_TTL seconds).
+    """
+    return gai_lib.PersistentResponseCache(RECIPE_CACHE_PATH, max_entries=RECIPE_CACHE_ENTRIES,
+                                           ttl=RECIPE_CACHE_TTL, name="recipes")
 
-For EACH recipe, please structure your response with the following markdown headings. Do NOT use any other formatting.
+@functools.lru_cache(maxsize=None)
+def recipe_index():
+    """The local recipe corpus (see corpus.py), loaded on first use."""
+    return corpus.RecipeIndex.load(RECIPE_CORPUS_PATH)
 
-### Recipe Name
-[Provide a creative name for the dish]
+def known_recipe(ingredients, restrictions):
+    """
+    The saved recipe that best fits the pantry: every ingredient available (or all but
+    a few, see corpus.MAX_MISSING) and nothing the diet excludes.
 
-### Ingredients
-[List all necessary ingredients with precise quantities. **IMPORTANT: You MUST ONLY use the ingredients from the "Available Ingredients" list provided above.** You are allowed to assume the user also has the following **basic staples ONLY**: salt, pepper, water, and cooking oil. Do NOT include any other ingredients.]
+    Returns:
+        corpus.CorpusMatch: The best match, or None.
+    """
+    matches = recipe_index().search(ingredients, diet=restrictions, limit=1)
+    return matches[0] if matches else None
 
-### Instructions
-[Provide clear, step-by-step instructions.]
+def recipe_choices(cuisine, time, skill, healthy):
+    """
+    The choices besides the pantry that a recipe is written for, stored with it in the
+    corpus: a saved recipe is only served as is for the same choices (see served_recipes).
+    """
+    return {"cuisine": cuisine.casefold(), "time": time.casefold(), "skill": skill.casefold(),
+            "healthy": bool(healthy)}
 
-### Cooking Tips
-[Offer 1-2 practical tips relevant to a {skill} cook for this recipe.]
+def served_recipes(ingredients, restrictions, choices):
+    """
+    Saved recipes that can be served instead of generating: the pantry has every
+    ingredient, the diet allows them, and they were generated for the same ``choices``
+    (see recipe_choices).
 
-### Substitutions
-[Suggest 1-2 intelligent substitutions for key ingredients.]
+    Returns:
+        list: Up to one corpus.CorpusMatch per variant, best first.
+    """
+    matches = recipe_index().search(ingredients, diet=restrictions, max_missing=0, limit=SERVED_CANDIDATES)
+    return [match for match in matches if match.recipe.request == choices][:len(VARIANT_HINTS)]
 
-### Nutritional Information
-[Provide an estimated breakdown per serving for: Calories, Protein, Carbohydrates, and Fat. This section is mandatory.]
-"""
-    return prompt
+def remember_recipes(results, choices=None):
+    """
+    Adds the generated recipes to the local corpus (and its file), so later requests
+    with a similar pantry can be answered or seeded from them. A recipe already in the
+    corpus (e.g. served from the cache) is not added again.
+
+    Args:
+        choices (dict, optional): The request's recipe_choices(), saved with each recipe.
+    """
+    index = recipe_index()
+    for result in results:
+        if not result.ok:
+            continue
+        text = result.payload.strip()
+        for recipe in parse_recipes(text)[:1]:
+            if recipe.name and recipe.ingredients:
+                index.add(recipe.name, [ingredient.name for ingredient in recipe.ingredients], text,
+                          key=hashlib.sha256(text.encode("utf-8")).hexdigest()[:16], save=True, request=choices)
+
+def canonical_request(ingredients, cuisine, restrictions, time, skill, healthy, specialty_info):
+    """
+    Canonical form of a recipe request, used as its cache key: ingredients are
+    normalized, singularized, de-duplicated and sorted, so "Rice, egg" and "eggs,rice"
+    give the same key. It ends with a hash of the prompt format, so recipes cached
+    before a prompt change are not served.
+    """
+    items = sorted({" ".join(taxonomy.words(item)) for item in ingredients} - {""})
+    prompt_format = hashlib.sha256((RECIPE_SYSTEM_PROMPT + "".join(VARIANT_HINTS)).encode("utf-8")).hexdigest()[:8]
+    fields = [
+        ("ingredients", ",".join(items)),
+        ("cuisine", cuisine.casefold()),
+        ("diet", restrictions.casefold()),
+        ("time", time.casefold()),
+        ("skill", skill.casefold()),
+        ("healthy", "yes" if healthy else "no"),
+        ("pantry", " ".join(taxonomy.words(specialty_info))),
+        ("format", prompt_format),
+    ]
+    return "|".join(f"{name}={value}" for name, value in fields)
+
+def variant_cache_key(cache_key, variant):
+    return f"{cache_key}|variant={variant}" if cache_key else None
+
+def create_seed_prompt(prompt, match):
+    """
+    Asks for a remix of a saved recipe (a corpus.CorpusMatch) instead of a recipe from
+    scratch: the model adapts an existing structure rather than inventing one.
+    """
+    missing = f" It uses {', '.join(match.missing)}, which the user does not have: replace or drop them." \
+        if match.missing else ""
+    return prompt + f"- **Seed Recipe:** Remix this saved recipe rather than starting from scratch.{missing}\n\n" \
+                    f"{match.recipe.markdown}\n\n"
+
+def seed_cache_key(cache_key, match):
+    seed = hashlib.sha256(match.recipe.markdown.encode("utf-8")).hexdigest()[:8]
+    return f"{cache_key}|seed={seed}" if cache_key else None
+
+def seed_request(prompt, cache_key, match):
+    """
+    The prompt and cache key of a request seeded with ``match`` (see known_recipe).
+    Unchanged without a match, or if the unseeded request is already cached: its
+    cached recipes are served instead of remixing.
+    """
+    if match is None or (cache_key and all(recipe_cache().contains(variant_cache_key(cache_key, variant))
+                                           for variant in range(len(VARIANT_HINTS)))):
+        return prompt, cache_key
+    return create_seed_prompt(prompt, match), seed_cache_key(cache_key, match)
+
+def create_variant_prompt(prompt, variant):
+    """
+    Adds the diversity hint of variant number ``variant`` (0-based) to the constraints.
+    """
+    return prompt + f"- **Variant:** {VARIANT_HINTS[variant % len(VARIANT_HINTS)]}\n"
+
+def recipe_pantry(ingredients, specialty_info=None):
+    """
+    The compliance.Pantry of a request: its ingredients, the staples, and the cuisine's
+    specialty spices/herbs if the user confirmed having them (see pantry_notes).
+    """
+    extras = [name for cuisine, names in SPECIALTY_PANTRY.items() if specialty_info == pantry_notes(cuisine, True)
+              for name in names]
+    return compliance.Pantry(ingredients, extras)
+
+def check_recipe(result, pantry):
+    """
+    Ingredient lines of a successful result that the pantry does not allow. Results
+    that were just generated (not cached) are counted in compliance.stats.
+    """
+    if pantry is None or not result.ok:
+        return []
+    violations = pantry.violations(parse_recipes(result.payload))
+    if not result.cached:
+        compliance.stats.record(result.provider, result.model, violations)
+    return violations
+
+def create_correction_prompt(prompt, violations):
+    """
+    Adds a correction naming the ingredients a previous answer should not have used.
+    """
+    return prompt + (f"- **Correction:** A previous answer used {'; '.join(violations)}, which the user does NOT "
+                     f"have. Use ONLY the Available Ingredients and the basic staples (salt, pepper, water, "
+                     f"cooking oil).\n")
+
+def correction_key(cache_key):
+    # Marks a cached recipe whose correction was tried and still broke the rule
+    return f"{cache_key}|correction=tried" if cache_key else None
+
+def correct_recipe(prompt, api_keys, result, violations, pantry, deadline=None, cache_key=None):
+    """
+    Regenerates, once, a recipe that used ingredients outside the pantry, with a
+    correction naming them. The better of the two is cached under ``cache_key``; if
+    it still breaks the rule, the attempt is recorded so that later cache hits are
+    served as they are instead of being corrected again. Cached results without a
+    ``cache_key`` are never corrected, as the correction could not replace them.
+
+    Returns:
+        GenerationResult: The corrected result if it uses fewer other ingredients,
+                          otherwise ``result``.
+    """
+    cache = recipe_cache()
+    if result.cached and (not cache_key or cache.contains(correction_key(cache_key))):
+        return result
+    corrected = gai_lib.generate_with_failover(RECIPE_PROVIDERS, create_correction_prompt(prompt, violations),
+                                               api_keys, system=RECIPE_SYSTEM_PROMPT, deadline=deadline,
+                                               models=RECIPE_MODELS, max_tokens=RECIPE_MAX_TOKENS, json_output=False)
+    remaining = check_recipe(corrected, pantry) if corrected.ok else violations
+    if corrected.ok and not remaining:
+        compliance.stats.record_correction(result.provider, result.model)
+    best = corrected if corrected.ok and len(remaining) < len(violations) else result
+    if cache_key:
+        if best is not result:
+            cache.put(cache_key, best)
+        if remaining:
+            cache.put(correction_key(cache_key), best)
+    return best
+
+def request_recipe(prompt, api_keys, deadline=None, cache_key=None, pantry=None):
+    """
+    Generates one recipe through gai_lib: pooled connections, retries, failover to
+    the other configured providers and the persistent recipe cache.
+
+    Args:
+        cache_key (str, optional): Canonical key of the request (see canonical_request).
+                                   Without it the cache is keyed by the exact prompt.
+        pantry (compliance.Pantry, optional): If given, a recipe using other ingredients
+                                              is regenerated once with a correction.
+
+    Returns:
+        GenerationResult: The markdown response as payload, with provider, model and latency.
+    """
+    result = gai_lib.generate_with_failover(RECIPE_PROVIDERS, prompt, api_keys, system=RECIPE_SYSTEM_PROMPT,
+                                            deadline=deadline, models=RECIPE_MODELS, max_tokens=RECIPE_MAX_TOKENS,
+                                            json_output=False, cache=recipe_cache(), cache_key=cache_key)
+    violations = check_recipe(result, pantry)
+    if violations:
+        result = correct_recipe(prompt, api_keys, result, violations, pantry, deadline, cache_key)
+    return result
+
+def request_recipes(prompt, api_keys, deadline=None, cache_key=None, pantry=None):
+    """
+    Generates every variant as its own request, concurrently, so the total time is
+    that of the slowest variant rather than the sum.
+
+    Returns:
+        list: One GenerationResult per variant, in VARIANT_HINTS order. A failed variant
+              does not affect the others.
+    """
+    def request_variant(variant):
+        return request_recipe(create_variant_prompt(prompt, variant), api_keys, deadline,
+                              variant_cache_key(cache_key, variant), pantry)
+    return gai_lib.parallel.run_parallel(request_variant, range(len(VARIANT_HINTS)))
+
+_variant_pool = ThreadPoolExecutor(max_workers=len(VARIANT_HINTS), thread_name_prefix="recipe-variant")
+
+def stream_recipes(prompt, api_keys, deadline=None, cache_key=None, pantry=None):
+    """
+    Starts all variants at once: the first one streamed (to be shown while it is
+    written), the others as regular requests in the background. ``pantry`` applies to
+    the background ones; the streamed one is checked by the caller once it is shown.
+
+    Returns:
+        tuple: (gai_lib.TextStream of the first variant, list of futures of the
+               other variants' GenerationResults).
+    """
+    futures = [_variant_pool.submit(contextvars.copy_context().run, request_recipe,
+                                    create_variant_prompt(prompt, variant), api_keys, deadline,
+                                    variant_cache_key(cache_key, variant), pantry)
+               for variant in range(1, len(VARIANT_HINTS))]
+    stream = gai_lib.stream_with_failover(RECIPE_PROVIDERS, create_variant_prompt(prompt, 0), api_keys,
+                                          system=RECIPE_SYSTEM_PROMPT, deadline=deadline, models=RECIPE_MODELS,
+                                          max_tokens=RECIPE_MAX_TOKENS, cache=recipe_cache(),
+                                          cache_key=variant_cache_key(cache_key, 0))
+    return stream, futures
+
+def merge_recipes(results):
+    """
+    Joins the successful variants into one response in the format format_recipe expects
+    (recipes separated by '---'). Returns the first error message if every variant failed.
+    """
+    recipes = [result.payload.strip() for result in results if result.ok]
+    if recipes:
+        return '\n---\n'.join(recipes)
+    return response_text(results[0]) if results else "An error occurred: No recipe was requested."
+
+def recipe_records(results, pantry=None):
+    """
+    Structured form of the variants' results, for JSON output.
+
+    Args:
+        pantry (compliance.Pantry, optional): Adds the ingredient lines it does not allow
+                                              to each recipe ("violations").
+
+    Returns:
+        dict: {"recipes": [Recipe.to_dict() plus "variant", "provider", "model", "cached"],
+               "errors": [{"variant", "error"}]}.
+    """
+    parsed, errors = [], []
+    for variant, result in enumerate(results):
+        if not result.ok:
+            errors.append({"variant": variant, "error": response_text(result)})
+            continue
+        parsed.extend((recipe, variant, result) for recipe in parse_recipes(result.payload))
+    # Nutrition of all the recipes in one vectorized pass
+    nutrition.compute([recipe for recipe, _, _ in parsed])
+    recipes = []
+    for recipe, variant, result in parsed:
+        record = recipe.to_dict()
+        record.update(variant=variant, provider=result.provider, model=result.model, cached=result.cached)
+        if pantry is not None:
+            record["violations"] = pantry.violations([recipe])
+        recipes.append(record)
+    return {"recipes": recipes, "errors": errors}
+
+def response_text(result):
+    """
+    Returns the recipe text of a result, or an error message starting with "An error occurred".
+    """
+    if result.ok:
+        return result.payload
+    if result.status == AUTH_ERROR:
+        return "An error occurred: Your API key is not valid. Please check your .env file."
+    return f"An error occurred: {result.error}"
 
-def generate_recipe(prompt):
+def generate_recipe(prompt, api_keys=None):
     """
-    Sends the prompt to the Google AI model and returns the generated recipe.
+    Sends the prompt to the configured AI providers and returns the generated recipe.
     """
     try:
-        api_key = get_api_key()
-        genai.configure(api_key=api_key)
-        model = genai.GenerativeModel('gemini-1.5-flash')
-        response = model.generate_content(prompt)
-        return response.text
-    except Exception as e:
-        error_message = str(e)
-        if "API key not valid" in error_message:
-            return "An error occurred: Your API key is not valid. Please check your .env file."
-        return f"An error occurred: {error_message}"
+        api_keys = api_keys or get_api_keys()
+    except ValueError as e:
+        return f"An error occurred: {e}"
+    return merge_recipes(request_recipes(prompt, api_keys))
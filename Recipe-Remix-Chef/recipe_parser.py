@@ -0,0 +1,217 @@
+"""
+Single-pass parser for the model's recipe markdown.
+
+The response is read line by line once: '---' starts a new recipe, '### ' starts a
+section, and every other line goes straight into the field of its section. The
+result is a list of compact Recipe objects that can be printed (``sections`` keeps
+the text as written) or exported as JSON (``to_dict``).
+
+    recipes = parse_recipes(ai_response)
+    recipes[0].name, recipes[0].ingredients[0].quantity, recipes[0].nutrition["calories"]
+"""
+
+import re
+
+# Section heading (case-folded prefix) -> Recipe field
+SECTION_FIELDS = {
+    "recipe name": "name",
+    "name": "name",
+    "servings": "servings",
+    "serves": "servings",
+    "ingredients": "ingredients",
+    "instructions": "steps",
+    "steps": "steps",
+    "method": "steps",
+    "cooking tips": "tips",
+    "tips": "tips",
+    "substitutions": "substitutions",
+    "nutritional information": "nutrition",
+    "nutrition": "nutrition",
+}
+
+# Spelling -> canonical unit
+UNITS = {}
+for _unit, _spellings in {
+    "cup": "cup cups c",
+    "tbsp": "tbsp tbsps tbs tablespoon tablespoons",
+    "tsp": "tsp tsps teaspoon teaspoons",
+    "g": "g gram grams gr",
+    "kg": "kg kilogram kilograms kilo kilos",
+    "mg": "mg milligram milligrams",
+    "ml": "ml milliliter milliliters millilitre millilitres",
+    "l": "l liter liters litre litres",
+    "oz": "oz ounce ounces",
+    "lb": "lb lbs pound pounds",
+    "pinch": "pinch pinches",
+    "dash": "dash dashes",
+    "clove": "clove cloves",
+    "can": "can cans tin tins",
+    "slice": "slice slices",
+    "piece": "piece pieces pcs",
+    "handful": "handful handfuls",
+    "bunch": "bunch bunches",
+    "stalk": "stalk stalks",
+    "sprig": "sprig sprigs",
+    "inch": "inch inches",
+}.items():
+    for _spelling in _spellings.split():
+        UNITS[_spelling] = _unit
+
+_FRACTIONS = {"½": 0.5, "⅓": 1 / 3, "⅔": 2 / 3, "¼": 0.25, "¾": 0.75, "⅛": 0.125}
+_BULLET = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s+")
+_MARKUP = re.compile(r"[*_`]+")
+_NUMBER = r"(?:\d+\s+\d+/\d+|\d+/\d+|\d+(?:\.\d+)?\s*[½⅓⅔¼¾⅛]?|[½⅓⅔¼¾⅛])"
+_QUANTITY = re.compile(rf"^(?P<quantity>{_NUMBER})(?:\s*(?:-|–|to)\s*{_NUMBER})?\s*(?P<rest>.*)$")
+_UNIT = re.compile(r"^(?P<unit>[a-zA-Z]+)\.?(?:\s+|$)(?:of\s+)?(?P<rest>.*)$")
+_NUTRIENT = re.compile(r"^(?P<name>[^:]+):\s*(?P<value>.*)$")
+_VALUE = re.compile(r"\d+(?:\.\d+)?")
+
+
+def _number(text):
+    text = text.strip()
+    total = 0.0
+    if text and text[-1] in _FRACTIONS:
+        total += _FRACTIONS[text[-1]]
+        text = text[:-1].strip()
+    for part in text.split():
+        if "/" in part:
+            numerator, denominator = part.split("/")
+            total += float(numerator) / float(denominator) if float(denominator) else 0.0
+        else:
+            total += float(part)
+    return total
+
+
+class Ingredient:
+    """One ingredient line: "2 cups basmati rice, rinsed" -> quantity 2.0, unit "cup", name "basmati rice"."""
+
+    __slots__ = ("text", "quantity", "unit", "name")
+
+    def __init__(self, text, quantity=None, unit=None, name=None):
+        self.text = text
+        self.quantity = quantity
+        self.unit = unit
+        self.name = name or text
+
+    @classmethod
+    def parse(cls, text):
+        quantity = unit = None
+        rest = text
+        match = _QUANTITY.match(text)
+        if match:
+            quantity = _number(match.group("quantity"))
+            rest = match.group("rest")
+            unit_match = _UNIT.match(rest)
+            if unit_match and unit_match.group("unit").casefold() in UNITS and unit_match.group("rest"):
+                unit = UNITS[unit_match.group("unit").casefold()]
+                rest = unit_match.group("rest")
+        name = re.sub(r"\s*\(.*?\)", "", rest).split(",")[0]
+        name = re.sub(r"\s+(?:to taste|as needed|for \w+)$", "", name.strip(), flags=re.IGNORECASE)
+        return cls(text, quantity, unit, name.strip() or text)
+
+    def to_dict(self):
+        return {"text": self.text, "quantity": self.quantity, "unit": self.unit, "name": self.name}
+
+    def __repr__(self):
+        return f"Ingredient({self.quantity!r}, {self.unit!r}, {self.name!r})"
+
+
+class Recipe:
+    """One parsed recipe. ``sections`` holds (heading, text) pairs as written, for display."""
+
+    __slots__ = ("name", "servings", "ingredients", "steps", "tips", "substitutions", "nutrition", "sections")
+
+    def __init__(self):
+        self.name = None
+        self.servings = None
+        self.ingredients = []
+        self.steps = []
+        self.tips = []
+        self.substitutions = []
+        self.nutrition = {}
+        self.sections = []
+
+    def _add(self, field, line):
+        item = _MARKUP.sub("", _BULLET.sub("", line)).strip()
+        if not item:
+            return
+        if field == "name":
+            if self.name is None:
+                self.name = item
+        elif field == "servings":
+            value = _VALUE.search(item)
+            if self.servings is None and value:
+                self.servings = int(float(value.group())) or None
+        elif field == "ingredients":
+            self.ingredients.append(Ingredient.parse(item))
+        elif field == "nutrition":
+            match = _NUTRIENT.match(item)
+            if match:
+                value = _VALUE.search(match.group("value"))
+                key = match.group("name").strip().casefold()
+                self.nutrition[key] = float(value.group()) if value else match.group("value").strip()
+        elif field is not None:
+            getattr(self, field).append(item)
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "servings": self.servings,
+            "ingredients": [ingredient.to_dict() for ingredient in self.ingredients],
+            "steps": self.steps,
+            "tips": self.tips,
+            "substitutions": self.substitutions,
+            "nutrition": self.nutrition,
+        }
+
+    def __repr__(self):
+        return f"Recipe({self.name!r}, {len(self.ingredients)} ingredients, {len(self.steps)} steps)"
+
+
+def _section_field(heading):
+    heading = _MARKUP.sub("", heading).strip().casefold()
+    for prefix, field in SECTION_FIELDS.items():
+        if heading.startswith(prefix):
+            return field
+    return None
+
+
+def parse_recipes(text):
+    """
+    Parses a response with one or more recipes (separated by '---') in one pass.
+
+    Returns:
+        list: Recipe objects, skipping recipes without any section.
+    """
+    recipes = []
+    recipe = None
+    field = None
+    body = None
+    for line in text.splitlines():
+        stripped = line.strip()
+        if stripped == "---":
+            recipe = None
+            continue
+        if stripped.startswith("### "):
+            if recipe is None:
+                recipe = Recipe()
+                recipes.append(recipe)
+            heading = stripped[len("### "):].strip()
+            field = _section_field(heading)
+            body = []
+            recipe.sections.append((heading, body))
+            continue
+        if recipe is None:
+            if not stripped:
+                continue
+            # Text before the first heading still belongs to a recipe
+            recipe = Recipe()
+            recipes.append(recipe)
+            field = None
+            body = []
+            recipe.sections.append(("", body))
+        body.append(line)
+        recipe._add(field, line)
+    for recipe in recipes:
+        recipe.sections = [(heading, "\n".join(lines).strip()) for heading, lines in recipe.sections]
+    return recipes
@@ -0,0 +1,460 @@
+"""
+Ingredient taxonomy: normalized ingredient names, synonyms and multi-word phrases
+tagged with the diet classes they affect (meat, fish, egg, dairy, gluten, ...).
+
+The table is compiled once into a phrase -> entry dict. Classifying an ingredient
+list is a single pass over its words with dict lookups (longest phrase first), so
+"chicken breast", "prawns", "fish sauce" and "Eggs" are all recognized, while
+"peanut butter", "eggplant" and "vegan sausage" are not mistaken for animal products.
+
+    matches = taxonomy.classify(["Chicken breasts", "rice", "fish sauce"])
+    taxonomy.conflicts(matches, "Vegetarian")     # the chicken and the fish sauce
+    taxonomy.canonical("Prawns")                  # ["shrimp"]
+
+Larger taxonomies (tens of thousands of entries) can be loaded from a file in the
+same format with ``Taxonomy.from_file(path)``.
+"""
+
+import functools
+import re
+import unicodedata
+
+# Diet tags, as bit flags so a whole ingredient list is combined with "|"
+MEAT = 1 << 0
+POULTRY = 1 << 1
+FISH = 1 << 2
+SHELLFISH = 1 << 3
+EGG = 1 << 4
+DAIRY = 1 << 5
+HONEY = 1 << 6
+ANIMAL = 1 << 7       # other animal products: gelatin, lard, ...
+GLUTEN = 1 << 8
+
+TAGS = {"meat": MEAT, "poultry": POULTRY, "fish": FISH, "shellfish": SHELLFISH, "egg": EGG,
+        "dairy": DAIRY, "honey": HONEY, "animal": ANIMAL, "gluten": GLUTEN}
+
+# Ingredients counted as non-vegetarian (eggs included, as in the app's original keyword list)
+NON_VEG = MEAT | POULTRY | FISH | SHELLFISH | EGG | ANIMAL
+ANIMAL_PRODUCTS = NON_VEG | DAIRY | HONEY
+
+# Dietary choice -> tags its ingredients must not have
+DIET_EXCLUDES = {
+    "Vegetarian": NON_VEG,
+    "Vegan": ANIMAL_PRODUCTS,
+    "Gluten-Free": GLUTEN,
+}
+
+# canonical name|tags (comma separated; "-tag" removes the tag from the ingredient, and
+# entries that only remove tags are modifiers, not ingredients)|synonyms (comma separated)
+_TABLE = """
+beef|meat|steak,ground beef,minced beef,mince,brisket,sirloin,ribeye,veal,oxtail,corned beef
+pork|meat|pork chop,pork belly,pork loin,pulled pork,spare rib
+lamb|meat|mutton,lamb chop
+goat|meat|goat meat,chevon
+venison|meat|deer
+rabbit|meat|
+bison|meat|buffalo meat
+bacon|meat|pancetta,lardon
+ham|meat|prosciutto,gammon
+sausage|meat|chorizo,bratwurst,hot dog,frankfurter,kielbasa,pepperoni
+salami|meat|
+liver|meat|
+meatball|meat|
+burger|meat|hamburger,patty
+chicken|poultry|chicken breast,chicken thigh,chicken wing,chicken drumstick,drumstick,rotisserie chicken
+duck|poultry|duck breast
+turkey|poultry|ground turkey
+quail|poultry|
+goose|poultry|
+fish|fish|white fish,fish fillet
+salmon|fish|smoked salmon,lox
+tuna|fish|canned tuna,ahi
+cod|fish|
+tilapia|fish|
+haddock|fish|
+halibut|fish|
+trout|fish|
+mackerel|fish|
+sardine|fish|
+anchovy|fish|anchovies
+catfish|fish|
+sea bass|fish|bass
+snapper|fish|red snapper
+fish sauce|fish|nam pla
+worcestershire sauce|fish|worcestershire
+oyster sauce|shellfish|
+dashi|fish|bonito,katsuobushi
+shrimp|shellfish|prawn,king prawn,tiger prawn
+crab|shellfish|crab meat
+lobster|shellfish|
+mussel|shellfish|
+oyster|shellfish|
+clam|shellfish|
+scallop|shellfish|
+squid|shellfish|calamari
+octopus|shellfish|
+egg|egg|eggs,egg white,egg yolk,hard boiled egg
+mayonnaise|egg|mayo
+milk|dairy|whole milk,skim milk,buttermilk
+butter|dairy|ghee,clarified butter
+cream of tartar||
+cream|dairy|heavy cream,whipping cream,double cream,single cream,sour cream,creme fraiche
+cheese|dairy|cheddar,mozzarella,parmesan,feta,gouda,brie,ricotta,cottage cheese,cream cheese,halloumi,mascarpone,swiss cheese,goat cheese
+paneer|dairy|
+yogurt|dairy|yoghurt,curd,greek yogurt
+ice cream|dairy|
+condensed milk|dairy|evaporated milk
+whey|dairy|
+honey|honey|
+gelatin|animal|gelatine
+lard|animal|suet,tallow
+bone broth|meat|beef stock,beef broth
+chicken broth|poultry|chicken stock
+fish stock|fish|fish broth
+peanut butter||
+almond butter||
+cocoa butter||
+apple butter||
+coconut milk||coconut cream
+almond milk||
+soy milk||soya milk
+oat milk||
+rice milk||
+eggplant||aubergine,brinjal
+egg noodle|egg,gluten|
+vegan|-meat,-poultry,-fish,-shellfish,-egg,-dairy,-honey,-animal|plant based
+vegetarian|-meat,-poultry,-fish,-shellfish,-animal|veggie,meatless,meat free,mock,imitation,faux
+eggless|-egg|egg free
+dairy free|-dairy|lactose free,non dairy
+gluten free|-gluten|gf
+wheat|gluten|whole wheat,wheat berry
+flour|gluten|all purpose flour,plain flour,bread flour,wheat flour,maida,atta
+bread|gluten|white bread,whole wheat bread,sourdough,baguette,toast,bun,roll
+breadcrumb|gluten|panko
+pasta|gluten|spaghetti,penne,macaroni,fusilli,linguine,fettuccine,lasagna,lasagne,ravioli,tortellini,orzo,gnocchi
+noodle|gluten|udon,ramen,lo mein
+couscous|gluten|
+barley|gluten|pearl barley
+rye|gluten|
+semolina|gluten|sooji,rava
+bulgur|gluten|cracked wheat
+farro|gluten|spelt
+seitan|gluten|wheat gluten
+soy sauce|gluten|shoyu
+beer|gluten|ale,lager
+malt|gluten|malt vinegar
+cracker|gluten|
+tortilla|gluten|flour tortilla,wrap
+pita|gluten|pita bread
+naan|gluten|
+bagel|gluten|
+croissant|gluten|
+pizza dough|gluten|pastry,puff pastry,pie crust,phyllo
+cake|gluten|
+cookie|gluten|biscuit
+rice noodle||vermicelli,rice vermicelli,glass noodle
+corn tortilla||
+tamari||
+rice flour||
+chickpea flour||besan,gram flour
+almond flour||
+corn flour||cornmeal,polenta,masa
+cornstarch||corn starch
+oat||oats,rolled oats,oatmeal
+rice||white rice,brown rice,basmati,jasmine rice,arborio
+quinoa||
+buckwheat||
+millet||
+corn||sweetcorn,maize,corn kernel
+potato||potatoes,sweet potato,yam
+tomato||tomatoes,cherry tomato,tomato paste,tomato puree,passata
+onion||onions,red onion,shallot,spring onion,scallion,green onion
+garlic||garlic clove
+ginger||
+carrot||
+celery||
+bell pepper||capsicum,red pepper,green pepper
+chili||chilli,chile,green chili,red chili,jalapeno,chili flake
+cucumber||
+zucchini||courgette
+squash||butternut squash,pumpkin
+broccoli||
+cauliflower||
+cabbage||red cabbage,bok choy,pak choi
+spinach||
+kale||
+lettuce||romaine,iceberg
+arugula||rocket
+mushroom||button mushroom,shiitake,portobello,oyster mushroom
+pea||peas,green pea
+green bean||french bean,string bean
+okra||bhindi
+asparagus||
+beet||beetroot
+radish||daikon
+avocado||
+olive||black olive,green olive
+leek||
+artichoke||
+brussels sprout||
+lentil||dal,dhal,red lentil
+chickpea||garbanzo,chana
+black bean||
+kidney bean||rajma
+bean||beans,cannellini,pinto bean,navy bean,butter bean
+tofu||bean curd
+tempeh||
+edamame||
+soybean||soy,soya
+peanut||groundnut
+almond||
+cashew||
+walnut||
+pistachio||
+hazelnut||
+pecan||
+sesame||sesame seed,tahini
+sunflower seed||
+pumpkin seed||pepita
+chia seed||
+flaxseed||linseed
+coconut||desiccated coconut,coconut flake
+apple||
+banana||
+orange||
+lemon||lemon juice
+lime||lime juice
+mango||
+pineapple||
+strawberry||
+blueberry||
+raspberry||
+grape||raisin
+peach||
+pear||
+cherry||
+date||
+fig||
+watermelon||
+melon||cantaloupe
+pomegranate||
+kiwi||
+apricot||
+plum||prune
+sugar||brown sugar,caster sugar,powdered sugar,icing sugar,jaggery
+maple syrup||
+molasses||
+chocolate||dark chocolate,cocoa,cocoa powder
+vanilla||vanilla extract
+baking powder||
+baking soda||bicarbonate of soda
+yeast||
+salt||sea salt,kosher salt
+black pepper||pepper,peppercorn,white pepper
+water||
+oil||cooking oil,vegetable oil,olive oil,canola oil,sunflower oil,coconut oil,sesame oil,mustard oil
+vinegar||white vinegar,apple cider vinegar,rice vinegar,balsamic vinegar
+mustard||mustard seed,dijon
+ketchup||
+cumin||jeera,cumin seed
+coriander||cilantro,dhania
+turmeric||haldi
+garam masala||
+curry powder||
+curry paste||red curry paste,green curry paste
+paprika||smoked paprika
+chili powder||cayenne
+cinnamon||
+cardamom||
+clove||cloves
+nutmeg||
+bay leaf||bay leaves
+oregano||
+basil||thai basil
+rosemary||
+thyme||
+parsley||
+mint||
+dill||
+sage||
+lemongrass||
+five spice powder||five spice
+star anise||
+saffron||
+fenugreek||methi
+asafoetida||hing
+curry leaf||curry leaves
+stock||vegetable stock,vegetable broth,broth
+miso||
+gochujang||
+sriracha||hot sauce
+salsa||
+hummus||
+jam||
+wine||red wine,white wine
+"""
+
+# Plurals the suffix rules below would get wrong
+_IRREGULAR = {"leaves": "leaf", "loaves": "loaf", "halves": "half", "molasses": "molasses",
+              "chilies": "chili", "chillies": "chilli"}
+_WORD = re.compile(r"[a-z]+")
+
+
+def singular(word):
+    """English singular of a lowercase word, by common suffix rules."""
+    if word in _IRREGULAR:
+        return _IRREGULAR[word]
+    if len(word) <= 3:
+        return word
+    if word.endswith("ies"):
+        return word[:-3] + "y"
+    if word.endswith(("oes", "ches", "shes", "sses", "xes")):
+        return word[:-2]
+    if word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return word[:-1]
+    # -ie and -y nouns share the -ies plural (cookies, berries): fold both to -y
+    if word.endswith("ie"):
+        return word[:-2] + "y"
+    return word
+
+
+def words(text):
+    """Normalized words of ``text``: case-folded, accents dropped, singular, digits and punctuation removed."""
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    plain = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return [singular(word) for word in _WORD.findall(plain)]
+
+
+def _parse_tags(field):
+    add = remove = 0
+    for tag in filter(None, (part.strip() for part in field.split(","))):
+        if tag.startswith("-"):
+            remove |= TAGS[tag[1:]]
+        else:
+            add |= TAGS[tag]
+    return add, remove
+
+
+class Entry:
+    """One taxonomy entry. Modifiers ("vegan", "gluten free") only remove tags and have no ``id``."""
+
+    __slots__ = ("id", "name", "tags", "removes")
+
+    def __init__(self, id, name, tags, removes):
+        self.id = id
+        self.name = name
+        self.tags = tags
+        self.removes = removes
+
+    def __repr__(self):
+        return f"Entry({self.name!r}, tags={self.tags:#x})"
+
+
+class IngredientMatch:
+    """Classification of one ingredient string."""
+
+    __slots__ = ("text", "entries", "tags")
+
+    def __init__(self, text, entries, tags):
+        self.text = text
+        self.entries = entries
+        self.tags = tags
+
+    @property
+    def names(self):
+        """Canonical names of the ingredients found in the text."""
+        return [entry.name for entry in self.entries if entry.id is not None]
+
+    @property
+    def known(self):
+        return any(entry.id is not None for entry in self.entries)
+
+    def __repr__(self):
+        return f"IngredientMatch({self.text!r}, names={self.names}, tags={self.tags:#x})"
+
+
+class Taxonomy:
+    """Compiled phrase index over taxonomy entries."""
+
+    def __init__(self, rows):
+        """
+        Args:
+            rows (iterable): (canonical name, tags field, synonyms field) tuples, see _TABLE.
+        """
+        self.entries = []
+        self._phrases = {}
+        self.longest = 1
+        self.size = 0
+        for name, tags, synonyms in rows:
+            add, remove = _parse_tags(tags)
+            if remove and not add:
+                entry = Entry(None, name, add, remove)
+            else:
+                entry = Entry(self.size, name, add, remove)
+                self.size += 1
+            self.entries.append(entry)
+            for phrase in (name, *synonyms.split(",")):
+                key = tuple(words(phrase))
+                if key:
+                    # The first entry to claim a phrase keeps it
+                    self._phrases.setdefault(" ".join(key), entry)
+                    self.longest = max(self.longest, len(key))
+
+    @classmethod
+    def from_text(cls, text):
+        rows = (line.split("|") for line in text.strip().splitlines() if line.strip() and not line.startswith("#"))
+        return cls((name.strip(), tags, synonyms) for name, tags, synonyms in rows)
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, encoding="utf-8") as f:
+            return cls.from_text(f.read())
+
+    def match(self, text):
+        """Classifies one ingredient string (longest known phrase first at each word)."""
+        tokens = words(text)
+        entries = []
+        tags = removes = 0
+        i = 0
+        while i < len(tokens):
+            for n in range(min(self.longest, len(tokens) - i), 0, -1):
+                entry = self._phrases.get(" ".join(tokens[i:i + n]))
+                if entry is not None:
+                    entries.append(entry)
+                    tags |= entry.tags
+                    removes |= entry.removes
+                    i += n
+                    break
+            else:
+                i += 1
+        return IngredientMatch(text, entries, tags & ~removes)
+
+    def classify(self, ingredients):
+        """Classifies every ingredient of a list in one pass."""
+        return [self.match(ingredient) for ingredient in ingredients]
+
+
+@functools.lru_cache(maxsize=None)
+def default_taxonomy():
+    """The bundled taxonomy, compiled on first use."""
+    return Taxonomy.from_text(_TABLE)
+
+
+def classify(ingredients):
+    return default_taxonomy().classify(ingredients)
+
+
+def canonical(ingredient):
+    """Canonical names of the known ingredients in one ingredient string."""
+    return default_taxonomy().match(ingredient).names
+
+
+def conflicts(matches, diet):
+    """Ingredient strings of ``matches`` that a ``diet`` (e.g. "Vegan") does not allow."""
+    excluded = DIET_EXCLUDES.get(diet, 0)
+    return [match.text for match in matches if match.tags & excluded]
+
+
+def contains(matches, tags):
+    """True if any ingredient has one of ``tags``."""
+    return any(match.tags & tags for match in matches)
@@ -1,8 +1,48 @@
 import colorama
 from colorama import Fore, Style
 
+from recipe_parser import parse_recipes
+import nutrition
+
 colorama.init(autoreset=True)
 
+def print_banner():
+    print("\n" + Fore.CYAN + Style.BRIGHT + "="*50)
+    print(Fore.CYAN + Style.BRIGHT + "      Your Custom Recipes! 🍳")
+    print(Fore.CYAN + Style.BRIGHT + "="*50 + "\n")
+
+def print_recipe_header(number):
+    print(f"{Fore.MAGENTA}{Style.BRIGHT}--- RECIPE {number} ---\n")
+
+def print_section(section):
+    """
+    Prints one '### ' section (heading line first, without the '### ').
+    """
+    title, _, content = section.partition('\n')
+    print_heading(title.strip(), content.strip())
+
+def print_heading(title, content):
+    if not content:
+        # This handles the case where a section might just be a title
+        print(f"{Fore.YELLOW}{Style.BRIGHT}### {title}\n")
+        return
+    if title:
+        print(f"{Fore.YELLOW}{Style.BRIGHT}### {title}")
+    print(content + "\n")
+
+def print_nutrition(recipe):
+    """
+    Prints the recipe's nutrition, computed locally from its ingredients by
+    nutrition.compute, as a section in the same style as the others.
+    """
+    values = recipe.nutrition
+    serving = f"per serving, serves {recipe.servings}" if recipe.servings else "whole recipe"
+    print_heading(f"Nutritional Information (estimated {serving})",
+                  f"- Calories: {values['calories']:.0f} kcal\n"
+                  f"- Protein: {values['protein']:.1f} g\n"
+                  f"- Carbohydrates: {values['carbohydrates']:.1f} g\n"
+                  f"- Fat: {values['fat']:.1f} g")
+
 def format_recipe(ai_response):
     """
     Parses the AI response and formats it with colors for better readability.
@@ -11,32 +51,84 @@ def format_recipe(ai_response):
         print(Fore.RED + "Sorry, I couldn't generate a recipe with those constraints. Please try different ingredients.")
         return
 
-    print("\n" + Fore.CYAN + Style.BRIGHT + "="*50)
-    print(Fore.CYAN + Style.BRIGHT + "      Your Custom Recipes! 🍳")
-    print(Fore.CYAN + Style.BRIGHT + "="*50 + "\n")
+    print_banner()
 
     if ai_response.startswith("An error occurred"):
         print(Fore.RED + ai_response)
         return
 
-    recipes = ai_response.split('\n---\n')
-
-    for i, recipe_text in enumerate(recipes):
-        if not recipe_text.strip():
-            continue
-        
-        print(f"{Fore.MAGENTA}{Style.BRIGHT}--- RECIPE {i+1} ---\n")
-
-        # Use a more robust way to handle sections
-        sections = recipe_text.split('### ')
-        for section in sections:
-            if not section.strip():
-                continue
-
-            try:
-                title, content = section.split('\n', 1)
-                print(f"{Fore.YELLOW}{Style.BRIGHT}### {title.strip()}")
-                print(content.strip() + "\n")
-            except ValueError:
-                # This handles the case where a section might just be a title
-                print(f"{Fore.YELLOW}{Style.BRIGHT}### {section.strip()}\n")
+    # One pass over the response; the sections keep the text as the model wrote it
+    recipes = nutrition.compute(parse_recipes(ai_response))
+    for i, recipe in enumerate(recipes, 1):
+        print_recipe_header(i)
+        for title, content in recipe.sections:
+            print_heading(title, content)
+        print_nutrition(recipe)
+
+class StreamingRecipePrinter:
+    """
+    Prints recipes while they are being generated: each '### ' section as soon as the
+    next heading (or the '---' between recipes, or the end of the stream) shows that it
+    is complete. The output looks the same as format_recipe's, including the computed
+    nutrition once a recipe is complete.
+    """
+
+    def __init__(self):
+        self.recipes = 0
+        self.sections = 0
+        self._line = ""
+        self._section = []
+        self._recipe = []
+        self._in_recipe = False
+
+    def feed(self, delta):
+        """Adds a text delta and prints every section it completes."""
+        self._line += delta
+        *lines, self._line = self._line.split('\n')
+        for line in lines:
+            self._add_line(line)
+
+    def close(self):
+        """Prints whatever is left at the end of the stream."""
+        if self._line:
+            self._add_line(self._line)
+            self._line = ""
+        self._flush()
+
+    def next_recipe(self):
+        """Ends the current recipe; the next text starts a new one."""
+        self.close()
+        self._end_recipe()
+
+    def _end_recipe(self):
+        if self._in_recipe:
+            for recipe in nutrition.compute(parse_recipes('\n'.join(self._recipe))):
+                print_nutrition(recipe)
+        self._recipe = []
+        self._in_recipe = False
+
+    def _add_line(self, line):
+        if line.strip() == '---':
+            self._flush()
+            self._end_recipe()
+            return
+        self._recipe.append(line)
+        if line.startswith('### '):
+            self._flush()
+            self._section = [line[len('### '):]]
+        elif self._section or line.strip():
+            self._section.append(line)
+
+    def _flush(self):
+        section = '\n'.join(self._section)
+        self._section = []
+        if not section.strip():
+            return
+        if not self.recipes:
+            print_banner()
+        if not self._in_recipe:
+            self.recipes += 1
+            self._in_recipe = True
+            print_recipe_header(self.recipes)
+        self.sections += 1
+        print_section(section)
@@ -0,0 +1,135 @@
+"""
+Long stories in sections: one short outline request, then every section generated
+concurrently (spread over the available providers), then one short request for the
+transitions between sections. A failed section is retried on its own.
+"""
+
+import time
+
+import gai_lib
+from gai_lib.result import GenerationResult, OK, PARSE_ERROR, merge_usage
+from prompts import (OUTLINE_SYSTEM_PROMPT, SECTION_SYSTEM_PROMPT, STITCH_SYSTEM_PROMPT,
+                     build_outline_prompt, build_section_prompt, build_stitch_prompt)
+
+# Target size of one section when the number of sections is not given
+SECTION_CHARACTERS = 4000
+MAX_SECTIONS = 8
+# Characters of each side of a boundary shown to the stitching request
+STITCH_CONTEXT = 300
+
+
+def section_count(max_limit, sections=None):
+    """Number of sections for a story of at most ``max_limit`` characters."""
+    if sections:
+        return sections
+    return max(2, min(MAX_SECTIONS, -(-max_limit // SECTION_CHARACTERS)))
+
+
+# Section i prefers provider i (mod n) so concurrent sections are spread over providers;
+# the others remain as failover
+def _rotate(providers, index):
+    index %= len(providers)
+    return providers[index:] + providers[:index]
+
+
+def _valid_outline(payload, sections):
+    if not isinstance(payload, dict) or not isinstance(payload.get("sections"), list):
+        return None
+    parts = [part for part in payload["sections"] if isinstance(part, dict) and part.get("summary")]
+    if not parts:
+        return None
+    return {"title": payload.get("title") or "Untitled", "sections": parts[:sections]}
+
+
+def _section_text(result):
+    if result.ok and isinstance(result.payload, dict) and isinstance(result.payload.get("story"), str):
+        return result.payload["story"].strip() or None
+    return None
+
+
+def _stitch(spec, texts, providers, api_keys, deadline):
+    # One short request for all boundaries; without it the sections are simply joined
+    endings = [text[-STITCH_CONTEXT:] for text in texts[:-1]]
+    openings = [text[:STITCH_CONTEXT] for text in texts[1:]]
+    result = gai_lib.generate_with_failover(providers, build_stitch_prompt(spec, endings, openings), api_keys,
+                                            system=STITCH_SYSTEM_PROMPT, deadline=deadline)
+    bridges = result.payload.get("bridges") if result.ok and isinstance(result.payload, dict) else None
+    if not isinstance(bridges, list) or len(bridges) != len(endings):
+        print(f"Stitching skipped ({result.status}); sections are joined as written.")
+        bridges = [""] * len(endings)
+
+    parts = [texts[0]]
+    for bridge, text in zip(bridges, texts[1:]):
+        if isinstance(bridge, str) and bridge.strip():
+            parts.append(bridge.strip())
+        parts.append(text)
+    return "\n\n".join(parts), result
+
+
+def generate_story_in_sections(spec, providers, api_keys, sections=None, deadline=None, retries=1, tiered=False):
+    """
+    Generates one story as an outline plus concurrently written sections.
+
+    Args:
+        spec (dict): Story parameters (see prompts.build_story_prompt).
+        providers (list): Providers to spread the sections over, in order of preference.
+        api_keys (dict): Provider name -> API key.
+        sections (int, optional): Number of sections. Defaults to one per SECTION_CHARACTERS.
+        deadline (Deadline, optional): Budget for the whole story.
+        retries (int): Extra rounds for sections that failed, each on its own.
+        tiered (bool): Write sections with the cheapest model first (see gai_lib.generate_tiered).
+
+    Returns:
+        tuple: (GenerationResult with a {"title", "story"} payload, list of section results).
+    """
+    start = time.perf_counter()
+    count = section_count(spec["max_limit"], sections)
+
+    with gai_lib.telemetry.span("story.outline", {"sections": count}):
+        outline_result = gai_lib.generate_with_failover(providers, build_outline_prompt(spec, count), api_keys,
+                                                        system=OUTLINE_SYSTEM_PROMPT, deadline=deadline)
+    if not outline_result.ok:
+        return outline_result, []
+    outline = _valid_outline(outline_result.payload, count)
+    if outline is None:
+        return GenerationResult.failure(PARSE_ERROR, "Invalid Outline", "The outline has no usable sections.",
+                                        raw_text=outline_result.raw_text), []
+    count = len(outline["sections"])
+    print(f"Outline: '{outline['title']}' in {count} sections")
+    validate = gai_lib.tiers.payload_validator(("story",), text_field="story", language=spec["language_code"])
+
+    def write_section(job):
+        index, attempt = job
+        with gai_lib.telemetry.span("story.section", {"section": index + 1, "attempt": attempt}):
+            return gai_lib.generate_with_failover(_rotate(providers, index + attempt), build_section_prompt(spec, outline, index),
+                                                  api_keys, system=SECTION_SYSTEM_PROMPT, deadline=deadline,
+                                                  tiered=tiered, validate=validate)
+
+    results = gai_lib.parallel.run_parallel(write_section, [(index, 0) for index in range(count)], max_workers=count)
+    for attempt in range(1, retries + 1):
+        failed = [index for index, result in enumerate(results) if _section_text(result) is None]
+        if not failed or (deadline is not None and deadline.expired):
+            break
+        print(f"Retrying section(s) {[index + 1 for index in failed]}...")
+        for index, result in zip(failed, gai_lib.parallel.run_parallel(write_section, [(index, attempt) for index in failed])):
+            results[index] = result
+
+    failed = [index for index, result in enumerate(results) if _section_text(result) is None]
+    if failed:
+        last = results[failed[0]]
+        return GenerationResult.failure(last.status, "Section Failed",
+                                        f"Section(s) {[index + 1 for index in failed]} could not be generated: {last.error}"), results
+
+    with gai_lib.telemetry.span("story.stitch"):
+        story, stitch_result = _stitch(spec, [_section_text(result) for result in results], providers, api_keys, deadline)
+
+    calls = [outline_result, *results, stitch_result]
+    used = [result for result in calls if result.ok]
+    return GenerationResult(
+        status=OK,
+        payload={"title": outline["title"], "story": story},
+        usage=merge_usage(*(result.usage for result in calls)),
+        latency=time.perf_counter() - start,
+        provider="+".join(dict.fromkeys(result.provider for result in used if result.provider)),
+        model="+".join(dict.fromkeys(result.model for result in used if result.model)),
+    ), results
@@ -7,13 +7,37 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 import sys
 import os
-import langcodes
+import argparse
 import json
 from dotenv import load_dotenv, find_dotenv
 
 # Ensure the parent directory is in the system path to import gai_lib
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 import gai_lib
+from storage import story_txt_path, format_story_txt, build_story_record, build_translation_record
+from prompts import STORY_SYSTEM_PROMPT, build_story_prompt
+from chapters import generate_story_in_sections, section_count
+from translation import parse_languages, translate_story
+from repair import validate_and_repair, tier_validator
+from spec import VALID_GENRES, VALID_AUDIENCES, VALID_ENDINGS, MINCHARACTER_LIMIT, MAXCHARACTER_LIMIT
+
+# Command line options: where generated stories are written
+parser = argparse.ArgumentParser(description="Interactive AI story generator")
+parser.add_argument("--output", choices=["archive", "txt", "both"], default="archive",
+                    help="save stories to a compressed archive, loose .txt files, or both (default: archive)")
+parser.add_argument("--archive-dir", default="story_archive", help="archive directory (default: story_archive)")
+parser.add_argument("--mode", choices=["single", "chapters"], default="single",
+                    help="one request per story, or an outline plus sections written in parallel (default: single)")
+parser.add_argument("--sections", type=int, help="number of sections in chapters mode (default: one per 4000 characters)")
+parser.add_argument("--tiered", action="store_true",
+                    help="try each provider's cheapest model first and escalate only if the story fails validation")
+parser.add_argument("--languages", default="",
+                    help="comma separated languages to translate each story into, e.g. 'fr,German,español'")
+args = parser.parse_args()
+
+target_languages, unknown_languages = parse_languages(args.languages)
+if unknown_languages:
+    parser.error(f"unknown language(s) in --languages: {', '.join(unknown_languages)}")
 
 # The .env is one level up from main.py
 dotenv_path = os.path.join(os.path.dirname(__file__), '..', '.env')
@@ -27,6 +51,10 @@ if not api_keys:
     print("No API keys found. Please set the environment variables ending with '_API_KEY'.")
     sys.exit(1)
 
+# Resolve, connect and initialize the provider clients in the background
+# while the user answers the questions below
+gai_lib.warm_up(api_keys)
+
 # Do this only if debugging is needed
 # Uncomment the following lines to print the API keys for debugging purposes
 ## Print the API keys to verify they are read correctly
@@ -46,38 +74,29 @@ while True:
         break
 
 # Validate the input for genre and ensure it is one of the valid genres
-valid_genres = ['fantasy', 'sci-fi', 'mystery', 'adventure', 'romance', 'thriller', 'historical', 'mythological']
+valid_genres = VALID_GENRES
 genre = input(f"Enter a genre {valid_genres}: ")
 while genre not in valid_genres:
     print(f"Invalid genre. Please choose from: {valid_genres}")
     genre = input(f"Enter a genre {valid_genres}: ")
 
 # Validate the input for audience and ensure it is one of the valid audiences
-valid_audiences = ['children', 'teens', 'adults']
+valid_audiences = VALID_AUDIENCES
 audience = input(f"Enter an audience {valid_audiences}: ")
 while audience not in valid_audiences:
     print(f"Invalid audience. Please choose from: {valid_audiences}")
     audience = input(f"Enter an audience {valid_audiences}: ")
 
-# Validate the output language and ensure it is not empty
-language_code = None
+# Validate the output language and resolve it to its ISO 639-1 code,
+# for example 'en' for English, 'fr' for French (or "français"), etc.
 while True:
     output_language = input("Enter an output language: ")
-    if output_language.strip():
+    if not output_language.strip():
+        print("Output language cannot be empty. Please try again.")
+    elif not (language_code := gai_lib.languages.resolve(output_language)):
+        print(f"Unknown language: {output_language}. Please enter a language name (e.g. French, español) or ISO code (e.g. fr).")
+    else:
         break
-    print("Output language cannot be empty. Please try again.")
-    
-# Find or calculate language code from ISO 639-1 standard
-# For example, 'en' for English, 'fr' for French, etc.
-try:
-    # Convert language name to ISO 639-1 2-letter code
-    # This will raise ValueError if the language is not found
-    language_code = langcodes.find(output_language).language
-    if not language_code:
-        raise ValueError("Language not found in ISO 639-1 standard.")
-except ValueError:
-    print("Invalid language name. Defaulting to English.")
-    language_code = langcodes.find("English").language
 
 
 # Validate the input for keys to use and ensure it is one of the valid options
@@ -88,8 +107,8 @@ while key_to_use not in valid_keys:
     key_to_use = input(f"Enter key to use {valid_keys}: ")
 
 # Validate the input for story length and ensure it is a positive integer and is between the limits
-min_limit = MINCHARACTER_LIMIT = 200
-max_limit = MAXCHARACTER_LIMIT = 20000 
+min_limit = MINCHARACTER_LIMIT
+max_limit = MAXCHARACTER_LIMIT
 while True:
     # Prompt the user for both minimum and maximum character limits on the story
     min_limit = input(f"Enter the minimum character limit for the story (default {MINCHARACTER_LIMIT}): ")
@@ -126,41 +145,29 @@ while True:
    
 
 # Validate the input for story ending and ensure it is one of the valid endings
-valid_endings = ['twist', 'cliffhanger', 'simple']
+valid_endings = VALID_ENDINGS
 story_ending = input(f"Enter the ending of the story {valid_endings}: ")
 while story_ending not in valid_endings:
     print(f"Invalid ending. Please choose from: {valid_endings}")
     story_ending = input(f"Enter the ending of the story {valid_endings}: ")
 
-# Generate the prompt for the AI story generator
-# Generate the prompt for the AI story generator
-# Generate the prompt for the AI story generator
-prompt = f"""
-Write a short story in the {genre} genre with not less than {min_limit} characters and not more than {max_limit} characters. Use the following elements:
-
-- Main character: {character}
-- Plot Setting: {plot_setting}
-- Target Audience: {audience}
-- Language: {output_language}
-- Story Ending Style: {story_ending}
-
-Requirements:
-- Include dialogue and descriptive language appropriate for {audience}
-- Stay true to the {genre} genre throughout the story
-- Create an ending that matches the {story_ending} style
-- Write the story in {output_language}
-
-CRITICAL JSON FORMATTING RULES:
-- Return ONLY valid JSON - no markdown, no code blocks, no extra text
-- All quotes inside the story text MUST be escaped with backslash: \\"
-- All newlines should be literal \\n characters
-- Do not use any control characters that break JSON
-
-Example format:
-{{"title": "Story Title", "story": "Story text with \\"escaped quotes\\" and proper formatting."}}
-
-Your response:
-"""
+# The story parameters are sent to the model and stored with every archived story
+story_spec = {
+    "character": character,
+    "plot_setting": plot_setting,
+    "genre": genre,
+    "audience": audience,
+    "language": output_language,
+    "language_code": language_code,
+    "min_limit": min_limit,
+    "max_limit": max_limit,
+    "ending": story_ending,
+}
+
+# Generate the prompt for the AI story generator. The constant instructions go in the
+# system prompt (a cacheable prefix); the prompt itself only holds this story's details.
+with gai_lib.telemetry.span("story.prompt_build"):
+    prompt = build_story_prompt(story_spec)
 
 # Print the generated prompt for debugging purposes
 print("Generated Prompt:")
@@ -176,59 +183,170 @@ else:
     # Convert the single key to a list
     keys_to_use = [f"{key_to_use}"]
 
+# Translations into the story's own language are not needed
+target_languages = [language for language in target_languages if language.code != language_code]
+
+# Each run is (label, providers): one story per provider, or in chapters mode a single
+# story whose sections are spread over all the selected providers
+if args.mode == "chapters":
+    chapter_providers = [key for key in keys_to_use if key in api_keys and key in gai_lib.PROVIDERS]
+    runs = [("+".join(chapter_providers), chapter_providers)] if chapter_providers else []
+    if runs:
+        print(f"Chapters mode: {section_count(max_limit, args.sections)} sections over {chapter_providers}")
+    else:
+        print(f"No API key found for {keys_to_use}")
+else:
+    runs = [(key, [key]) for key in keys_to_use]
+
+archive = None
+if args.output in ("archive", "both"):
+    archive = gai_lib.RecordArchive(args.archive_dir, index_fields=("provider", "language", "translation_of"))
+
+# Files are written on a background thread so slow disks do not delay the next provider
+writer = gai_lib.BackgroundWriter()
+reserved_paths = set()
+
+# Maximum time in seconds spent on one provider, including retries
+GENERATION_TIMEOUT = 90
+# Maximum time for a whole story in chapters mode (outline, sections and stitching)
+CHAPTERS_TIMEOUT = 180
+
+# Generate one story in the selected mode; also used to regenerate a story that fails validation
+def generate_story(providers, deadline):
+    if args.mode == "chapters":
+        return generate_story_in_sections(story_spec, providers, api_keys, sections=args.sections, deadline=deadline,
+                                          tiered=args.tiered)
+    return gai_lib.generate_with_failover(providers, prompt, api_keys, system=STORY_SYSTEM_PROMPT, deadline=deadline,
+                                          tiered=args.tiered, validate=tier_validator(story_spec)), None
+
+
 # For each of the API keys in keys_to_use, do the following:
 # Call the respective API and generate a story
-for key in keys_to_use:
-    if key in api_keys:
+for key, providers in runs:
+    if all(provider in api_keys for provider in providers):
         # print(f"Calling API with key: {key} and value: {api_keys[key]}")
         # Generate the story using the API key
         print(f"Generating story using {key}...")
 
         # Call the respective API based on the key
-        response = None
-        api_key = api_keys[key]
-        
-        if key == 'GROQ':
-            # Call the GROQ API
-            response = gai_lib.call_groq_api(prompt, api_key)
-        elif key == 'GEMINI':
-            # Call the GEMINI API
-            response = gai_lib.call_gemini_api(prompt, api_key)
-        elif key == 'OPENAI':
-            # Call the OpenAI API
-            response = gai_lib.call_openai_api(prompt, api_key)
-        else:
+        if any(provider not in gai_lib.PROVIDERS for provider in providers):
             print(f"Unknown API key: {key}")
             continue
 
+        # Retries share one deadline, so a slow or failing provider cannot stall the run
+        deadline = gai_lib.Deadline(CHAPTERS_TIMEOUT if args.mode == "chapters" else GENERATION_TIMEOUT)
+        try:
+            with gai_lib.telemetry.span("story.generate", {"provider": key}):
+                result, section_results = generate_story(providers, deadline)
+        except KeyboardInterrupt:
+            deadline.cancel()
+            print("\nCancelled by user. Stopping story generation.")
+            break
+
         # Print the response for debugging purposes
-        print(f"Response from {key}: success={response is not None}")
-        if response:
-            print(f"  Title: {response.get('title', 'N/A')}")
-            print(f"  Story length: {len(response.get('story', ''))} characters")
+        print(f"Response from {key}: status={result.status}, latency={result.latency:.2f}s")
+
+        # Do not save failures as stories
+        if not result.ok:
+            print(f"Error: {key} API call failed ({result.error_title}): {result.error}")
+            continue
 
-        # Ensure response is a dictionary
+        # Ensure the parsed response is a dictionary
+        response = result.payload
         if not isinstance(response, dict):
             print(f"Error: {key} API did not return a dictionary. Got: {type(response)}")
             continue
 
+        # Check length and language: trim or continue the story, regenerate only as a last resort
+        try:
+            with gai_lib.telemetry.span("story.validate"):
+                result, report, action = validate_and_repair(story_spec, result, providers, api_keys,
+                                                             regenerate=lambda: generate_story(providers, deadline)[0],
+                                                             deadline=deadline)
+        except KeyboardInterrupt:
+            deadline.cancel()
+            print("\nCancelled by user. Stopping story generation.")
+            break
+        if action == "regenerated":
+            section_results = None
+        if not report.ok:
+            print(f"Warning: the story does not meet the request ({report.length} characters, "
+                  f"language {'ok' if report.language_ok else 'not ' + output_language}); saving it anyway.")
+        response = result.payload
+
+        print(f"  Title: {response.get('title', 'N/A')}")
+        print(f"  Story length: {len(response.get('story', ''))} characters")
+        if result.usage:
+            print(f"  Tokens used: {result.usage.get('total_tokens', 'N/A')}")
+
         # Extract the "title" and "story" from the response dictionary
         title = response.get("title", "Untitled")
         story = response.get("story", "No story content available")
 
-        # Sanitize the title to create a valid filename
-        sanitized_title = "".join(c for c in title if c.isalnum() or c in (' ', '-', '_')).strip().replace(' ', '_')
-
-        # Save the response to a file name {key}_{language_code}_{sanitized_title}.txt
-        filename = f"{key}_{language_code}_{sanitized_title}.txt"
-        try:
-            with open(filename, "w", encoding="utf-8") as f:
-                f.write(f"Title: {title}\n\n")
-                f.write(f"Story: \n\n{story}")
-            print(f"Response from {key} saved to {filename}")
-        except Exception as e:
-            print(f"Error saving file {filename}: {e}")
+        # Translate the finished story into the other languages concurrently, with small models
+        record = build_story_record(story_spec, result, title, story, section_results)
+        record["validation"] = dict(report.to_dict(), action=action)
+        translations = []
+        if target_languages:
+            print(f"Translating into {', '.join(language.name for language in target_languages)}...")
+            translation_deadline = gai_lib.Deadline(GENERATION_TIMEOUT)
+            try:
+                with gai_lib.telemetry.span("story.translations", {"languages": len(target_languages)}):
+                    translated = translate_story(title, story, target_languages, providers, api_keys, audience,
+                                                 deadline=translation_deadline)
+            except KeyboardInterrupt:
+                translation_deadline.cancel()
+                print("\nTranslations cancelled by user. Saving the original story only.")
+                translated = []
+            for language, translation in translated:
+                payload = translation.payload
+                if not translation.ok or not isinstance(payload, dict) or not payload.get("story"):
+                    print(f"Error: {language.name} translation failed ({translation.status}): {translation.error}")
+                    continue
+                print(f"  {language.name}: {payload.get('title', 'Untitled')} ({translation.provider}, {translation.latency:.2f}s)")
+                translations.append((language, build_translation_record(
+                    record, translation, language, payload.get("title", title), payload["story"])))
+            record["translations"] = {language.code: entry["id"] for language, entry in translations}
+
+        # Queue the story (and its translations) for the archive and/or
+        # {key}_{language_code}_{sanitized_title}.txt.
+        # The background writer blocks here only if too many writes are pending.
+        with gai_lib.telemetry.span("story.save"), gai_lib.profiling.phase("story.save"):
+            for entry in [record] + [entry for _, entry in translations]:
+                if archive is not None:
+                    record_id = writer.append_record(archive, entry)
+                    print(f"Response from {key} ({entry['language']}) queued for {args.archive_dir} with id {record_id}")
+                if args.output in ("txt", "both"):
+                    filename = story_txt_path(key, entry["language"], entry["title"], reserved=reserved_paths)
+                    writer.write_file(filename, format_story_txt(entry["title"], entry["story"]))
+                    print(f"Response from {key} queued for {filename}")
     else:
         print(f"API key for {key} not found in environment variables")
 
-print("\nStory generation completed!")
\ No newline at end of file
+# How often each provider met the requested length and language, and what it took
+for provider, stats in gai_lib.validation.compliance.summary().items():
+    repairs = ", ".join(f"{name}: {stats[name]}" for name in ("continued", "trimmed", "regenerated", "failed") if stats[name])
+    print(f"Compliance {provider}: length {stats['length_rate']:.0%}, language {stats['language_rate']:.0%}"
+          + (f" ({repairs})" if repairs else ""))
+
+# Which model tier served the stories (with --tiered)
+for provider, stats in gai_lib.tiers.escalations.summary().items():
+    print(f"Escalation {provider}: {stats['escalation_rate']:.0%} of {stats['requests']} request(s) needed a stronger model"
+          + (f" (reasons: {stats['reasons']})" if stats["reasons"] else "")
+          + (f"; {stats['invalid']} answer(s) failed validation on every tier" if stats["invalid"] else ""))
+
+# Wait for pending writes and report any that failed
+write_failed = False
+try:
+    writer.close()
+except gai_lib.WriterError as e:
+    write_failed = True
+    print(f"\nError: {len(e.failures)} output write(s) failed:")
+    for description, error in e.failures:
+        print(f"  {description}: {error}")
+if archive is not None:
+    archive.close()
+
+print("\nStory generation completed!" if not write_failed else "\nStory generation completed with write errors.")
+if write_failed:
+    sys.exit(1)
\ No newline at end of file
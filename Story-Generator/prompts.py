@@ -0,0 +1,247 @@
+"""
+Prompts for Story-Generator.
+
+The instructions that never change are sent as the system prompt, ahead of the
+per-story details. Providers cache repeated leading tokens, so keeping this prefix
+byte-for-byte identical across runs makes repeated requests faster and cheaper.
+Only build_story_prompt() should contain user input.
+"""
+
+STORY_SYSTEM_PROMPT = """
+You are a creative fiction writer. You write short stories from the elements the user gives you.
+
+Requirements:
+- Include dialogue and descriptive language appropriate for the target audience
+- Stay true to the requested genre throughout the story
+- Create an ending that matches the requested story ending style
+- Write the story (title included) in the requested language
+- Respect the requested minimum and maximum number of characters
+
+CRITICAL JSON FORMATTING RULES:
+- Return ONLY valid JSON - no markdown, no code blocks, no extra text
+- All quotes inside the story text MUST be escaped with backslash: \\"
+- All newlines should be literal \\n characters
+- Do not use any control characters that break JSON
+
+Example format:
+{"title": "Story Title", "story": "Story text with \\"escaped quotes\\" and proper formatting."}
+"""
+
+
+def build_story_prompt(spec):
+    """
+    Builds the small, per-story part of the prompt.
+
+    Args:
+        spec (dict): Story parameters (character, plot_setting, genre, audience,
+                     language, min_limit, max_limit, ending).
+
+    Returns:
+        str: The user message to send together with STORY_SYSTEM_PROMPT.
+    """
+    return f"""
+Write a short story in the {spec['genre']} genre with not less than {spec['min_limit']} characters and not more than {spec['max_limit']} characters. Use the following elements:
+
+- Main character: {spec['character']}
+- Plot Setting: {spec['plot_setting']}
+- Target Audience: {spec['audience']}
+- Language: {spec['language']}
+- Story Ending Style: {spec['ending']}
+
+Your response:
+"""
+
+
+# Long stories (--mode chapters): an outline first, then every section on its own,
+# then one short request for the transitions between sections.
+OUTLINE_SYSTEM_PROMPT = """
+You are a creative fiction writer planning a story that will be written in sections by several writers at once.
+Plan the story so that each section can be written knowing only the outline.
+
+Requirements:
+- Each section summary is 2-3 sentences: what happens, who is present, and where the section ends
+- The summaries together cover the whole story, from the opening to the requested ending style
+- Write the title, headings and summaries in the requested language
+
+CRITICAL JSON FORMATTING RULES:
+- Return ONLY valid JSON - no markdown, no code blocks, no extra text
+- Return exactly the requested number of sections
+
+Example format:
+{"title": "Story Title", "sections": [{"heading": "Section heading", "summary": "What happens in this section."}]}
+"""
+
+SECTION_SYSTEM_PROMPT = """
+You are a creative fiction writer writing ONE section of a longer story. Other writers write the other sections at the same time from the same outline.
+
+Requirements:
+- Write only the events of your section's summary; do not start the next section's events
+- Do not repeat earlier sections or summarize the story so far
+- Do not add a title or heading; the first section opens the story, the last section ends it
+- Include dialogue and descriptive language appropriate for the target audience
+- Write in the requested language and respect the requested number of characters
+
+CRITICAL JSON FORMATTING RULES:
+- Return ONLY valid JSON - no markdown, no code blocks, no extra text
+- All quotes inside the story text MUST be escaped with backslash: \\"
+- All newlines should be literal \\n characters
+
+Example format:
+{"story": "Section text with \\"escaped quotes\\" and proper formatting."}
+"""
+
+STITCH_SYSTEM_PROMPT = """
+You are an editor joining story sections that were written separately.
+For every boundary you get the end of one section and the start of the next.
+
+Requirements:
+- For each boundary return a short bridge (at most two sentences) that makes the transition read smoothly,
+  or an empty string if the sections already connect
+- Never repeat text that is already there; bridges are inserted between the two excerpts
+- Write the bridges in the story's language
+
+CRITICAL JSON FORMATTING RULES:
+- Return ONLY valid JSON - no markdown, no code blocks, no extra text
+- Return exactly one bridge per boundary, in order
+
+Example format:
+{"bridges": ["A short transition.", ""]}
+"""
+
+
+def _story_elements(spec):
+    return f"""- Genre: {spec['genre']}
+- Main character: {spec['character']}
+- Plot Setting: {spec['plot_setting']}
+- Target Audience: {spec['audience']}
+- Language: {spec['language']}
+- Story Ending Style: {spec['ending']}"""
+
+
+def build_outline_prompt(spec, sections):
+    """Builds the user message asking for a title and ``sections`` section summaries."""
+    return f"""
+Plan a story of {spec['min_limit']} to {spec['max_limit']} characters in exactly {sections} sections. Use the following elements:
+
+{_story_elements(spec)}
+
+Your response:
+"""
+
+
+def build_section_prompt(spec, outline, index):
+    """
+    Builds the user message for section ``index`` (0-based) of ``outline``.
+
+    Args:
+        spec (dict): Story parameters.
+        outline (dict): {"title": ..., "sections": [{"heading": ..., "summary": ...}, ...]}.
+        index (int): The section to write.
+    """
+    sections = outline["sections"]
+    plan = "\n".join(f"{number}. {section.get('heading', '')}: {section['summary']}"
+                     for number, section in enumerate(sections, 1))
+    return f"""
+Story title: {outline['title']}
+
+{_story_elements(spec)}
+
+Outline:
+{plan}
+
+Write section {index + 1} of {len(sections)} with not less than {spec['min_limit'] // len(sections)} characters and not more than {spec['max_limit'] // len(sections)} characters.
+
+Your response:
+"""
+
+
+def build_stitch_prompt(spec, endings, openings):
+    """Builds the user message for the transitions between consecutive sections."""
+    boundaries = "\n\n".join(
+        f"Boundary {number}:\n[END OF SECTION {number}] ...{ending}\n[START OF SECTION {number + 1}] {opening}..."
+        for number, (ending, opening) in enumerate(zip(endings, openings), 1))
+    return f"""
+Language: {spec['language']}
+Target Audience: {spec['audience']}
+
+{boundaries}
+
+Return {len(endings)} bridges.
+
+Your response:
+"""
+
+
+# Multilingual output (--languages): the story is written once and translated concurrently
+TRANSLATION_SYSTEM_PROMPT = """
+You are a literary translator. You translate stories faithfully into the requested language.
+
+Requirements:
+- Translate the title and the whole story; do not summarize, shorten or add content
+- Keep the plot, names, dialogue and paragraph breaks of the original
+- Use natural, idiomatic language suited to the target audience
+
+CRITICAL JSON FORMATTING RULES:
+- Return ONLY valid JSON - no markdown, no code blocks, no extra text
+- All quotes inside the story text MUST be escaped with backslash: \\"
+- All newlines should be literal \\n characters
+- Do not use any control characters that break JSON
+
+Example format:
+{"title": "Translated Title", "story": "Translated story text with \\"escaped quotes\\"."}
+"""
+
+
+def build_translation_prompt(title, story, language, audience):
+    """Builds the user message asking for a translation of one story into ``language``."""
+    return f"""
+Translate into: {language}
+Target Audience: {audience}
+
+Title: {title}
+
+Story:
+{story}
+
+Your response:
+"""
+
+
+# Repair of too-short stories: ask only for the missing part instead of a new story
+CONTINUATION_SYSTEM_PROMPT = """
+You are a creative fiction writer continuing a story that came out too short.
+
+Requirements:
+- Continue exactly where the text stops; do not repeat, summarize or rewrite earlier text
+- Keep the characters, tone, language and target audience of the story
+- Lead the story to the requested ending style and finish with a complete sentence
+- Respect the requested number of additional characters
+
+CRITICAL JSON FORMATTING RULES:
+- Return ONLY valid JSON - no markdown, no code blocks, no extra text
+- All quotes inside the text MUST be escaped with backslash: \\"
+- All newlines should be literal \\n characters
+
+Example format:
+{"continuation": "The next part of the story with \\"escaped quotes\\"."}
+"""
+
+# Characters of the story so far sent with a continuation request
+CONTINUATION_CONTEXT = 4000
+
+
+def build_continuation_prompt(spec, title, story, min_extra, max_extra):
+    """Builds the user message asking for ``min_extra`` to ``max_extra`` more characters of ``story``."""
+    excerpt = story if len(story) <= CONTINUATION_CONTEXT else "..." + story[-CONTINUATION_CONTEXT:]
+    return f"""
+Story title: {title}
+
+{_story_elements(spec)}
+
+Story so far:
+{excerpt}
+
+Continue the story with not less than {min_extra} and not more than {max_extra} additional characters.
+
+Your response:
+"""
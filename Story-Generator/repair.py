@@ -0,0 +1,117 @@
+"""
+Checks generated stories against the requested length and language and applies the
+cheapest repair that fixes a problem:
+
+- too long: trimmed locally at a sentence boundary (no request),
+- too short: a continuation request adds only the missing part,
+- wrong language, or still out of range: the story is regenerated, as a last resort.
+
+Outcomes are counted per provider in gai_lib.validation.compliance.
+"""
+
+import gai_lib
+from gai_lib.result import GenerationResult, merge_usage
+from gai_lib.validation import check_text, trim_to_sentence, compliance
+from prompts import CONTINUATION_SYSTEM_PROMPT, build_continuation_prompt
+
+# Continuation requests before falling back to regeneration
+MAX_CONTINUATIONS = 2
+
+
+def tier_validator(spec):
+    """
+    Validator for tiered generation (gai_lib.generate_tiered): a cheap-tier story is
+    accepted when the repairs below can fix it cheaply. Excess length is trimmed
+    locally and up to half of the minimum length can be continued.
+    """
+    return gai_lib.tiers.payload_validator(("title", "story"), text_field="story",
+                                           min_chars=spec["min_limit"] // 2, language=spec["language_code"])
+
+
+def _check(spec, story):
+    return check_text(story, spec["min_limit"], spec["max_limit"], spec["language_code"])
+
+
+def _trim(spec, story):
+    # Only usable if the trimmed story is still long enough
+    trimmed = trim_to_sentence(story, spec["max_limit"])
+    return trimmed if len(trimmed) >= spec["min_limit"] else story
+
+
+def _continue(spec, title, story, providers, api_keys, deadline, calls):
+    for _ in range(MAX_CONTINUATIONS):
+        if len(story) >= spec["min_limit"] or (deadline is not None and deadline.expired):
+            break
+        prompt = build_continuation_prompt(spec, title, story, spec["min_limit"] - len(story),
+                                           spec["max_limit"] - len(story) - 2)
+        with gai_lib.telemetry.span("story.continue"):
+            result = gai_lib.generate_with_failover(providers, prompt, api_keys, system=CONTINUATION_SYSTEM_PROMPT,
+                                                    deadline=deadline)
+        text = result.payload.get("continuation") if result.ok and isinstance(result.payload, dict) else None
+        if not isinstance(text, str) or not text.strip():
+            print(f"Continuation failed ({result.status}).")
+            break
+        calls.append(result)
+        story = story.rstrip() + "\n\n" + text.strip()
+    return _trim(spec, story)
+
+
+def validate_and_repair(spec, result, providers, api_keys, regenerate, deadline=None):
+    """
+    Validates a successful story result and repairs it if needed.
+
+    Args:
+        spec (dict): Story parameters (min_limit, max_limit, language_code, ...).
+        result (GenerationResult): Successful result with a {"title", "story"} payload.
+        providers (list): Providers for continuation requests.
+        api_keys (dict): Provider name -> API key.
+        regenerate (callable): Returns a new GenerationResult for the same story spec.
+        deadline (Deadline, optional): Budget for the repairs.
+
+    Returns:
+        tuple: (GenerationResult with the final payload, ValidationReport of the final
+               story, action: "none", "trimmed", "continued", "regenerated" or "failed").
+    """
+    title = result.payload.get("title", "Untitled")
+    story = result.payload.get("story", "")
+    first = _check(spec, story)
+    calls = [result]
+    action = "none"
+
+    if not first.ok and first.language_ok:
+        if first.too_long:
+            story, action = _trim(spec, story), "trimmed"
+        else:
+            story, action = _continue(spec, title, story, providers, api_keys, deadline, calls), "continued"
+        print(f"Story was {first.length} characters ({spec['min_limit']}-{spec['max_limit']} requested); "
+              f"{action} to {len(story)}.")
+    report = _check(spec, story)
+
+    if not report.ok and not (deadline is not None and deadline.expired):
+        reason = "wrong language" if not report.language_ok else f"{report.length} characters"
+        print(f"Story still fails validation ({reason}); regenerating...")
+        with gai_lib.telemetry.span("story.regenerate"):
+            retry = regenerate()
+        if retry.ok and isinstance(retry.payload, dict) and isinstance(retry.payload.get("story"), str):
+            calls.append(retry)
+            retry_story = retry.payload["story"]
+            if _check(spec, retry_story).language_ok:
+                retry_story = _trim(spec, retry_story)
+            retry_report = _check(spec, retry_story)
+            if retry_report.ok:
+                title, story, report, action = retry.payload.get("title", title), retry_story, retry_report, "regenerated"
+
+    if not report.ok:
+        action = "failed"
+    compliance.record(result.provider, first, action)
+
+    source = calls[-1] if action == "regenerated" else result
+    final = GenerationResult(
+        payload=dict(source.payload, title=title, story=story),
+        raw_text=source.raw_text,
+        usage=merge_usage(*(call.usage for call in calls)),
+        latency=sum(call.latency for call in calls),
+        provider=source.provider,
+        model=source.model,
+    )
+    return final, report, action
@@ -0,0 +1,432 @@
+"""
+Long-running HTTP/JSON service for story generation.
+
+One process pays for Python startup, SDK imports, .env loading and TLS handshakes
+once; provider connections stay warm in gai_lib's shared clients. Requests wait in
+a bounded queue and at most --concurrency stories are generated at a time; when
+the queue is full the service answers 503 with Retry-After instead of piling up.
+
+Usage:
+    python service.py --port 8080 --concurrency 4
+
+    POST /stories   {"character": "Luna", "plot_setting": "Magic forest", "genre": "fantasy",
+                     "audience": "children", "language": "English", "min_limit": 500,
+                     "max_limit": 1500, "ending": "simple", "providers": ["GROQ", "GEMINI"],
+                     "mode": "single", "languages": ["fr", "de"]}
+    GET  /health    queue and provider status
+    GET  /metrics   Prometheus text format
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+
+from dotenv import load_dotenv
+
+# Ensure the parent directory is in the system path to import gai_lib
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import gai_lib
+from gai_lib.result import TIMEOUT
+from chapters import generate_story_in_sections
+from prompts import STORY_SYSTEM_PROMPT, build_story_prompt
+from spec import story_spec_from_dict
+from storage import build_story_record, build_translation_record
+from translation import parse_languages, translate_story
+from repair import validate_and_repair, tier_validator
+
+MAX_BODY_BYTES = 1024 * 1024
+# Seconds allowed for one story (generation and translations), including retries
+GENERATION_TIMEOUT = 90
+CHAPTERS_TIMEOUT = 180
+# Seconds between checks for a client that went away while its story is generated
+DISCONNECT_POLL = 0.5
+
+
+class HTTPError(Exception):
+    """An error answered with an HTTP status and a JSON body."""
+
+    def __init__(self, status, body, headers=None):
+        super().__init__(body)
+        self.status = status
+        self.body = body
+        self.headers = headers or {}
+
+
+class ClientDisconnected(Exception):
+    """The client closed the connection before its response was ready."""
+
+
+class StoryService:
+    """
+    Queue, workers and generation logic behind the HTTP endpoints.
+
+    Args:
+        api_keys (dict): Provider name -> API key.
+        concurrency (int): Stories generated at the same time.
+        queue_size (int): Requests allowed to wait for a worker; more are rejected with 503.
+        archive (RecordArchive, optional): Where generated stories are stored.
+        tiered (bool): Default for the request's "tiered" option (cheapest model first).
+    """
+
+    def __init__(self, api_keys, concurrency=4, queue_size=32, archive=None, tiered=False):
+        self.api_keys = api_keys
+        self.providers = [name for name in gai_lib.PROVIDERS if name in api_keys]
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.archive = archive
+        self.tiered = tiered
+        self.writer = gai_lib.BackgroundWriter() if archive is not None else None
+        self.metrics = gai_lib.telemetry.PrometheusExporter(prefix="gai")
+        self.started = time.time()
+        self.active = 0
+        self.completed = 0
+        self.rejected = 0
+        self._pending = 0
+        self._queue = asyncio.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="story-worker")
+        self._workers = []
+        gai_lib.telemetry.subscribe(self.metrics)
+
+    def start(self):
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+
+    async def stop(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._executor.shutdown(wait=True)
+        if self.writer is not None:
+            self.writer.close(raise_errors=False)
+        if self.archive is not None:
+            self.archive.close()
+        gai_lib.telemetry.unsubscribe(self.metrics)
+
+    async def _worker(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            job, future = await self._queue.get()
+            self.active += 1
+            try:
+                if not future.cancelled():
+                    # The time budget starts now: time spent in the queue does not count
+                    job["deadline"] = gai_lib.Deadline(job["timeout"])
+                    result = await loop.run_in_executor(self._executor, self.generate, job)
+                    if not future.cancelled():
+                        future.set_result(result)
+            except Exception as e:
+                if not future.cancelled():
+                    future.set_exception(e)
+            finally:
+                self.active -= 1
+                self.completed += 1
+                # The admission slot is released only once the job has left the worker
+                self._pending -= 1
+                self._queue.task_done()
+
+    async def submit(self, job, disconnected=None):
+        """
+        Queues a validated job and waits for its (status, body) response.
+
+        Args:
+            disconnected (callable, optional): Returns True once the client has gone away;
+                                               the job's deadline is then cancelled.
+
+        Raises:
+            ClientDisconnected: ``disconnected()`` became true before the response was ready.
+        """
+        # Admit up to one job per worker plus queue_size waiting ones
+        if self._pending >= self.concurrency + self.queue_size:
+            self.rejected += 1
+            raise HTTPError(HTTPStatus.SERVICE_UNAVAILABLE, {"error": "Too many queued requests"}, {"Retry-After": "5"})
+        future = asyncio.get_running_loop().create_future()
+        self._pending += 1
+        self._queue.put_nowait((job, future))
+        try:
+            while True:
+                done, _ = await asyncio.wait({future}, timeout=DISCONNECT_POLL)
+                if done:
+                    return future.result()
+                if disconnected is not None and disconnected():
+                    raise ClientDisconnected()
+        except (asyncio.CancelledError, ClientDisconnected):
+            # Nobody is waiting any more: skip the job if it is still queued, abandon it if it is running
+            future.cancel()
+            if "deadline" in job:
+                job["deadline"].cancel()
+            raise
+
+    def parse_job(self, data):
+        """Validates a POST /stories body and returns the job for the worker."""
+        if not isinstance(data, dict):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, {"errors": ["body must be a JSON object"]})
+        spec, errors = story_spec_from_dict(data)
+
+        providers = data.get("providers")
+        if providers is None:
+            providers = self.providers[:1]
+        elif isinstance(providers, str):
+            providers = [providers]
+        if not isinstance(providers, list) or not providers or not all(isinstance(name, str) for name in providers):
+            errors.append(f"providers must be a non-empty list of provider names; available: {self.providers}")
+            providers = []
+        missing = [name for name in providers if name not in self.providers]
+        if missing:
+            errors.append(f"no API key for provider(s) {missing}; available: {self.providers}")
+
+        mode = data.get("mode", "single")
+        if mode not in ("single", "chapters"):
+            errors.append("mode must be 'single' or 'chapters'")
+
+        sections = data.get("sections")
+        if sections is not None and (not isinstance(sections, int) or not 1 <= sections <= 20):
+            errors.append("sections must be an integer between 1 and 20")
+
+        languages = data.get("languages") or []
+        if isinstance(languages, list):
+            languages = ",".join(map(str, languages))
+        languages, unknown = parse_languages(str(languages))
+        if unknown:
+            errors.append(f"unknown language(s): {unknown}")
+
+        tiered = data.get("tiered", self.tiered)
+        if not isinstance(tiered, bool):
+            errors.append("tiered must be true or false")
+
+        if errors:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, {"errors": errors})
+        return {
+            "tiered": tiered,
+            "spec": spec,
+            "providers": providers,
+            "mode": mode,
+            "sections": sections,
+            "languages": [language for language in languages if language.code != spec["language_code"]],
+            # The worker turns this into the job's Deadline when it starts the job
+            "timeout": CHAPTERS_TIMEOUT if mode == "chapters" else GENERATION_TIMEOUT,
+        }
+
+    def generate(self, job):
+        """Generates (and archives) one story. Runs on a worker thread."""
+        spec, providers, deadline = job["spec"], job["providers"], job["deadline"]
+        def generate_story():
+            if job["mode"] == "chapters":
+                return generate_story_in_sections(spec, providers, self.api_keys, sections=job["sections"],
+                                                  deadline=deadline, tiered=job["tiered"])
+            return gai_lib.generate_with_failover(providers, build_story_prompt(spec), self.api_keys,
+                                                  system=STORY_SYSTEM_PROMPT, deadline=deadline,
+                                                  tiered=job["tiered"], validate=tier_validator(spec)), None
+
+        with gai_lib.telemetry.span("service.story", {"mode": job["mode"]}):
+            result, sections = generate_story()
+            if not result.ok or not isinstance(result.payload, dict):
+                status = HTTPStatus.GATEWAY_TIMEOUT if result.status == TIMEOUT else HTTPStatus.BAD_GATEWAY
+                return status, {"error": result.error_title, "status": result.status, "detail": result.error}
+
+            result, report, action = validate_and_repair(spec, result, providers, self.api_keys,
+                                                         regenerate=lambda: generate_story()[0], deadline=deadline)
+            title = result.payload.get("title", "Untitled")
+            story = result.payload.get("story", "")
+            record = build_story_record(spec, result, title, story, None if action == "regenerated" else sections)
+            record["validation"] = dict(report.to_dict(), action=action)
+            records = [record]
+            if job["languages"]:
+                for language, translation in translate_story(title, story, job["languages"], providers, self.api_keys,
+                                                             spec["audience"], deadline=deadline):
+                    payload = translation.payload
+                    if translation.ok and isinstance(payload, dict) and payload.get("story"):
+                        records.append(build_translation_record(record, translation, language,
+                                                                payload.get("title", title), payload["story"]))
+                record["translations"] = {entry["language"]: entry["id"] for entry in records[1:]}
+
+            if self.writer is not None:
+                for entry in records:
+                    self.writer.append_record(self.archive, entry)
+
+        response = {key: record[key] for key in ("id", "title", "story", "provider", "model", "language", "usage",
+                                                 "validation")}
+        response["latency_s"] = round(result.latency, 3)
+        response["translations"] = [{key: entry[key] for key in ("id", "language", "title", "story")}
+                                    for entry in records[1:]]
+        return HTTPStatus.OK, response
+
+    def health(self):
+        return {
+            "status": "ok",
+            "providers": self.providers,
+            "queued": self._queue.qsize(),
+            "active": self.active,
+            "concurrency": self.concurrency,
+            "uptime_s": round(time.time() - self.started, 1),
+        }
+
+    def render_metrics(self):
+        lines = [
+            "# TYPE gai_service_queue_depth gauge", f"gai_service_queue_depth {self._queue.qsize()}",
+            "# TYPE gai_service_active gauge", f"gai_service_active {self.active}",
+            "# TYPE gai_service_completed_total counter", f"gai_service_completed_total {self.completed}",
+            "# TYPE gai_service_rejected_total counter", f"gai_service_rejected_total {self.rejected}",
+        ]
+        compliance = gai_lib.validation.compliance.summary()
+        if compliance:
+            lines.append("# TYPE gai_story_compliance_ratio gauge")
+            for provider, stats in compliance.items():
+                lines.append(f'gai_story_compliance_ratio{{provider="{provider}",check="length"}} {stats["length_rate"]:.4f}')
+                lines.append(f'gai_story_compliance_ratio{{provider="{provider}",check="language"}} {stats["language_rate"]:.4f}')
+            lines.append("# TYPE gai_story_repairs_total counter")
+            for provider, stats in compliance.items():
+                for action in gai_lib.validation.ComplianceStats.ACTIONS:
+                    lines.append(f'gai_story_repairs_total{{provider="{provider}",action="{action}"}} {stats[action]}')
+        escalations = gai_lib.tiers.escalations.summary()
+        if escalations:
+            lines.append("# TYPE gai_tier_escalation_ratio gauge")
+            for provider, stats in escalations.items():
+                lines.append(f'gai_tier_escalation_ratio{{provider="{provider}"}} {stats["escalation_rate"]:.4f}')
+            lines.append("# TYPE gai_tier_served_total counter")
+            for provider, stats in escalations.items():
+                for tier, count in sorted(stats["served"].items()):
+                    lines.append(f'gai_tier_served_total{{provider="{provider}",tier="{tier}"}} {count}')
+            lines.append("# TYPE gai_tier_invalid_total counter")
+            for provider, stats in escalations.items():
+                lines.append(f'gai_tier_invalid_total{{provider="{provider}"}} {stats["invalid"]}')
+        return self.metrics.render() + "\n".join(lines) + "\n"
+
+
+async def _read_request(reader):
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    try:
+        method, target, version = request_line.decode("latin-1").split()
+    except ValueError:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, {"error": "Malformed request line"})
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    length = int(headers.get("content-length") or 0)
+    if length > MAX_BODY_BYTES:
+        raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {"error": "Body too large"})
+    body = await reader.readexactly(length) if length else b""
+    keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+    return method, target.split("?", 1)[0], body, keep_alive
+
+
+def _write_response(writer, status, body, headers=None, keep_alive=True):
+    if isinstance(body, str):
+        data, content_type = body.encode("utf-8"), "text/plain; version=0.0.4; charset=utf-8"
+    else:
+        data, content_type = json.dumps(body, ensure_ascii=False).encode("utf-8"), "application/json; charset=utf-8"
+    status = HTTPStatus(status)
+    head = [f"HTTP/1.1 {status.value} {status.phrase}", f"Content-Type: {content_type}",
+            f"Content-Length: {len(data)}", f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+    head += [f"{name}: {value}" for name, value in (headers or {}).items()]
+    writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + data)
+
+
+async def _route(service, method, path, body, disconnected=None):
+    routes = {"/stories": "POST", "/health": "GET", "/metrics": "GET"}
+    if path not in routes:
+        raise HTTPError(HTTPStatus.NOT_FOUND, {"error": f"Unknown path: {path}"})
+    if method != routes[path]:
+        raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, {"error": f"Use {routes[path]} for {path}"}, {"Allow": routes[path]})
+    if path == "/health":
+        return HTTPStatus.OK, service.health()
+    if path == "/metrics":
+        return HTTPStatus.OK, service.render_metrics()
+    try:
+        data = json.loads(body or b"{}")
+    except ValueError as e:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, {"errors": [f"invalid JSON: {e}"]})
+    return await service.submit(service.parse_job(data), disconnected)
+
+
+def make_handler(service):
+    async def handle(reader, writer):
+        # The peer's FIN is fed to the reader even while nobody reads, so this sees a
+        # closed connection without consuming any pipelined request
+        def disconnected():
+            return reader.at_eof() or writer.is_closing()
+
+        try:
+            while True:
+                keep_alive = False
+                try:
+                    request = await _read_request(reader)
+                    if request is None:
+                        break
+                    method, path, body, keep_alive = request
+                    status, response = await _route(service, method, path, body, disconnected)
+                    _write_response(writer, status, response, keep_alive=keep_alive)
+                except ClientDisconnected:
+                    break
+                except HTTPError as e:
+                    _write_response(writer, e.status, e.body, e.headers, keep_alive=keep_alive)
+                except (ValueError, asyncio.IncompleteReadError):
+                    _write_response(writer, HTTPStatus.BAD_REQUEST, {"error": "Malformed request"}, keep_alive=False)
+                    keep_alive = False
+                except Exception as e:
+                    print(f"Error handling request: {type(e).__name__}: {e}")
+                    _write_response(writer, HTTPStatus.INTERNAL_SERVER_ERROR, {"error": "Internal error"}, keep_alive=False)
+                    keep_alive = False
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+    return handle
+
+
+async def serve(host, port, concurrency, queue_size, archive_dir, tiered=False):
+    api_keys = gai_lib.read_api_keys()
+    if not api_keys:
+        print("No API keys found. Please set the environment variables ending with '_API_KEY'.")
+        return 1
+
+    archive = None
+    if archive_dir:
+        archive = gai_lib.RecordArchive(archive_dir, index_fields=("provider", "language", "translation_of"))
+    service = StoryService(api_keys, concurrency=concurrency, queue_size=queue_size, archive=archive, tiered=tiered)
+    service.start()
+    server = await asyncio.start_server(make_handler(service), host, port)
+    print(f"Story service listening on http://{host}:{port} (providers: {service.providers}, concurrency: {concurrency})")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.stop()
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Story generation HTTP service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--concurrency", type=int, default=4, help="stories generated at the same time (default: 4)")
+    parser.add_argument("--queue-size", type=int, default=32, help="requests allowed to wait (default: 32)")
+    parser.add_argument("--tiered", action="store_true", help="default to cheapest-model-first generation")
+    parser.add_argument("--archive-dir", default="story_archive",
+                        help="archive for generated stories; empty to disable (default: story_archive)")
+    args = parser.parse_args(argv)
+
+    # The .env is one level up from service.py
+    load_dotenv(os.path.join(os.path.dirname(__file__), '..', '.env'))
+    try:
+        return asyncio.run(serve(args.host, args.port, args.concurrency, args.queue_size, args.archive_dir,
+                                 tiered=args.tiered))
+    except KeyboardInterrupt:
+        print("\nStory service stopped.")
+        return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,63 @@
+"""
+Story parameters: the allowed values and validation of a story spec given as a dict
+(used by the HTTP service; main.py asks for the same values interactively).
+"""
+
+import gai_lib
+
+VALID_GENRES = ['fantasy', 'sci-fi', 'mystery', 'adventure', 'romance', 'thriller', 'historical', 'mythological']
+VALID_AUDIENCES = ['children', 'teens', 'adults']
+VALID_ENDINGS = ['twist', 'cliffhanger', 'simple']
+MINCHARACTER_LIMIT = 200
+MAXCHARACTER_LIMIT = 20000
+
+
+def story_spec_from_dict(data):
+    """
+    Validates story parameters and builds the story spec used by prompts and records.
+
+    Args:
+        data (dict): character, plot_setting, genre, audience, language and optionally
+                     min_limit, max_limit and ending (default "simple").
+
+    Returns:
+        tuple: (spec dict or None, list of error messages).
+    """
+    errors = []
+    character = str(data.get("character", "")).strip()
+    plot_setting = str(data.get("plot_setting", "")).strip()
+    if not character:
+        errors.append("character cannot be empty")
+    if not plot_setting:
+        errors.append("plot_setting cannot be empty")
+
+    genre, audience, ending = data.get("genre"), data.get("audience"), data.get("ending", "simple")
+    if genre not in VALID_GENRES:
+        errors.append(f"genre must be one of {VALID_GENRES}")
+    if audience not in VALID_AUDIENCES:
+        errors.append(f"audience must be one of {VALID_AUDIENCES}")
+    if ending not in VALID_ENDINGS:
+        errors.append(f"ending must be one of {VALID_ENDINGS}")
+
+    language = gai_lib.languages.get(str(data.get("language", "English")))
+    if language is None:
+        errors.append(f"unknown language: {data.get('language')}")
+
+    min_limit, max_limit = data.get("min_limit", MINCHARACTER_LIMIT), data.get("max_limit", MAXCHARACTER_LIMIT)
+    if not isinstance(min_limit, int) or not isinstance(max_limit, int) \
+            or not MINCHARACTER_LIMIT <= min_limit <= max_limit <= MAXCHARACTER_LIMIT:
+        errors.append(f"limits must be integers with {MINCHARACTER_LIMIT} <= min_limit <= max_limit <= {MAXCHARACTER_LIMIT}")
+
+    if errors:
+        return None, errors
+    return {
+        "character": character,
+        "plot_setting": plot_setting,
+        "genre": genre,
+        "audience": audience,
+        "language": language.name,
+        "language_code": language.code,
+        "min_limit": min_limit,
+        "max_limit": max_limit,
+        "ending": ending,
+    }, []
@@ -0,0 +1,89 @@
+"""
+Output helpers for Story-Generator: archive records and the classic .txt export.
+"""
+
+import os
+import uuid
+
+
+def sanitize_title(title):
+    """Keeps only characters that are safe in a filename."""
+    return "".join(c for c in title if c.isalnum() or c in (' ', '-', '_')).strip().replace(' ', '_')
+
+
+def story_txt_path(key, language_code, title, directory=".", reserved=None):
+    """
+    Returns {key}_{language_code}_{sanitized_title}.txt, adding a counter instead of
+    overwriting an existing story with the same title.
+
+    Args:
+        reserved (set, optional): Paths already handed out but possibly not written yet
+                                  (background writes). The returned path is added to it.
+    """
+    reserved = reserved if reserved is not None else set()
+    base = f"{key}_{language_code}_{sanitize_title(title)}"
+    filename = os.path.join(directory, f"{base}.txt")
+    counter = 2
+    while os.path.exists(filename) or filename in reserved:
+        filename = os.path.join(directory, f"{base}_{counter}.txt")
+        counter += 1
+    reserved.add(filename)
+    return filename
+
+
+def format_story_txt(title, story):
+    return f"Title: {title}\n\nStory: \n\n{story}"
+
+
+def build_story_record(spec, result, title, story, sections=None):
+    """
+    Builds the archive record for one generated story.
+
+    Args:
+        spec (dict): The user's story parameters (character, genre, language, ...).
+        result (GenerationResult): The provider call that produced the story.
+        title (str): Story title.
+        story (str): Story text.
+        sections (list, optional): Section results when the story was written in sections.
+
+    Returns:
+        dict: Record with id, spec, provider, model, title, story, usage and timings.
+    """
+    record = {
+        "id": uuid.uuid4().hex,
+        "spec": spec,
+        "provider": result.provider,
+        "model": result.model,
+        "language": spec.get("language_code"),
+        "title": title,
+        "story": story,
+        "usage": result.usage,
+        "timings": {"generation_s": round(result.latency, 3)},
+    }
+    if sections:
+        record["sections"] = [
+            {"provider": section.provider, "model": section.model, "status": section.status,
+             "generation_s": round(section.latency, 3)}
+            for section in sections
+        ]
+    return record
+
+
+def build_translation_record(source, result, language, title, story):
+    """
+    Builds the archive record for a translation, linked to its source record.
+
+    Args:
+        source (dict): The record of the original story (from build_story_record).
+        result (GenerationResult): The translation call.
+        language (gai_lib.languages.Language): Target language.
+        title (str): Translated title.
+        story (str): Translated story.
+
+    Returns:
+        dict: A story record with the target language and "translation_of" set to the source id.
+    """
+    spec = dict(source["spec"], language=language.name, language_code=language.code)
+    record = build_story_record(spec, result, title, story)
+    record["translation_of"] = source["id"]
+    return record
@@ -0,0 +1,65 @@
+"""
+Multilingual output: translate a finished story into several languages at once,
+using smaller, faster models than the ones that wrote it.
+"""
+
+import gai_lib
+from prompts import TRANSLATION_SYSTEM_PROMPT, build_translation_prompt
+
+# Translation is an easier task than writing; use each provider's cheapest tier
+TRANSLATION_MODELS = {provider: tiers[0] for provider, tiers in gai_lib.tiers.MODEL_TIERS.items()}
+# Output budget of a translation: the source text in target-language tokens, with a
+# margin for wordier languages and the JSON around the story
+TRANSLATION_TOKEN_MARGIN = 1.3
+TRANSLATION_TOKEN_OVERHEAD = 200
+# Largest output the TRANSLATION_MODELS accept
+TRANSLATION_MAX_TOKENS = 8192
+
+
+def parse_languages(value):
+    """
+    Resolves a comma separated list of language names or codes.
+
+    Returns:
+        tuple: (list of gai_lib.languages.Language, list of names that could not be resolved).
+    """
+    languages, unknown = [], []
+    for name in filter(None, (part.strip() for part in value.split(","))):
+        language = gai_lib.languages.get(name)
+        if language is None:
+            unknown.append(name)
+        elif language not in languages:
+            languages.append(language)
+    return languages, unknown
+
+
+def translation_max_tokens(title, story, language):
+    """Output tokens to allow for translating ``title`` and ``story`` into ``language``."""
+    tokens = (len(title) + len(story)) / language.chars_per_token * TRANSLATION_TOKEN_MARGIN + TRANSLATION_TOKEN_OVERHEAD
+    return min(TRANSLATION_MAX_TOKENS, max(gai_lib.core.DEFAULT_MAX_TOKENS, int(tokens)))
+
+
+def translate_story(title, story, languages, providers, api_keys, audience, deadline=None):
+    """
+    Translates one story into every language concurrently.
+
+    Args:
+        title (str): Title in the pivot language.
+        story (str): Story text in the pivot language.
+        languages (list): gai_lib.languages.Language targets.
+        providers (list): Providers in order of preference.
+        api_keys (dict): Provider name -> API key.
+        audience (str): Target audience, to keep the register of the original.
+        deadline (Deadline, optional): Budget shared by all translations.
+
+    Returns:
+        list: (Language, GenerationResult) pairs in the order of ``languages``.
+    """
+    def translate(language):
+        with gai_lib.telemetry.span("story.translate", {"language": language.code}):
+            return gai_lib.generate_with_failover(providers, build_translation_prompt(title, story, language.name, audience),
+                                                  api_keys, system=TRANSLATION_SYSTEM_PROMPT, deadline=deadline,
+                                                  models=TRANSLATION_MODELS,
+                                                  max_tokens=translation_max_tokens(title, story, language))
+
+    return list(zip(languages, gai_lib.parallel.run_parallel(translate, languages)))
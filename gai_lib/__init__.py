@@ -8,8 +8,23 @@ from .core import (
     parse_llm_json,
     call_groq_api,
     call_gemini_api,
-    call_openai_api
+    call_openai_api,
+    generate,
+    generate_with_failover,
+    generate_tiered,
+    generate_stream,
+    stream_with_failover,
+    PROVIDERS,
+    DEFAULT_MODELS
 )
+from .result import GenerationResult
+from .cache import ResponseCache, PersistentResponseCache
+from .streaming import TextStream
+from .deadline import Deadline, DeadlineExceededError
+from .archive import RecordArchive
+from .writer import BackgroundWriter, WriterError
+from .clients import warm_up
+from . import clients, languages, parallel, profiling, telemetry, tiers, validation
 
 # Package metadata
 __version__ = "1.0.0"
@@ -21,5 +36,22 @@ __all__ = [
     'parse_llm_json', 
     'call_groq_api',
     'call_gemini_api',
-    'call_openai_api'
+    'call_openai_api',
+    'generate',
+    'generate_with_failover',
+    'generate_tiered',
+    'generate_stream',
+    'stream_with_failover',
+    'GenerationResult',
+    'ResponseCache',
+    'PersistentResponseCache',
+    'TextStream',
+    'Deadline',
+    'DeadlineExceededError',
+    'RecordArchive',
+    'BackgroundWriter',
+    'WriterError',
+    'warm_up',
+    'PROVIDERS',
+    'DEFAULT_MODELS'
 ]
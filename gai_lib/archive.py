@@ -0,0 +1,246 @@
+"""
+Compressed, indexed archive of generated records.
+
+Records (plain dicts) are appended as JSON lines to rotating shards. Every record
+is compressed as its own gzip member / zstd frame, so a shard is still a normal
+``.jsonl.gz`` / ``.jsonl.zst`` file (``zcat shard-00001.jsonl.gz``) while a single
+record can be read by seeking to its offset. A small ``index.jsonl`` maps record
+ids to their location and to the indexed fields (provider, language, ...).
+
+    with gai_lib.RecordArchive("story_archive") as archive:
+        record_id = archive.append({"provider": "GROQ", "language": "fr", "title": ..., "story": ...})
+        archive.get(record_id)
+        archive.find(provider="GROQ", language="fr")
+
+Usage:
+    python -m gai_lib.archive story_archive --provider GROQ
+    python -m gai_lib.archive story_archive --id <record id>
+"""
+
+import argparse
+import gzip
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+_EXTENSIONS = {"gzip": ".jsonl.gz", "zstd": ".jsonl.zst"}
+
+
+def _compress(data, compression):
+    if compression == "zstd":
+        return zstandard.ZstdCompressor(level=6).compress(data)
+    return gzip.compress(data, compresslevel=6)
+
+
+def _decompress(data, compression):
+    if compression == "zstd":
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+class RecordArchive:
+    """
+    Append-only archive of JSON records in compressed shards with an id/field index.
+
+    Args:
+        directory (str): Archive directory (created if missing).
+        compression (str): "zstd", "gzip" or "auto" (zstd if the ``zstandard`` package
+                           is installed, gzip otherwise). Only affects new shards.
+        index_fields (tuple): Top-level record fields that can be used with ``find()``.
+        max_shard_bytes (int): Start a new shard once the current one reaches this size.
+        max_shard_records (int): Start a new shard after this many records.
+    """
+
+    def __init__(self, directory, compression="auto", index_fields=("provider", "language"),
+                 max_shard_bytes=64 * 1024 * 1024, max_shard_records=10000):
+        if compression == "auto":
+            compression = "zstd" if zstandard is not None else "gzip"
+        if compression == "zstd" and zstandard is None:
+            raise ImportError("zstd compression requires the 'zstandard' package: pip install zstandard")
+        if compression not in _EXTENSIONS:
+            raise ValueError(f"Unknown compression: {compression}. Choose from: {list(_EXTENSIONS)}")
+
+        self.directory = directory
+        self.compression = compression
+        self.index_fields = tuple(index_fields)
+        self.max_shard_bytes = max_shard_bytes
+        self.max_shard_records = max_shard_records
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._by_field = {field: {} for field in self.index_fields}
+        self._shard_counts = {}
+        self._shard = None
+        self._shard_file = None
+        self._index_file = None
+
+        os.makedirs(directory, exist_ok=True)
+        self._index_path = os.path.join(directory, "index.jsonl")
+        self._load_index()
+
+    def _load_index(self):
+        if not os.path.exists(self._index_path):
+            return
+        with open(self._index_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # A torn final line from an interrupted write; the record is ignored
+                    continue
+                self._add_entry(entry)
+
+    def _add_entry(self, entry):
+        self._entries[entry["id"]] = entry
+        self._shard_counts[entry["shard"]] = self._shard_counts.get(entry["shard"], 0) + 1
+        for field in self.index_fields:
+            value = entry.get(field)
+            if value is not None:
+                self._by_field[field].setdefault(value, []).append(entry["id"])
+
+    def _shard_name(self, number):
+        return f"shard-{number:05d}{_EXTENSIONS[self.compression]}"
+
+    def _open_shard(self):
+        # Continue the newest shard if it uses the current compression and still has room
+        numbers = sorted(int(name[6:11]) for name in os.listdir(self.directory) if name.startswith("shard-"))
+        name = self._shard_name(numbers[-1]) if numbers else None
+        path = os.path.join(self.directory, name) if name else None
+        if (name is None or not os.path.exists(path) or os.path.getsize(path) >= self.max_shard_bytes
+                or self._shard_counts.get(name, 0) >= self.max_shard_records):
+            name = self._shard_name(numbers[-1] + 1 if numbers else 1)
+        self._shard = name
+        self._shard_file = open(os.path.join(self.directory, name), "ab")
+
+    def append(self, record):
+        """
+        Appends one record and returns its id.
+
+        The record gets an "id" and "created_at" if it has none.
+        """
+        record = dict(record)
+        record.setdefault("id", uuid.uuid4().hex)
+        record.setdefault("created_at", time.strftime("%Y-%m-%dT%H:%M:%S%z"))
+        data = _compress((json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8"), self.compression)
+
+        with self._lock:
+            if self._shard_file is None:
+                self._open_shard()
+            elif (self._shard_file.tell() >= self.max_shard_bytes
+                  or self._shard_counts.get(self._shard, 0) >= self.max_shard_records):
+                self._shard_file.close()
+                self._open_shard()
+            if self._index_file is None:
+                self._index_file = open(self._index_path, "a", encoding="utf-8")
+
+            offset = self._shard_file.tell()
+            self._shard_file.write(data)
+            entry = {"id": record["id"], "shard": self._shard, "offset": offset, "length": len(data)}
+            for field in self.index_fields:
+                if record.get(field) is not None:
+                    entry[field] = record[field]
+            self._index_file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self._add_entry(entry)
+        return record["id"]
+
+    def get(self, record_id):
+        """Returns the record with the given id, or None."""
+        entry = self._entries.get(record_id)
+        if entry is None:
+            return None
+        with self._lock:
+            if self._shard_file is not None and entry["shard"] == self._shard:
+                self._shard_file.flush()
+        compression = "zstd" if entry["shard"].endswith(".zst") else "gzip"
+        with open(os.path.join(self.directory, entry["shard"]), "rb") as f:
+            f.seek(entry["offset"])
+            data = f.read(entry["length"])
+        return json.loads(_decompress(data, compression))
+
+    def find(self, **criteria):
+        """Returns the ids of records matching all given index fields, e.g. find(provider="GROQ")."""
+        ids = None
+        for field, value in criteria.items():
+            if field not in self._by_field:
+                raise ValueError(f"Field '{field}' is not indexed. Indexed fields: {list(self.index_fields)}")
+            matches = self._by_field[field].get(value, [])
+            if ids is None:
+                ids = list(matches)
+            else:
+                matches = set(matches)
+                ids = [record_id for record_id in ids if record_id in matches]
+        return list(self._entries) if ids is None else ids
+
+    def index_entry(self, record_id):
+        """Returns the index entry (shard, offset, indexed fields) for a record id, or None."""
+        return self._entries.get(record_id)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __iter__(self):
+        for record_id in list(self._entries):
+            yield self.get(record_id)
+
+    def flush(self):
+        with self._lock:
+            for f in (self._shard_file, self._index_file):
+                if f is not None:
+                    f.flush()
+
+    def sync(self):
+        """Flushes and fsyncs the current shard and the index."""
+        with self._lock:
+            for f in (self._shard_file, self._index_file):
+                if f is not None:
+                    f.flush()
+                    os.fsync(f.fileno())
+
+    def close(self):
+        with self._lock:
+            for f in (self._shard_file, self._index_file):
+                if f is not None:
+                    f.close()
+            self._shard_file = self._index_file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect a gai_lib record archive.")
+    parser.add_argument("directory")
+    parser.add_argument("--id", help="print the record with this id")
+    parser.add_argument("--provider")
+    parser.add_argument("--language")
+    args = parser.parse_args(argv)
+
+    archive = RecordArchive(args.directory)
+    if args.id:
+        record = archive.get(args.id)
+        if record is None:
+            print(f"Record {args.id} not found.")
+            return 1
+        print(json.dumps(record, ensure_ascii=False, indent=2))
+        return 0
+
+    criteria = {k: v for k, v in (("provider", args.provider), ("language", args.language)) if v}
+    for record_id in archive.find(**criteria):
+        entry = archive.index_entry(record_id)
+        print(f"{record_id}  {entry.get('provider', '-'):8} {entry.get('language', '-'):4} {entry['shard']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,251 @@
+"""
+Caches of successful generation results.
+
+Identical requests (same providers, prompt, system prompt and options) are answered
+from the cache instead of a new provider call:
+
+    cache = gai_lib.ResponseCache(max_entries=128, ttl=3600, name="recipes")
+    result = gai_lib.generate_with_failover(providers, prompt, api_keys, cache=cache)
+    result.cached          # True when served from the cache
+    cache.stats()          # {"hits": ..., "misses": ..., "entries": ..., "hit_ratio": ...}
+    cache.key_stats()      # the same per key, most looked-up keys first
+
+``PersistentResponseCache`` keeps the entries (and per-key counts) in a SQLite file,
+so they survive restarts. Both evict the least recently used entry once
+``max_entries`` is reached and ignore entries older than ``ttl`` seconds.
+
+Callers that know when two requests are equivalent even though their prompts differ
+(e.g. the same ingredients in another order) pass their own ``cache_key``.
+"""
+
+import collections
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+from . import telemetry
+from .result import GenerationResult
+
+# Per-key counters kept for every cached entry
+KEY_STATS_FACTOR = 4
+
+
+def _copy(result, cached=True):
+    return GenerationResult(status=result.status, payload=result.payload, raw_text=result.raw_text,
+                            usage=result.usage, latency=0.0 if cached else result.latency,
+                            provider=result.provider, model=result.model, cached=cached)
+
+
+def _key_stat(key, hits, misses):
+    lookups = hits + misses
+    return {"key": key, "hits": hits, "misses": misses, "hit_ratio": hits / lookups if lookups else 0.0}
+
+
+class ResponseCache:
+    """Thread-safe in-memory LRU cache of GenerationResults keyed by ``key(...)``."""
+
+    def __init__(self, max_entries=256, ttl=None, name="responses"):
+        """
+        Args:
+            max_entries (int): Entries kept before the least recently used is evicted.
+            ttl (float, optional): Seconds an entry stays valid. None keeps it until evicted.
+            name (str): Label of the ``cache.hit`` telemetry events.
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.name = name
+        self._lock = threading.Lock()
+        self._entries = collections.OrderedDict()
+        self._keys = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(*parts):
+        """Returns a stable key for the JSON-serializable request ``parts``."""
+        encoded = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+    def _count(self, key, hit):
+        # Caller holds the lock
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+        counts = self._keys.pop(key, None) or [0, 0]
+        counts[0 if hit else 1] += 1
+        self._keys[key] = counts
+        while len(self._keys) > self.max_entries * KEY_STATS_FACTOR:
+            self._keys.popitem(last=False)
+
+    def _hit(self, result):
+        if telemetry.active:
+            telemetry.emit("cache.hit", {"cache": self.name, "provider": result.provider})
+        return _copy(result)
+
+    def get(self, key):
+        """Returns a copy of the cached result marked ``cached``, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl is not None and time.time() - entry[0] > self.ttl:
+                del self._entries[key]
+                entry = None
+            self._count(key, entry is not None)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+        return self._hit(entry[1])
+
+    def contains(self, key):
+        """True if a valid entry is cached under ``key``. Not counted as a lookup."""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and (self.ttl is None or time.time() - entry[0] <= self.ttl)
+
+    def put(self, key, result):
+        """Stores ``result`` if it is a success; failures are never cached."""
+        if not result.ok:
+            return
+        with self._lock:
+            self._entries[key] = (time.time(), _copy(result, cached=False))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries),
+                    "hit_ratio": self.hits / lookups if lookups else 0.0}
+
+    def key_stats(self, keys=None, limit=None):
+        """
+        Per-key hit counts and ratios.
+
+        Args:
+            keys (iterable, optional): Only these keys. Defaults to all tracked keys.
+            limit (int, optional): At most this many, most looked-up first.
+
+        Returns:
+            list: {"key", "hits", "misses", "hit_ratio"} dicts.
+        """
+        with self._lock:
+            counts = self._keys if keys is None else {key: self._keys.get(key, [0, 0]) for key in keys}
+            stats = [_key_stat(key, hits, misses) for key, (hits, misses) in counts.items()]
+        stats.sort(key=lambda stat: stat["hits"] + stat["misses"], reverse=True)
+        return stats[:limit] if limit else stats
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys.clear()
+            self.hits = self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class PersistentResponseCache(ResponseCache):
+    """
+    ResponseCache stored in a SQLite file: entries and per-key counts survive restarts
+    and can be shared by several processes on one machine.
+    """
+
+    def __init__(self, path, max_entries=1000, ttl=None, name="responses"):
+        """
+        Args:
+            path (str): SQLite database file, created if missing.
+            max_entries (int): Entries kept before the least recently used is evicted.
+            ttl (float, optional): Seconds an entry stays valid. None keeps it until evicted.
+            name (str): Label of the ``cache.hit`` telemetry events.
+        """
+        super().__init__(max_entries=max_entries, ttl=ttl, name=name)
+        self.path = str(path)
+        self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=10)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, created REAL, used REAL, "
+                         "result TEXT)")
+        self._db.execute("CREATE TABLE IF NOT EXISTS key_stats (key TEXT PRIMARY KEY, hits INTEGER, "
+                         "misses INTEGER, used REAL)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS entries_used ON entries (used)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS key_stats_used ON key_stats (used)")
+
+    def _count(self, key, hit):
+        # Caller holds the lock
+        super()._count(key, hit)
+        self._db.execute("INSERT INTO key_stats VALUES (?, ?, ?, ?) ON CONFLICT(key) DO UPDATE SET "
+                         "hits = hits + excluded.hits, misses = misses + excluded.misses, used = excluded.used",
+                         (key, int(hit), int(not hit), time.time()))
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT created, result FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is not None and self.ttl is not None and now - row[0] > self.ttl:
+                self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+                row = None
+            self._count(key, row is not None)
+            if row is None:
+                return None
+            self._db.execute("UPDATE entries SET used = ? WHERE key = ?", (now, key))
+        return self._hit(GenerationResult(**json.loads(row[1])))
+
+    def contains(self, key):
+        with self._lock:
+            row = self._db.execute("SELECT created FROM entries WHERE key = ?", (key,)).fetchone()
+        return row is not None and (self.ttl is None or time.time() - row[0] <= self.ttl)
+
+    def put(self, key, result):
+        if not result.ok:
+            return
+        data = json.dumps({"status": result.status, "payload": result.payload, "raw_text": result.raw_text,
+                           "usage": result.usage, "provider": result.provider, "model": result.model},
+                          ensure_ascii=False)
+        now = time.time()
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)", (key, now, now, data))
+            self._evict("entries", self.max_entries)
+            self._evict("key_stats", self.max_entries * KEY_STATS_FACTOR)
+
+    def _evict(self, table, keep):
+        # Least recently used rows beyond ``keep``
+        self._db.execute(f"DELETE FROM {table} WHERE key IN (SELECT key FROM {table} ORDER BY used DESC "
+                         f"LIMIT -1 OFFSET ?)", (keep,))
+
+    def stats(self):
+        with self._lock:
+            hits, misses = self._db.execute("SELECT COALESCE(SUM(hits), 0), COALESCE(SUM(misses), 0) "
+                                            "FROM key_stats").fetchone()
+            entries = self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        return {"hits": hits, "misses": misses, "entries": entries,
+                "hit_ratio": hits / (hits + misses) if hits + misses else 0.0}
+
+    def key_stats(self, keys=None, limit=None):
+        with self._lock:
+            if keys is None:
+                rows = self._db.execute("SELECT key, hits, misses FROM key_stats ORDER BY hits + misses DESC "
+                                        "LIMIT ?", (limit or -1,)).fetchall()
+            else:
+                keys = list(keys)
+                found = {row[0]: row for row in self._db.execute(
+                    f"SELECT key, hits, misses FROM key_stats WHERE key IN ({','.join('?' * len(keys))})", keys)}
+                rows = [found.get(key, (key, 0, 0)) for key in keys]
+        stats = [_key_stat(*row) for row in rows]
+        stats.sort(key=lambda stat: stat["hits"] + stat["misses"], reverse=True)
+        return stats[:limit] if limit else stats
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM entries")
+            self._db.execute("DELETE FROM key_stats")
+        super().clear()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
@@ -0,0 +1,167 @@
+"""
+Shared, long-lived provider clients.
+
+Creating a client per call means a new TCP + TLS handshake (and for Gemini a new
+model object) on every request. These helpers hand out one instance per process
+instead, so a long-running service or a batch of calls keeps its connections warm:
+
+- ``http_session()``: a pooled ``requests.Session`` used for GROQ and, via
+  ``openai.requestssession``, for OpenAI,
+- ``gemini_model(model_name, system)``: a cached ``GenerativeModel`` per model and
+  system instruction, used inside ``with gemini_key(api_key):`` (the SDK's key is
+  process-wide, so calls with another key wait),
+- ``warm_up(providers)``: resolves, connects and initializes those clients on a
+  background thread, e.g. while an interactive app is still asking questions.
+"""
+
+import contextlib
+import functools
+import socket
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+import google.generativeai as old_genai
+from google.generativeai import GenerativeModel
+from google.generativeai import client as gemini_client
+
+from . import telemetry
+
+# Connections kept open per host; should cover the number of concurrent calls
+POOL_SIZE = 32
+
+# Endpoint contacted by each provider, for DNS and connection warm-up
+PROVIDER_URLS = {
+    "GROQ": "https://api.groq.com/",
+    "GEMINI": "https://generativelanguage.googleapis.com/",
+    "OPENAI": "https://api.openai.com/",
+}
+
+_lock = threading.Lock()
+_session = None
+# API key the Gemini SDK is configured with, and the calls currently using it
+_gemini_gate = threading.Condition()
+_gemini_key = None
+_gemini_active = 0
+
+
+def http_session():
+    """Returns the process-wide pooled requests.Session."""
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=POOL_SIZE)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
+
+@contextlib.contextmanager
+def gemini_key(api_key):
+    """
+    Runs a block of Gemini calls with the SDK configured for ``api_key``.
+
+    ``genai.configure`` is process-wide, so calls with the same key run concurrently
+    while a call with another key waits for them to finish before reconfiguring.
+    Configuring replaces the SDK's default client (and the connection warm_up()
+    prepared), so this only happens when the key changes.
+    """
+    global _gemini_key, _gemini_active
+    with _gemini_gate:
+        while _gemini_active and _gemini_key != api_key:
+            _gemini_gate.wait()
+        if _gemini_key != api_key:
+            old_genai.configure(api_key=api_key)
+            # Cached models keep the client (and key) they were first used with
+            gemini_model.cache_clear()
+            _gemini_key = api_key
+        _gemini_active += 1
+    try:
+        yield
+    finally:
+        with _gemini_gate:
+            _gemini_active -= 1
+            if not _gemini_active:
+                _gemini_gate.notify_all()
+
+
+def configure_gemini(api_key):
+    """Configures the Gemini SDK with ``api_key`` (see gemini_key), e.g. before warming it up."""
+    with gemini_key(api_key):
+        pass
+
+
+@functools.lru_cache(maxsize=32)
+def gemini_model(model_name, system=None):
+    """Returns a cached GenerativeModel for this model name and system instruction."""
+    return GenerativeModel(model_name, system_instruction=system)
+
+
+def _warm_up_provider(provider, timeout, api_key=None):
+    url = PROVIDER_URLS[provider]
+    host = urlparse(url).hostname
+    socket.getaddrinfo(host, 443, proto=socket.IPPROTO_TCP)
+    if provider == "GEMINI":
+        # The SDK talks to Gemini through its own (process-wide) client, not our session
+        if api_key:
+            configure_gemini(api_key)
+        gemini_client.get_default_generative_client()
+    else:
+        # Any response will do: it leaves an open TLS connection in the session's pool
+        http_session().head(url, timeout=timeout)
+
+
+def warm_up(providers, timeout=5.0):
+    """
+    Warms up the clients of ``providers`` in a background thread and returns at once.
+
+    For every provider the host name is resolved and the client is initialized; GROQ
+    and OpenAI also open a TLS connection in the shared session, so the first real
+    request does not pay for DNS, TCP and TLS. Failures are ignored: the first real
+    request simply connects as usual.
+
+    Args:
+        providers (iterable): Provider names, or the ``api_keys`` dict from read_api_keys()
+                              (then the Gemini SDK is also configured with its key).
+                              Unknown names are skipped.
+        timeout (float): Connect/read timeout for each warm-up request.
+
+    Returns:
+        threading.Thread: The started daemon thread. Its ``results`` dict maps each
+                          provider to the warm-up time in seconds or the error message.
+    """
+    api_keys = providers if isinstance(providers, dict) else {}
+    providers = [provider for provider in providers if provider in PROVIDER_URLS]
+    results = {}
+
+    def run():
+        with telemetry.span("clients.warm_up", {"providers": ",".join(providers)}):
+            for provider in providers:
+                start = time.perf_counter()
+                try:
+                    _warm_up_provider(provider, timeout, api_keys.get(provider))
+                    results[provider] = round(time.perf_counter() - start, 3)
+                except Exception as e:
+                    results[provider] = f"{type(e).__name__}: {e}"
+
+    thread = threading.Thread(target=run, name="gai-warm-up", daemon=True)
+    thread.results = results
+    thread.start()
+    return thread
+
+
+def close():
+    """Closes pooled connections; the next call opens new ones."""
+    global _session, _gemini_key
+    with _lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+    with _gemini_gate:
+        _gemini_key = None
+    gemini_model.cache_clear()
@@ -5,15 +5,28 @@ It includes functions to read API keys from environment variables, parse JSON re
 """
 
 import os
+import re
+import time
 import requests
 import google.genai as genai
 from google.genai.types import HarmCategory, HarmBlockThreshold
 from google.auth.exceptions import RefreshError as GoogleAuthRefreshError
 from google.api_core.exceptions import GoogleAPIError, DeadlineExceeded
-from google.generativeai import GenerativeModel
 import google.generativeai as old_genai  # For configure method
 import openai
 import json
+import functools
+
+from . import clients, telemetry
+from .profiling import profiled, phase
+from .deadline import Deadline, DeadlineExceededError
+from .tiers import MODEL_TIERS, escalations
+from .cache import ResponseCache
+from .streaming import TextStream
+from .result import (
+    GenerationResult, OK, PARSE_ERROR, EMPTY, BLOCKED, AUTH_ERROR, RATE_LIMITED, INVALID_REQUEST,
+    SERVER_ERROR, HTTP_ERROR, TIMEOUT, CONNECTION_ERROR, ERROR,
+)
 
 # Read API keys from the environment variables
 # The keys are defined as: GROQ_API_KEY, GOOGLE_API_KEY etc.
@@ -28,9 +41,42 @@ def read_api_keys():
     return api_keys
 
 
-# Parse the LLM response text to extract JSON data
-# This function is designed to handle common issues with LLM responses that are supposed to be JSON.
-def parse_llm_json(llm_text_response):
+# Wrap a provider request function: times the call, fills in provider/model/latency on the
+# GenerationResult and reports request.start/request.end events inside a "gai.request" span.
+# With a deadline the call runs under Deadline.run(), so the caller gets a TIMEOUT result as
+# soon as the deadline expires or is cancelled.
+def _provider_call(provider):
+    def decorator(function):
+        def traced(prompt, api_key, model_name, **kwargs):
+            if not telemetry.active:
+                return function(prompt, api_key, model_name, **kwargs)
+            with telemetry.span("gai.request", {"provider": provider, "model": model_name}):
+                telemetry.emit("request.start", {"provider": provider, "model": model_name, "prompt_chars": len(prompt)})
+                result = function(prompt, api_key, model_name, **kwargs)
+                telemetry.emit("request.end", {"provider": provider, "model": model_name, "status": result.status})
+                return result
+
+        @functools.wraps(function)
+        def wrapper(prompt, api_key, model_name, deadline=None, **kwargs):
+            start = time.perf_counter()
+            if deadline is None:
+                result = traced(prompt, api_key, model_name, **kwargs)
+            else:
+                try:
+                    result = deadline.run(traced, prompt, api_key, model_name, deadline=deadline, **kwargs)
+                except DeadlineExceededError as e:
+                    result = GenerationResult.failure(TIMEOUT, "Deadline Exceeded", f"{provider} request abandoned: {e}")
+            result.provider = provider
+            result.model = model_name
+            result.latency = time.perf_counter() - start
+            return result
+        return wrapper
+    return decorator
+
+
+# Parse the LLM response text and report which parsing method succeeded:
+# "json", "strict_false", "regex" or "failed" (in which case data is the fallback error dict).
+def _parse_llm_json(llm_text_response):
     # 1. Strip leading/trailing whitespace
     cleaned_text = llm_text_response.strip()
 
@@ -40,7 +86,7 @@ def parse_llm_json(llm_text_response):
         cleaned_text = cleaned_text[len('```json'):]
     elif cleaned_text.startswith('```'):
         cleaned_text = cleaned_text[len('```'):]
-    
+
     if cleaned_text.endswith('```'):
         cleaned_text = cleaned_text[:-len('```')]
 
@@ -50,153 +96,204 @@ def parse_llm_json(llm_text_response):
     # 3. Attempt to parse the cleaned text
     try:
         data = json.loads(cleaned_text)
-        return data
+        return data, "json"
     except json.JSONDecodeError as e:
         print(f"JSON Decode Error: {e}")
         print(f"Attempting to fix common JSON issues...")
-        
+
         # Try to fix common issues with AI-generated JSON
         try:
             # Method 1: Try using json.loads with strict=False (allows control chars)
             data = json.loads(cleaned_text, strict=False)
             print("Successfully parsed with strict=False")
-            return data
+            return data, "strict_false"
         except:
             pass
-            
+
         try:
             # Method 2: Manual extraction if it looks like a simple title/story structure
-            import re
-            
             # Look for title and story fields using regex
             title_match = re.search(r'"title"\s*:\s*"([^"]*(?:\\.[^"]*)*)"', cleaned_text, re.DOTALL)
             story_match = re.search(r'"story"\s*:\s*"([^"]*(?:\\.[^"]*)*)"', cleaned_text, re.DOTALL)
-            
+
             if title_match and story_match:
                 title = title_match.group(1)
                 story = story_match.group(1)
-                
+
                 # Unescape common escape sequences
                 title = title.replace('\\"', '"').replace('\\n', '\n').replace('\\t', '\t')
                 story = story.replace('\\"', '"').replace('\\n', '\n').replace('\\t', '\t')
-                
+
                 print("Successfully extracted using regex parsing")
-                return {"title": title, "story": story}
+                return {"title": title, "story": story}, "regex"
         except Exception as regex_error:
             print(f"Regex extraction failed: {regex_error}")
-        
+
         # If all methods fail, return the error with the raw content
         print(f"All parsing methods failed. Original error: {e}")
-        print(f"Problematic JSON string (start): {cleaned_text[:200]}...") 
+        print(f"Problematic JSON string (start): {cleaned_text[:200]}...")
         print(f"Problematic JSON string (end): ...{cleaned_text[-200:]}")
-        
+
         # Return a fallback response instead of crashing
         return {
-            "title": "JSON Parse Error", 
+            "title": "JSON Parse Error",
             "story": f"Could not parse response as JSON. Raw content: {cleaned_text}"
-        }
+        }, "failed"
     except Exception as e:
         print(f"An unexpected error occurred during JSON parsing: {e}")
         return {
-            "title": "Unexpected Parse Error", 
+            "title": "Unexpected Parse Error",
             "story": f"Unexpected error during parsing: {e}. Raw content: {cleaned_text}"
-        }
+        }, "failed"
+
+
+# Parse the LLM response text to extract JSON data
+# This function is designed to handle common issues with LLM responses that are supposed to be JSON.
+def parse_llm_json(llm_text_response):
+    data, path = _parse_llm_json(llm_text_response)
+    if telemetry.active:
+        telemetry.emit("parse", {"path": path})
+    return data
+
+
+# Build a GenerationResult from model output text, marking unparseable output as PARSE_ERROR.
+# With json_output=False the text itself is the payload (e.g. markdown).
+def _result_from_text(content, usage=None, json_output=True):
+    if not json_output:
+        return GenerationResult(status=OK, payload=content, raw_text=content, usage=usage)
+    data, path = _parse_llm_json(content)
+    if telemetry.active:
+        telemetry.emit("parse", {"path": path})
+    if path == "failed":
+        return GenerationResult(status=PARSE_ERROR, raw_text=content, usage=usage,
+                                error_title=data["title"], error=data["story"])
+    return GenerationResult(status=OK, payload=data, raw_text=content, usage=usage)
+
+
+# Build chat messages with the (static, cacheable) system prompt first, so providers can
+# reuse the cached prefix across requests that only differ in the user message
+def _chat_messages(prompt, system=None):
+    messages = [{"role": "system", "content": system}] if system else []
+    messages.append({"role": "user", "content": prompt})
+    return messages
+
+
+# Map an HTTP status code to a result status
+def _http_status(status_code):
+    if status_code in (401, 403):
+        return AUTH_ERROR
+    if status_code == 429:
+        return RATE_LIMITED
+    if status_code in (400, 404, 413, 422):
+        return INVALID_REQUEST
+    if status_code >= 500:
+        return SERVER_ERROR
+    return HTTP_ERROR
+
+
+# Output token limit of the chat completion providers when the caller does not set one
+DEFAULT_MAX_TOKENS = 1500
 
 
 # Implementation for call_groq_api
 DEFAULT_GROQ_MODEL = "meta-llama/llama-4-scout-17b-16e-instruct"
 DEFAULT_GROQ_ENDPOINT = "https://api.groq.com/openai/v1/chat/completions"  # Hypothetical endpoint, adjust as needed
-def call_groq_api(prompt, api_key, apiend_point=DEFAULT_GROQ_ENDPOINT, model_name=DEFAULT_GROQ_MODEL) -> dict:
-    """
-    Calls the GROQ API with the provided prompt and API key.
-
-    Args:
-        prompt (str): The prompt to send to the API.
-        api_key (str): The API key for authentication.
-        model_name (str, optional): The name of the model to use.
-                                    Defaults to "meta-llama/llama-4-scout-17b-16e-instruct".
-
-    Returns:
-        dict: The parsed JSON response with title and story keys.
-    """
+@_provider_call("GROQ")
+@profiled("groq")
+def _groq_request(prompt, api_key, model_name, endpoint=DEFAULT_GROQ_ENDPOINT, system=None, deadline=None,
+                  max_tokens=None, json_output=True) -> GenerationResult:
     headers = {
         "Authorization": f"Bearer {api_key}",
         "Content-Type": "application/json"
     }
 
-    print(f"Calling GROQ API with model: {model_name} and endpoint: {apiend_point}, prompt length: {len(prompt)} characters")
+    print(f"Calling GROQ API with model: {model_name} and endpoint: {endpoint}, prompt length: {len(prompt)} characters")
 
     payload = {
         "model": model_name,
-        "messages": [
-            {"role": "user", "content": prompt}
-        ],
-        "max_tokens": 1500,
+        "messages": _chat_messages(prompt, system),
+        "max_tokens": max_tokens or DEFAULT_MAX_TOKENS,
         "temperature": 0.7,
         "top_p": 0.9,
         "frequency_penalty": 0,
         "presence_penalty": 0,
         "stop": None,
-        "stream": False 
+        "stream": False
     }
 
+    response = None
     try:
-        response = requests.post(apiend_point, json=payload, headers=headers, timeout=60)
+        with phase("groq.http"):
+            timeout = deadline.request_timeouts() if deadline else 60
+            # The shared session reuses open connections instead of a new TLS handshake per call
+            response = clients.http_session().post(endpoint, json=payload, headers=headers, timeout=timeout)
+        if telemetry.active:
+            telemetry.emit("request.first_byte", {"provider": "GROQ"})
         response.raise_for_status()  # Raises an HTTPError for bad responses (4XX or 5XX)
 
         # Parse the response
-        response_data = response.json()
-        
+        with phase("groq.decode"):
+            response_data = response.json()
+
         # Extract the content from the response
         if response_data.get("choices") and len(response_data["choices"]) > 0:
             content = response_data["choices"][0].get("message", {}).get("content")
             if content:
-                try:
-                    # Parse the JSON content returned by the AI
-                    return parse_llm_json(content)
-                except (json.JSONDecodeError, Exception) as e:
-                    print(f"Error parsing GROQ response as JSON: {e}")
-                    print(f"Raw content: {content}")
-                    return {"title": "JSON Parse Error", "story": f"Could not parse response as JSON: {content}"}
+                # Parse the JSON content returned by the AI
+                with phase("groq.parse"):
+                    return _result_from_text(content, response_data.get("usage"), json_output)
             else:
-                return {"title": "No Content", "story": "No content generated by Groq API."}
+                return GenerationResult.failure(EMPTY, "No Content", "No content generated by Groq API.")
         else:
-            return {"title": "Unexpected Response", "story": f"Unexpected Groq API response format: {response_data}"}
+            return GenerationResult.failure(EMPTY, "Unexpected Response", f"Unexpected Groq API response format: {response_data}")
 
     except requests.exceptions.HTTPError as http_err:
-        return {"title": "HTTP Error", "story": f"HTTP error occurred: {http_err}. Response: {response.text}"}
+        return GenerationResult.failure(_http_status(response.status_code), "HTTP Error",
+                                        f"HTTP error occurred: {http_err}. Response: {response.text}")
     except requests.exceptions.ConnectionError as conn_err:
-        return {"title": "Connection Error", "story": f"Connection error: {conn_err}"}
+        return GenerationResult.failure(CONNECTION_ERROR, "Connection Error", f"Connection error: {conn_err}")
     except requests.exceptions.Timeout as timeout_err:
-        return {"title": "Timeout Error", "story": f"Request timed out: {timeout_err}"}
+        return GenerationResult.failure(TIMEOUT, "Timeout Error", f"Request timed out: {timeout_err}")
     except requests.exceptions.RequestException as req_err:
-        return {"title": "Request Error", "story": f"Request error: {req_err}"}
+        return GenerationResult.failure(ERROR, "Request Error", f"Request error: {req_err}")
     except Exception as e:
-        return {"title": "Unexpected Error", "story": f"Unexpected error: {e}"}
+        return GenerationResult.failure(ERROR, "Unexpected Error", f"Unexpected error: {e}")
 
-# Implementation for call_gemini_api
-DEFAULT_GEMINI_MODEL = "gemini-1.5-flash-latest" # Using a common and efficient model
-def call_gemini_api(prompt: str, api_key, model_name: str = DEFAULT_GEMINI_MODEL) -> dict:
+
+def call_groq_api(prompt, api_key, apiend_point=DEFAULT_GROQ_ENDPOINT, model_name=DEFAULT_GROQ_MODEL, system_prompt=None) -> dict:
     """
-    Calls the GEMINI Generative AI API with the provided prompt and API key.
+    Calls the GROQ API with the provided prompt and API key.
 
     Args:
         prompt (str): The prompt to send to the API.
         api_key (str): The API key for authentication.
-        model_name (str, optional): The name of the Gemini model to use.
-                                    Defaults to "gemini-1.5-flash-latest".
+        model_name (str, optional): The name of the model to use.
+                                    Defaults to "meta-llama/llama-4-scout-17b-16e-instruct".
+        system_prompt (str, optional): Static instructions sent as a system message.
 
     Returns:
         dict: The parsed JSON response with title and story keys.
     """
+    return _groq_request(prompt, api_key, model_name, endpoint=apiend_point, system=system_prompt).to_dict()
+
+
+# Implementation for call_gemini_api
+DEFAULT_GEMINI_MODEL = "gemini-1.5-flash-latest" # Using a common and efficient model
+@_provider_call("GEMINI")
+@profiled("gemini")
+def _gemini_request(prompt, api_key, model_name, system=None, deadline=None,
+                    max_tokens=None, json_output=True) -> GenerationResult:
+    # The SDK's key is process-wide: a call with another key waits until this one is done
+    with clients.gemini_key(api_key):
+        return _gemini_generate(prompt, model_name, system, deadline, max_tokens, json_output)
+
+
+def _gemini_generate(prompt, model_name, system, deadline, max_tokens, json_output) -> GenerationResult:
     try:
-        # Configure the client library with your API key
-        # Note: This might not be needed if you're configuring elsewhere
-        # genai.configure(api_key=api_key)
-        
-        # Initialize the generative model
-        model = GenerativeModel(model_name)
-        
+        # Get the cached model (the SDK is configured with the caller's API key)
+        with phase("gemini.setup"):
+            model = clients.gemini_model(model_name, system)
+
         # Optional: Define generation configuration
         generation_config = genai.types.GenerationConfig(
             max_output_tokens=1500,
@@ -210,26 +307,43 @@ def call_gemini_api(prompt: str, api_key, model_name: str = DEFAULT_GEMINI_MODEL
         print(f"Calling GEMINI API with model: {model_name}, prompt length: {len(prompt)} characters")
 
         # Make the API call
-        response = model.generate_content(
-            prompt,
-            # safety_settings=safety_settings,
-            request_options={"timeout": 60}  # Set a timeout for the API request (in seconds)
-        )
+        with phase("gemini.http"):
+            response = model.generate_content(
+                prompt,
+                # safety_settings=safety_settings,
+                generation_config={"max_output_tokens": max_tokens} if max_tokens else None,
+                request_options={"timeout": deadline.timeout() if deadline else 60}  # Set a timeout for the API request (in seconds)
+            )
+        if telemetry.active:
+            telemetry.emit("request.first_byte", {"provider": "GEMINI"})
+
+        usage = None
+        usage_metadata = getattr(response, "usage_metadata", None)
+        if usage_metadata:
+            usage = {
+                "prompt_tokens": usage_metadata.prompt_token_count,
+                "completion_tokens": usage_metadata.candidates_token_count,
+                "total_tokens": usage_metadata.total_token_count,
+            }
 
         # Accessing the generated text:
         # The .text property is a convenient way to get the model's response.
         if response.text:
-            return parse_llm_json(response.text.strip())  # Parse the response text as JSON
+            with phase("gemini.parse"):
+                return _result_from_text(response.text.strip(), usage, json_output)  # Parse the response text as JSON
         else:
             # If response.text is empty, try to get more details
             error_details = []
+            blocked = False
             if response.prompt_feedback:
                 if response.prompt_feedback.block_reason:
+                    blocked = True
                     error_details.append(f"Blocked due to: {response.prompt_feedback.block_reason.name}")
                 for rating in response.prompt_feedback.safety_ratings:
                     if rating.blocked:
+                         blocked = True
                          error_details.append(f"Prompt safety rating blocked: {rating.category.name}")
-            
+
             if response.candidates:
                 for candidate in response.candidates:
                     if candidate.finish_reason and candidate.finish_reason.name not in ["STOP", "UNSPECIFIED"]:
@@ -237,84 +351,505 @@ def call_gemini_api(prompt: str, api_key, model_name: str = DEFAULT_GEMINI_MODEL
                     if hasattr(candidate, 'safety_ratings'):
                         for rating in candidate.safety_ratings:
                             if rating.blocked:
+                                blocked = True
                                 error_details.append(f"Candidate safety rating blocked: {rating.category.name}")
-            
+
             if not error_details:
                 error_details.append("No text content in response and no specific block/finish reason found.")
-            
-            return {"title": "GEMINI API Error", "story": "No content generated by GEMINI API.\n\nDetails:\n\n" + "\n\n".join(error_details)}
+
+            return GenerationResult.failure(BLOCKED if blocked else EMPTY, "GEMINI API Error",
+                                            "No content generated by GEMINI API.\n\nDetails:\n\n" + "\n\n".join(error_details))
 
     except GoogleAuthRefreshError as auth_err:
-        return {"title": "GEMINI API Authentication Error", "story": "Ensure your API key is valid and has the necessary permissions.\n\nDetails:\n\n" + str(auth_err)}
+        return GenerationResult.failure(AUTH_ERROR, "GEMINI API Authentication Error", "Ensure your API key is valid and has the necessary permissions.\n\nDetails:\n\n" + str(auth_err))
     except DeadlineExceeded:
-        return {"title": "GEMINI API Timeout Error", "story": "GEMINI API request timed out. Please try again later or with a shorter prompt."}
+        return GenerationResult.failure(TIMEOUT, "GEMINI API Timeout Error", "GEMINI API request timed out. Please try again later or with a shorter prompt.")
     except GoogleAPIError as api_err:
-        return {"title": "GEMINI API Error", "story": f"GEMINI API error occurred: {api_err}"}
+        return GenerationResult.failure(ERROR, "GEMINI API Error", f"GEMINI API error occurred: {api_err}")
     except AttributeError as attr_err:
-        return {"title": "GEMINI API Response Error", "story": f"Error processing GEMINI API response (AttributeError): {attr_err}. This could be due to an unexpected response format or an issue with the SDK setup."}
+        return GenerationResult.failure(ERROR, "GEMINI API Response Error", f"Error processing GEMINI API response (AttributeError): {attr_err}. This could be due to an unexpected response format or an issue with the SDK setup.")
     except Exception as e:
-        return {"title": "GEMINI API Unexpected Error", "story": f"An unexpected error occurred while calling GEMINI API: {type(e).__name__} - {e}"}
+        return GenerationResult.failure(ERROR, "GEMINI API Unexpected Error", f"An unexpected error occurred while calling GEMINI API: {type(e).__name__} - {e}")
 
-# Implementation for call_openai_api
-DEFAULT_OPENAI_MODEL = "gpt-3.5-turbo"
-def call_openai_api(prompt: str, api_key: str, model_name: str = DEFAULT_OPENAI_MODEL) -> dict:
+
+def call_gemini_api(prompt: str, api_key, model_name: str = DEFAULT_GEMINI_MODEL, system_prompt: str = None) -> dict:
     """
-    Calls the OpenAI API with the provided prompt and API key.
+    Calls the GEMINI Generative AI API with the provided prompt and API key.
 
     Args:
         prompt (str): The prompt to send to the API.
         api_key (str): The API key for authentication.
-        model_name (str, optional): The name of the OpenAI model to use.
-                                   Defaults to "gpt-3.5-turbo".
+        model_name (str, optional): The name of the Gemini model to use.
+                                    Defaults to "gemini-1.5-flash-latest".
+        system_prompt (str, optional): Static instructions sent as the system instruction.
 
     Returns:
         dict: The parsed JSON response with title and story keys.
     """
+    return _gemini_request(prompt, api_key, model_name, system=system_prompt).to_dict()
+
+
+# Implementation for call_openai_api
+DEFAULT_OPENAI_MODEL = "gpt-3.5-turbo"
+@_provider_call("OPENAI")
+@profiled("openai")
+def _openai_request(prompt, api_key, model_name, system=None, deadline=None,
+                    max_tokens=None, json_output=True) -> GenerationResult:
     try:
         print(f"Calling OPENAI API with model: {model_name}, prompt length: {len(prompt)} characters")
 
-        # Set the API key for OpenAI v0.27.10
+        # Set the API key for OpenAI v0.27.10 and let it use the pooled session
         openai.api_key = api_key
-        
+        openai.requestssession = clients.http_session()
+
         # Make the API call using the v0.27.10 format
-        response = openai.ChatCompletion.create(
-            model=model_name,
-            messages=[
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=1500,
-            temperature=0.7,
-            top_p=0.9,
-            frequency_penalty=0,
-            presence_penalty=0
-        )
+        with phase("openai.http"):
+            response = openai.ChatCompletion.create(
+                model=model_name,
+                messages=_chat_messages(prompt, system),
+                max_tokens=max_tokens or DEFAULT_MAX_TOKENS,
+                temperature=0.7,
+                top_p=0.9,
+                frequency_penalty=0,
+                presence_penalty=0,
+                request_timeout=deadline.request_timeouts() if deadline else None
+            )
+        if telemetry.active:
+            telemetry.emit("request.first_byte", {"provider": "OPENAI"})
+
+        usage = response.get("usage")
+        usage = dict(usage) if usage else None
 
         # Extract the content from the response
         if response.choices and len(response.choices) > 0:
             content = response.choices[0].message.content
             if content:
-                try:
-                    return parse_llm_json(content)
-                except (json.JSONDecodeError, Exception) as e:
-                    print(f"Error parsing OpenAI response as JSON: {e}")
-                    print(f"Raw content: {content}")
-                    return {"title": "JSON Parse Error", "story": f"Could not parse response as JSON: {content}"}
+                with phase("openai.parse"):
+                    return _result_from_text(content, usage, json_output)
             else:
-                return {"title": "No Content", "story": "No content generated by OpenAI API."}
+                return GenerationResult.failure(EMPTY, "No Content", "No content generated by OpenAI API.")
         else:
-            return {"title": "Unexpected Response", "story": "Unexpected OpenAI API response format"}
+            return GenerationResult.failure(EMPTY, "Unexpected Response", "Unexpected OpenAI API response format")
 
     except openai.error.AuthenticationError as e:
-        return {"title": "OpenAI Authentication Error", "story": f"Authentication failed. Check your API key: {e}\n\nAPI KEY: {api_key}"}
+        return GenerationResult.failure(AUTH_ERROR, "OpenAI Authentication Error", f"Authentication failed. Check your API key: {e}")
     except openai.error.RateLimitError as e:
-        return {"title": "OpenAI Rate Limit", "story": f"Rate limit exceeded: {e}"}
+        return GenerationResult.failure(RATE_LIMITED, "OpenAI Rate Limit", f"Rate limit exceeded: {e}")
     except openai.error.APIError as e:
-        return {"title": "OpenAI API Error", "story": f"OpenAI API error: {e}"}
+        return GenerationResult.failure(SERVER_ERROR, "OpenAI API Error", f"OpenAI API error: {e}")
     except openai.error.Timeout as e:
-        return {"title": "OpenAI Timeout Error", "story": f"Request timed out: {e}"}
+        return GenerationResult.failure(TIMEOUT, "OpenAI Timeout Error", f"Request timed out: {e}")
     except openai.error.APIConnectionError as e:
-        return {"title": "OpenAI Connection Error", "story": f"Failed to connect to OpenAI: {e}"}
+        return GenerationResult.failure(CONNECTION_ERROR, "OpenAI Connection Error", f"Failed to connect to OpenAI: {e}")
     except openai.error.InvalidRequestError as e:
-        return {"title": "OpenAI Invalid Request", "story": f"Invalid request: {e}"}
+        return GenerationResult.failure(INVALID_REQUEST, "OpenAI Invalid Request", f"Invalid request: {e}")
     except Exception as e:
-        return {"title": "OpenAI Unexpected Error", "story": f"An unexpected error occurred while calling OpenAI API: {type(e).__name__} - {e}"}
\ No newline at end of file
+        return GenerationResult.failure(ERROR, "OpenAI Unexpected Error", f"An unexpected error occurred while calling OpenAI API: {type(e).__name__} - {e}")
+
+
+def call_openai_api(prompt: str, api_key: str, model_name: str = DEFAULT_OPENAI_MODEL, system_prompt: str = None) -> dict:
+    """
+    Calls the OpenAI API with the provided prompt and API key.
+
+    Args:
+        prompt (str): The prompt to send to the API.
+        api_key (str): The API key for authentication.
+        model_name (str, optional): The name of the OpenAI model to use.
+                                   Defaults to "gpt-3.5-turbo".
+        system_prompt (str, optional): Static instructions sent as a system message.
+
+    Returns:
+        dict: The parsed JSON response with title and story keys.
+    """
+    return _openai_request(prompt, api_key, model_name, system=system_prompt).to_dict()
+
+
+# Streaming implementations: generators yielding text deltas and returning the usage dict
+# (or None). Exceptions propagate and are mapped to a status by _stream_error().
+def _groq_stream(prompt, api_key, model_name, system=None, deadline=None, max_tokens=None):
+    headers = {
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json"
+    }
+    payload = {
+        "model": model_name,
+        "messages": _chat_messages(prompt, system),
+        "max_tokens": max_tokens or DEFAULT_MAX_TOKENS,
+        "temperature": 0.7,
+        "top_p": 0.9,
+        "stream": True
+    }
+    timeout = deadline.request_timeouts() if deadline else 60
+    usage = None
+    with clients.http_session().post(DEFAULT_GROQ_ENDPOINT, json=payload, headers=headers, timeout=timeout,
+                                     stream=True) as response:
+        response.raise_for_status()
+        # Server-sent events: "data: {chunk}" lines, ending with "data: [DONE]"
+        for line in response.iter_lines(decode_unicode=True):
+            if not line or not line.startswith("data:"):
+                continue
+            data = line[len("data:"):].strip()
+            if data == "[DONE]":
+                break
+            chunk = json.loads(data)
+            usage = chunk.get("usage") or (chunk.get("x_groq") or {}).get("usage") or usage
+            for choice in chunk.get("choices") or []:
+                yield (choice.get("delta") or {}).get("content") or ""
+    return usage
+
+
+def _gemini_stream(prompt, api_key, model_name, system=None, deadline=None, max_tokens=None):
+    # Held until the stream is consumed or closed, see _gemini_request
+    with clients.gemini_key(api_key):
+        return (yield from _gemini_chunks(prompt, model_name, system, deadline, max_tokens))
+
+
+def _gemini_chunks(prompt, model_name, system, deadline, max_tokens):
+    model = clients.gemini_model(model_name, system)
+    response = model.generate_content(
+        prompt,
+        stream=True,
+        generation_config={"max_output_tokens": max_tokens} if max_tokens else None,
+        request_options={"timeout": deadline.timeout() if deadline else 60}
+    )
+    usage_metadata = None
+    for chunk in response:
+        usage_metadata = getattr(chunk, "usage_metadata", None) or usage_metadata
+        yield chunk.text
+    if usage_metadata:
+        return {
+            "prompt_tokens": usage_metadata.prompt_token_count,
+            "completion_tokens": usage_metadata.candidates_token_count,
+            "total_tokens": usage_metadata.total_token_count,
+        }
+    return None
+
+
+def _openai_stream(prompt, api_key, model_name, system=None, deadline=None, max_tokens=None):
+    openai.api_key = api_key
+    openai.requestssession = clients.http_session()
+    response = openai.ChatCompletion.create(
+        model=model_name,
+        messages=_chat_messages(prompt, system),
+        max_tokens=max_tokens or DEFAULT_MAX_TOKENS,
+        temperature=0.7,
+        top_p=0.9,
+        stream=True,
+        request_timeout=deadline.request_timeouts() if deadline else None
+    )
+    for chunk in response:
+        for choice in chunk.choices:
+            yield choice.delta.get("content") or ""
+    return None
+
+
+# Map an exception raised while streaming to (status, error title, message)
+def _stream_error(error):
+    if isinstance(error, requests.exceptions.HTTPError):
+        response = error.response
+        return (_http_status(response.status_code) if response is not None else HTTP_ERROR), "HTTP Error", str(error)
+    if isinstance(error, requests.exceptions.ConnectionError):
+        return CONNECTION_ERROR, "Connection Error", str(error)
+    if isinstance(error, requests.exceptions.Timeout):
+        return TIMEOUT, "Timeout Error", str(error)
+    if isinstance(error, openai.error.AuthenticationError) or isinstance(error, GoogleAuthRefreshError):
+        return AUTH_ERROR, "Authentication Error", str(error)
+    if isinstance(error, openai.error.RateLimitError):
+        return RATE_LIMITED, "Rate Limit", str(error)
+    if isinstance(error, (openai.error.Timeout, DeadlineExceeded)):
+        return TIMEOUT, "Timeout Error", str(error)
+    if isinstance(error, openai.error.APIConnectionError):
+        return CONNECTION_ERROR, "Connection Error", str(error)
+    if isinstance(error, openai.error.InvalidRequestError):
+        return INVALID_REQUEST, "Invalid Request", str(error)
+    if isinstance(error, openai.error.APIError):
+        return SERVER_ERROR, "API Error", str(error)
+    return ERROR, "Unexpected Error", f"{type(error).__name__} - {error}"
+
+
+# Provider name -> request function and default model
+PROVIDERS = {
+    "GROQ": _groq_request,
+    "GEMINI": _gemini_request,
+    "OPENAI": _openai_request,
+}
+DEFAULT_MODELS = {
+    "GROQ": DEFAULT_GROQ_MODEL,
+    "GEMINI": DEFAULT_GEMINI_MODEL,
+    "OPENAI": DEFAULT_OPENAI_MODEL,
+}
+STREAM_PROVIDERS = {
+    "GROQ": _groq_stream,
+    "GEMINI": _gemini_stream,
+    "OPENAI": _openai_stream,
+}
+
+
+def generate(provider: str, prompt: str, api_key: str, model_name: str = None, system: str = None,
+             deadline: Deadline = None, max_tokens: int = None, json_output: bool = True) -> GenerationResult:
+    """
+    Calls the given provider and returns a typed result instead of a title/story dict.
+
+    Args:
+        provider (str): "GROQ", "GEMINI" or "OPENAI".
+        prompt (str): The prompt to send to the API.
+        api_key (str): The API key for authentication.
+        model_name (str, optional): Model to use. Defaults to the provider's default model.
+        system (str, optional): Static instructions sent ahead of the prompt as a system
+                                message. Keeping them identical across calls lets providers
+                                serve them from their prompt-prefix cache.
+        deadline (Deadline, optional): Overall time budget. Timeouts are derived from the
+                                       remaining budget instead of the fixed 60 seconds.
+        max_tokens (int, optional): Output token limit. Defaults to DEFAULT_MAX_TOKENS
+                                    (GROQ/OpenAI) or the model's own limit (Gemini).
+        json_output (bool): Parse the answer as JSON. With False the payload is the
+                            answer text as returned (e.g. markdown).
+
+    Returns:
+        GenerationResult: Parsed payload, raw text, status, usage and latency of the call.
+    """
+    if provider not in PROVIDERS:
+        raise ValueError(f"Unknown provider: {provider}. Choose from: {list(PROVIDERS)}")
+    return PROVIDERS[provider](prompt, api_key, model_name or DEFAULT_MODELS[provider], system=system, deadline=deadline,
+                               max_tokens=max_tokens, json_output=json_output)
+
+
+def generate_tiered(provider: str, prompt: str, api_key: str, validate=None, system: str = None,
+                    deadline: Deadline = None, tiers: list = None, max_tokens: int = None,
+                    json_output: bool = True) -> GenerationResult:
+    """
+    Calls the provider's cheapest model first and escalates to stronger models only
+    when the answer fails validation.
+
+    Args:
+        provider (str): "GROQ", "GEMINI" or "OPENAI".
+        prompt (str): The prompt to send to the API.
+        api_key (str): The API key for authentication.
+        validate (callable, optional): ``validate(result)`` returns None for an acceptable
+                                       result or a failure reason (see tiers.payload_validator).
+                                       Failed calls (parse errors, empty answers, ...) always escalate.
+        system (str, optional): Static system instructions, see generate().
+        deadline (Deadline, optional): Budget shared by all tiers.
+        tiers (list, optional): Model names, cheapest first. Defaults to MODEL_TIERS[provider].
+        max_tokens (int, optional): Output token limit, see generate().
+        json_output (bool): Parse answers as JSON, see generate().
+
+    Returns:
+        GenerationResult: The first valid result; if no tier passes validation, the
+                          strongest successful answer that failed it; otherwise the last failure.
+    """
+    tiers = tiers or MODEL_TIERS.get(provider) or [DEFAULT_MODELS[provider]]
+    reasons = []
+    result = fallback = None
+    served = None
+    for tier, model_name in enumerate(tiers):
+        if result is not None and deadline is not None and deadline.expired:
+            break
+        result = generate(provider, prompt, api_key, model_name=model_name, system=system, deadline=deadline,
+                          max_tokens=max_tokens, json_output=json_output)
+        reason = result.status if not result.ok else (validate(result) if validate else None)
+        if reason is None:
+            served = tier
+            break
+        if result.ok:
+            # Kept in case the stronger tiers fail outright
+            fallback = (tier, result)
+        reasons.append(reason)
+        if tier == len(tiers) - 1 or result.status == AUTH_ERROR:
+            break
+        print(f"{provider} {model_name} answer rejected ({reason}); escalating to {tiers[tier + 1]}")
+    valid = served is not None
+    if not valid and fallback is not None:
+        served, result = fallback
+    escalations.record(provider, served, reasons, valid=valid)
+    return result
+
+
+def generate_with_failover(providers, prompt: str, api_keys: dict, system: str = None, deadline: Deadline = None,
+                           retries: int = 1, backoff: float = 1.0, models: dict = None,
+                           tiered: bool = False, validate=None, max_tokens: int = None, json_output: bool = True,
+                           cache: ResponseCache = None, cache_key: str = None) -> GenerationResult:
+    """
+    Tries each provider in order, retrying retryable failures, until one succeeds.
+
+    Args:
+        providers (list): Provider names in order of preference. Providers without a key are skipped.
+        prompt (str): The prompt to send.
+        api_keys (dict): Provider name -> API key, as returned by read_api_keys().
+        system (str, optional): Static system instructions, see generate().
+        deadline (Deadline, optional): Budget shared by all attempts; no new attempt is
+                                       started once it has expired.
+        retries (int): Extra attempts per provider for retryable statuses (timeouts, 5xx, 429).
+        backoff (float): Initial delay in seconds between attempts, doubled each retry.
+        models (dict, optional): Provider name -> model name, overriding DEFAULT_MODELS
+                                 (e.g. a smaller model for an easy task).
+        tiered (bool): Call each provider through generate_tiered() (cheap model first).
+        validate (callable, optional): Validator for tiered calls, see generate_tiered().
+        max_tokens (int, optional): Output token limit, see generate().
+        json_output (bool): Parse answers as JSON, see generate().
+        cache (ResponseCache, optional): Serve repeated requests from this cache; only
+                                         successful results are stored.
+        cache_key (str, optional): Key to use instead of one derived from the request, for
+                                   callers that know which differing requests are equivalent.
+
+    Returns:
+        GenerationResult: The first successful result (possibly from the cache), or the last failure.
+    """
+    if cache is not None:
+        key = cache_key or cache.key(list(providers), prompt, system, models, tiered, max_tokens, json_output)
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+        result = generate_with_failover(providers, prompt, api_keys, system=system, deadline=deadline, retries=retries,
+                                        backoff=backoff, models=models, tiered=tiered, validate=validate,
+                                        max_tokens=max_tokens, json_output=json_output)
+        cache.put(key, result)
+        return result
+
+    result = None
+    for provider in providers:
+        if provider not in api_keys or provider not in PROVIDERS:
+            continue
+        for attempt in range(retries + 1):
+            if deadline is not None and deadline.expired:
+                return result or GenerationResult.failure(TIMEOUT, "Deadline Exceeded", "No time left to call any provider.")
+            if tiered:
+                result = generate_tiered(provider, prompt, api_keys[provider], validate=validate, system=system,
+                                         deadline=deadline, max_tokens=max_tokens, json_output=json_output)
+            else:
+                result = generate(provider, prompt, api_keys[provider], model_name=(models or {}).get(provider),
+                                  system=system, deadline=deadline, max_tokens=max_tokens, json_output=json_output)
+            if result.ok or not result.retryable or attempt == retries:
+                break
+            if telemetry.active:
+                telemetry.emit("retry", {"provider": provider, "status": result.status, "attempt": attempt + 1})
+            delay = backoff * (2 ** attempt)
+            if deadline is not None:
+                if not deadline.sleep(delay):
+                    break
+            else:
+                time.sleep(delay)
+        if result.ok:
+            return result
+    if result is None:
+        return GenerationResult.failure(AUTH_ERROR, "No API Keys", f"No API key found for any of: {list(providers)}")
+    return result
+
+
+def _stream_source(provider, prompt, api_key, model_name, system, deadline, max_tokens):
+    print(f"Streaming from {provider} with model: {model_name}, prompt length: {len(prompt)} characters")
+    return STREAM_PROVIDERS[provider](prompt, api_key, model_name, system=system, deadline=deadline,
+                                      max_tokens=max_tokens)
+
+
+def generate_stream(provider: str, prompt: str, api_key: str, model_name: str = None, system: str = None,
+                    deadline: Deadline = None, max_tokens: int = None) -> TextStream:
+    """
+    Calls the given provider in streaming mode.
+
+    Args:
+        provider (str): "GROQ", "GEMINI" or "OPENAI".
+        prompt (str): The prompt to send to the API.
+        api_key (str): The API key for authentication.
+        model_name (str, optional): Model to use. Defaults to the provider's default model.
+        system (str, optional): Static system instructions, see generate().
+        deadline (Deadline, optional): The stream is abandoned once it expires.
+        max_tokens (int, optional): Output token limit, see generate().
+
+    Returns:
+        TextStream: Iterates over text deltas; ``result`` holds the GenerationResult (with the
+                    text as payload, no JSON parsing) once the stream is exhausted.
+    """
+    if provider not in STREAM_PROVIDERS:
+        raise ValueError(f"Unknown provider: {provider}. Choose from: {list(STREAM_PROVIDERS)}")
+    model_name = model_name or DEFAULT_MODELS[provider]
+    source = _stream_source(provider, prompt, api_key, model_name, system, deadline, max_tokens)
+    return TextStream(source, provider=provider, model=model_name, deadline=deadline, errors=_stream_error)
+
+
+class _NoStream(Exception):
+    pass
+
+
+def stream_with_failover(providers, prompt: str, api_keys: dict, system: str = None, deadline: Deadline = None,
+                         models: dict = None, max_tokens: int = None, cache: ResponseCache = None,
+                         cache_key: str = None) -> TextStream:
+    """
+    Streams from the first provider that produces text.
+
+    A provider that fails (or answers nothing) before sending any text is skipped for the
+    next one. Once text has been delivered there is no failover, since it cannot be taken
+    back; the failure is reported in the stream's result.
+
+    Args:
+        providers (list): Provider names in order of preference. Providers without a key are skipped.
+        prompt (str): The prompt to send.
+        api_keys (dict): Provider name -> API key, as returned by read_api_keys().
+        system (str, optional): Static system instructions, see generate().
+        deadline (Deadline, optional): Budget shared by all attempts.
+        models (dict, optional): Provider name -> model name, overriding DEFAULT_MODELS.
+        max_tokens (int, optional): Output token limit, see generate().
+        cache (ResponseCache, optional): A cached answer is replayed as one delta; complete
+                                         successful streams are stored.
+        cache_key (str, optional): Key to use instead of one derived from the request.
+
+    Returns:
+        TextStream: See generate_stream().
+    """
+    key = None
+    if cache is not None:
+        # Same key as generate_with_failover(json_output=False), so both share the cache
+        key = cache_key or cache.key(list(providers), prompt, system, models, False, max_tokens, False)
+        cached = cache.get(key)
+        if cached is not None:
+            return TextStream.from_result(cached)
+
+    def failover():
+        last_error = None
+        for provider in providers:
+            if provider not in api_keys or provider not in STREAM_PROVIDERS:
+                continue
+            if deadline is not None and deadline.expired:
+                break
+            model_name = (models or {}).get(provider) or DEFAULT_MODELS[provider]
+            stream.provider, stream.model = provider, model_name
+            source = _stream_source(provider, prompt, api_keys[provider], model_name, system, deadline, max_tokens)
+            sent = False
+            try:
+                iterator = iter(source)
+                while True:
+                    try:
+                        delta = next(iterator)
+                    except StopIteration as stop:
+                        usage = stop.value
+                        break
+                    if delta:
+                        sent = True
+                        yield delta
+            except Exception as e:
+                if sent:
+                    raise
+                last_error = e
+                status, _, message = _stream_error(e)
+                print(f"{provider} stream failed ({status}: {message})")
+                continue
+            if sent:
+                return usage
+            print(f"{provider} streamed no content")
+        if last_error is not None:
+            raise last_error
+        if stream.provider is None:
+            raise _NoStream(f"No API key found for any of: {list(providers)}")
+        return None
+
+    def errors(error):
+        if isinstance(error, _NoStream):
+            return AUTH_ERROR, "No API Keys", str(error)
+        return _stream_error(error)
+
+    def store(result):
+        if cache is not None:
+            cache.put(key, result)
+
+    stream = TextStream(failover(), deadline=deadline, errors=errors, on_result=store)
+    return stream
@@ -0,0 +1,136 @@
+"""
+End-to-end deadlines with cancellation.
+
+A ``Deadline`` is created once per user-visible operation and passed to every
+gai_lib call that belongs to it (retries, failover, continuation requests). Each
+call derives its connect/read timeouts from the remaining budget, and the caller
+gets control back as soon as the deadline expires or ``cancel()`` is called (for
+example from a Ctrl-C handler), even if a provider is still sending.
+
+    deadline = gai_lib.Deadline(90)
+    result = gai_lib.generate_with_failover(["GROQ", "OPENAI"], prompt, api_keys, deadline=deadline)
+"""
+
+import contextvars
+import threading
+import time
+
+
+class DeadlineExceededError(Exception):
+    """Raised when work is attempted after the deadline expired or was cancelled."""
+
+
+class Deadline:
+    """
+    A point in time after which outstanding work is abandoned.
+
+    Args:
+        seconds (float): Total budget from now.
+        connect_timeout (float): Upper bound for establishing a connection; the rest of
+                                 the remaining budget is available for reading.
+    """
+
+    def __init__(self, seconds, connect_timeout=10.0):
+        self.expires_at = time.monotonic() + seconds
+        self.connect_timeout = connect_timeout
+        self._cancelled = threading.Event()
+        self._callbacks = []
+        self._lock = threading.Lock()
+        self._timer = None
+
+    def remaining(self):
+        """Seconds left, 0 once expired or cancelled."""
+        if self._cancelled.is_set():
+            return 0.0
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self):
+        return self.remaining() <= 0
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def check(self):
+        """Raises DeadlineExceededError if no time is left."""
+        if self._cancelled.is_set():
+            raise DeadlineExceededError("Operation was cancelled.")
+        if self.expired:
+            raise DeadlineExceededError("Deadline exceeded.")
+
+    def timeout(self, cap=None):
+        """Remaining budget, optionally capped (e.g. a provider's own maximum)."""
+        remaining = self.remaining()
+        return remaining if cap is None else min(cap, remaining)
+
+    def request_timeouts(self):
+        """Returns a ``(connect, read)`` timeout pair for HTTP clients."""
+        remaining = self.remaining()
+        return min(self.connect_timeout, remaining), remaining
+
+    def cancel(self):
+        """Cancels the deadline now and notifies everything waiting on it."""
+        with self._lock:
+            if self._cancelled.is_set():
+                return
+            self._cancelled.set()
+            callbacks, self._callbacks = self._callbacks, []
+            if self._timer is not None:
+                self._timer.cancel()
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"Deadline cancel callback failed: {e}")
+
+    def on_cancel(self, callback):
+        """Calls ``callback()`` when the deadline is cancelled or expires."""
+        with self._lock:
+            if not self._cancelled.is_set():
+                self._callbacks.append(callback)
+                if self._timer is None:
+                    self._timer = threading.Timer(self.remaining(), self.cancel)
+                    self._timer.daemon = True
+                    self._timer.start()
+                return
+        callback()
+
+    def sleep(self, seconds):
+        """Sleeps for ``seconds`` or until the deadline ends. Returns False if it ended."""
+        self._cancelled.wait(min(seconds, self.remaining()))
+        return not self.expired
+
+    def run(self, function, *args, **kwargs):
+        """
+        Runs ``function`` in a worker thread and waits for it within the deadline.
+
+        If the deadline expires or is cancelled first, the worker is abandoned (it is a
+        daemon thread and its own timeouts are derived from this deadline) and
+        DeadlineExceededError is raised.
+        """
+        self.check()
+        outcome = {}
+        done = threading.Event()
+        # Carry the caller's context (e.g. the current telemetry span) into the worker
+        context = contextvars.copy_context()
+
+        def worker():
+            try:
+                outcome["value"] = context.run(function, *args, **kwargs)
+            except BaseException as e:
+                outcome["error"] = e
+            finally:
+                done.set()
+
+        threading.Thread(target=worker, daemon=True, name="gai-deadline-worker").start()
+        while not done.is_set():
+            remaining = self.remaining()
+            if remaining <= 0:
+                raise DeadlineExceededError("Cancelled while waiting for a response."
+                                            if self.cancelled else "Deadline exceeded while waiting for a response.")
+            # Wake up periodically so cancel() and Ctrl-C are noticed promptly
+            done.wait(min(remaining, 0.25))
+        if "error" in outcome:
+            raise outcome["error"]
+        return outcome["value"]
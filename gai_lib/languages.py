@@ -0,0 +1,169 @@
+"""
+Language name -> ISO 639-1 code resolution with per-language metadata.
+
+The table below is compiled into lookup dicts on first use (and only once), so
+resolving "French", "français", "francais", "fr" or "fr-CA" is a dict lookup
+instead of a fuzzy search through a full language database.
+
+    gai_lib.languages.resolve("Deutsch")           # "de"
+    gai_lib.languages.get("ja").script             # "Jpan"
+    gai_lib.languages.chars_per_token("ja")        # 1.2
+
+``chars_per_token`` is a rough average for current BPE tokenizers; use it to turn
+character limits into token budgets, not for billing.
+"""
+
+import functools
+import unicodedata
+
+# code|English name|native name|ISO 15924 script|chars per token|aliases (comma separated)
+_TABLE = """
+af|Afrikaans|Afrikaans|Latn|3.2|
+am|Amharic|አማርኛ|Ethi|1.5|
+ar|Arabic|العربية|Arab|2.6|
+bg|Bulgarian|български|Cyrl|2.8|
+bn|Bengali|বাংলা|Beng|1.8|bangla
+ca|Catalan|català|Latn|3.2|valencian
+cs|Czech|čeština|Latn|2.8|
+cy|Welsh|Cymraeg|Latn|3.0|
+da|Danish|dansk|Latn|3.4|
+de|German|Deutsch|Latn|3.6|
+el|Greek|Ελληνικά|Grek|2.4|
+en|English|English|Latn|4.0|
+es|Spanish|español|Latn|3.7|castilian,castellano
+et|Estonian|eesti|Latn|2.9|
+eu|Basque|euskara|Latn|2.9|
+fa|Persian|فارسی|Arab|2.5|farsi
+fi|Finnish|suomi|Latn|3.0|
+fr|French|français|Latn|3.7|
+ga|Irish|Gaeilge|Latn|3.0|irish gaelic
+gl|Galician|galego|Latn|3.3|
+gu|Gujarati|ગુજરાતી|Gujr|1.7|
+ha|Hausa|Hausa|Latn|3.0|
+he|Hebrew|עברית|Hebr|2.3|
+hi|Hindi|हिन्दी|Deva|2.0|
+hr|Croatian|hrvatski|Latn|3.0|
+hu|Hungarian|magyar|Latn|2.9|
+hy|Armenian|հայերեն|Armn|1.8|
+id|Indonesian|Bahasa Indonesia|Latn|3.6|bahasa
+is|Icelandic|íslenska|Latn|2.7|
+it|Italian|italiano|Latn|3.6|
+ja|Japanese|日本語|Jpan|1.2|nihongo
+jv|Javanese|Basa Jawa|Latn|3.2|
+ka|Georgian|ქართული|Geor|1.5|
+kk|Kazakh|қазақ тілі|Cyrl|2.4|
+km|Khmer|ខ្មែរ|Khmr|1.3|cambodian
+kn|Kannada|ಕನ್ನಡ|Knda|1.6|
+ko|Korean|한국어|Kore|1.4|hangul
+lt|Lithuanian|lietuvių|Latn|2.8|
+lv|Latvian|latviešu|Latn|2.8|
+mk|Macedonian|македонски|Cyrl|2.7|
+ml|Malayalam|മലയാളം|Mlym|1.5|
+mn|Mongolian|монгол|Cyrl|2.4|
+mr|Marathi|मराठी|Deva|1.8|
+ms|Malay|Bahasa Melayu|Latn|3.5|
+my|Burmese|မြန်မာ|Mymr|1.2|myanmar
+ne|Nepali|नेपाली|Deva|1.8|
+nl|Dutch|Nederlands|Latn|3.6|flemish
+no|Norwegian|norsk|Latn|3.4|bokmal,nynorsk,norsk bokmal,norsk nynorsk,nb,nn
+pa|Punjabi|ਪੰਜਾਬੀ|Guru|1.7|panjabi
+pl|Polish|polski|Latn|3.0|
+pt|Portuguese|português|Latn|3.6|
+ro|Romanian|română|Latn|3.2|moldovan
+ru|Russian|русский|Cyrl|2.9|
+sa|Sanskrit|संस्कृतम्|Deva|1.5|samskrit
+si|Sinhala|සිංහල|Sinh|1.5|sinhalese
+sk|Slovak|slovenčina|Latn|2.8|
+sl|Slovenian|slovenščina|Latn|2.9|slovene
+sq|Albanian|shqip|Latn|3.0|
+sr|Serbian|српски|Cyrl|2.7|srpski
+sv|Swedish|svenska|Latn|3.4|
+sw|Swahili|Kiswahili|Latn|3.2|
+ta|Tamil|தமிழ்|Taml|1.6|
+te|Telugu|తెలుగు|Telu|1.6|
+th|Thai|ไทย|Thai|1.8|
+tl|Tagalog|Tagalog|Latn|3.3|filipino,fil
+tr|Turkish|Türkçe|Latn|3.1|
+uk|Ukrainian|українська|Cyrl|2.7|
+ur|Urdu|اردو|Arab|2.4|
+uz|Uzbek|oʻzbekcha|Latn|2.8|
+vi|Vietnamese|Tiếng Việt|Latn|2.9|
+xh|Xhosa|isiXhosa|Latn|3.0|
+yo|Yoruba|Yorùbá|Latn|2.6|
+zh|Chinese|中文|Hans|1.3|mandarin,chinese simplified,simplified chinese,chinese traditional,traditional chinese,汉语,漢語,普通话
+zu|Zulu|isiZulu|Latn|3.0|
+"""
+
+DEFAULT_CHARS_PER_TOKEN = 4.0
+
+
+class Language:
+    """Metadata for one language of the index."""
+
+    __slots__ = ("code", "name", "native_name", "script", "chars_per_token")
+
+    def __init__(self, code, name, native_name, script, chars_per_token):
+        self.code = code
+        self.name = name
+        self.native_name = native_name
+        self.script = script
+        self.chars_per_token = chars_per_token
+
+    def __repr__(self):
+        return f"Language({self.code!r}, {self.name!r}, script={self.script!r})"
+
+
+# Case-fold and drop accents, so "Français", "francais" and " FRANÇAIS " are the same key
+def _normalize(name):
+    decomposed = unicodedata.normalize("NFKD", name.strip().casefold())
+    return " ".join("".join(c for c in decomposed if not unicodedata.combining(c)).split())
+
+
+@functools.lru_cache(maxsize=None)
+def _index():
+    languages, names = {}, {}
+    for line in _TABLE.strip().splitlines():
+        code, name, native_name, script, chars_per_token, aliases = line.split("|")
+        languages[code] = Language(code, name, native_name, script, float(chars_per_token))
+        for key in (code, name, native_name, *aliases.split(",")):
+            if key:
+                names.setdefault(_normalize(key), code)
+    return languages, names
+
+
+@functools.lru_cache(maxsize=1024)
+def resolve(name):
+    """
+    Resolves a language name, native name, alias or code to its ISO 639-1 code.
+
+    Region and script subtags are ignored ("pt-BR" -> "pt", "zh_Hant" -> "zh").
+
+    Args:
+        name (str): User input such as "French", "français" or "fr-CA".
+
+    Returns:
+        str: The ISO 639-1 code, or None if the language is not in the index.
+    """
+    _, names = _index()
+    key = _normalize(name)
+    if key in names:
+        return names[key]
+    base = key.replace("_", "-").split("-")[0]
+    return names.get(base) if base != key else None
+
+
+def get(name):
+    """Returns the Language for a name or code, or None if it is not in the index."""
+    code = resolve(name)
+    return _index()[0][code] if code else None
+
+
+def chars_per_token(name, default=DEFAULT_CHARS_PER_TOKEN):
+    """Average characters per token for a language, or ``default`` if it is unknown."""
+    language = get(name)
+    return language.chars_per_token if language else default
+
+
+def all_languages():
+    """Returns every Language in the index, ordered by code."""
+    return list(_index()[0].values())
@@ -0,0 +1,312 @@
+"""
+Open-loop load generator for gai_lib provider calls.
+
+Requests are started on a fixed schedule (``rate`` per second) regardless of how
+long earlier requests take, and each latency is measured from the *intended*
+start time. A slow provider therefore shows up as growing latency instead of a
+silently reduced request rate (no coordinated omission).
+
+Usage:
+    python -m gai_lib.loadtest --target stub --rate 20 --duration 30
+    python -m gai_lib.loadtest --target GROQ --rate 2 --duration 60
+"""
+
+import argparse
+import json
+import math
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from .core import PROVIDERS, read_api_keys, generate_stream
+from .result import GenerationResult, SERVER_ERROR
+
+DEFAULT_PROMPT = (
+    'Write a two sentence story about a lighthouse keeper. '
+    'Return ONLY valid JSON: {"title": "Story Title", "story": "Story text"}'
+)
+
+
+class LatencyHistogram:
+    """
+    HDR-style latency histogram with bounded relative error.
+
+    Values (microseconds) below ``2**sub_bucket_bits`` are counted exactly. Larger
+    values fall into power-of-two buckets that are each split into
+    ``2**(sub_bucket_bits - 1)`` linear sub-buckets, so any recorded value is
+    reported within about ``1 / 2**(sub_bucket_bits - 1)`` of its true value
+    (0.8% for the default of 8 bits) using a few thousand counters.
+    """
+
+    def __init__(self, sub_bucket_bits=8):
+        self.sub_bucket_bits = sub_bucket_bits
+        self.sub_bucket_count = 1 << sub_bucket_bits
+        self.sub_bucket_half = self.sub_bucket_count >> 1
+        self.counts = [0] * self.sub_bucket_count
+        self.total = 0
+        self.min = None
+        self.max = 0
+        self.sum = 0
+
+    def _index(self, value):
+        if value < self.sub_bucket_count:
+            return value
+        shift = value.bit_length() - self.sub_bucket_bits
+        return self.sub_bucket_count + (shift - 1) * self.sub_bucket_half + ((value >> shift) - self.sub_bucket_half)
+
+    def _highest_equivalent(self, index):
+        if index < self.sub_bucket_count:
+            return index
+        shift, offset = divmod(index - self.sub_bucket_count, self.sub_bucket_half)
+        shift += 1
+        return ((offset + self.sub_bucket_half + 1) << shift) - 1
+
+    def record(self, value_us):
+        """Records one value in microseconds."""
+        value = max(0, int(value_us))
+        index = self._index(value)
+        if index >= len(self.counts):
+            self.counts.extend([0] * (index + 1 - len(self.counts)))
+        self.counts[index] += 1
+        self.total += 1
+        self.sum += value
+        self.max = max(self.max, value)
+        self.min = value if self.min is None else min(self.min, value)
+
+    def merge(self, other):
+        """Adds all values recorded in another histogram with the same precision."""
+        if other.sub_bucket_bits != self.sub_bucket_bits:
+            raise ValueError("Cannot merge histograms with different precision.")
+        if len(other.counts) > len(self.counts):
+            self.counts.extend([0] * (len(other.counts) - len(self.counts)))
+        for index, count in enumerate(other.counts):
+            self.counts[index] += count
+        self.total += other.total
+        self.sum += other.sum
+        self.max = max(self.max, other.max)
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+
+    def percentile(self, percentile):
+        """Returns the value (microseconds) at or below which ``percentile`` % of values fall."""
+        if not self.total:
+            return 0
+        rank = max(1, math.ceil(percentile / 100.0 * self.total))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(self._highest_equivalent(index), self.max)
+        return self.max
+
+    def mean(self):
+        return self.sum / self.total if self.total else 0.0
+
+
+class LoadTestReport:
+    """Aggregated results of one load-test run."""
+
+    PERCENTILES = (50, 90, 99, 99.9)
+
+    def __init__(self, target_name, rate, duration):
+        self.target_name = target_name
+        self.rate = rate
+        self.duration = duration
+        self.latency = LatencyHistogram()
+        self.ttft = LatencyHistogram()
+        self.errors = Counter()
+        self.sent = 0
+        self.completed = 0
+        self.elapsed = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, latency_us, ttft_us, error_kind):
+        with self._lock:
+            self.completed += 1
+            self.latency.record(latency_us)
+            if ttft_us is not None:
+                self.ttft.record(ttft_us)
+            if error_kind:
+                self.errors[error_kind] += 1
+
+    def throughput(self):
+        """Successful responses per second of wall-clock time."""
+        if not self.elapsed:
+            return 0.0
+        return (self.completed - sum(self.errors.values())) / self.elapsed
+
+    def to_dict(self):
+        def summary(histogram):
+            result = {f"p{p:g}_ms": histogram.percentile(p) / 1000.0 for p in self.PERCENTILES}
+            result["mean_ms"] = histogram.mean() / 1000.0
+            result["max_ms"] = histogram.max / 1000.0
+            return result
+
+        return {
+            "target": self.target_name,
+            "rate": self.rate,
+            "duration": self.duration,
+            "sent": self.sent,
+            "completed": self.completed,
+            "elapsed_s": self.elapsed,
+            "throughput_rps": self.throughput(),
+            "latency": summary(self.latency),
+            "ttft": summary(self.ttft),
+            "errors": dict(self.errors),
+        }
+
+    def print_summary(self):
+        data = self.to_dict()
+        print(f"\nLoad test: {self.target_name} at {self.rate:g} req/s for {self.duration:g}s")
+        print(f"  Sent: {self.sent}  Completed: {self.completed}  Errors: {sum(self.errors.values())}")
+        print(f"  Throughput: {data['throughput_rps']:.2f} successful req/s over {self.elapsed:.1f}s")
+        for label, key in (("Latency", "latency"), ("Time to first token", "ttft")):
+            stats = data[key]
+            row = "  ".join(f"p{p:g}={stats[f'p{p:g}_ms']:.1f}ms" for p in self.PERCENTILES)
+            print(f"  {label}: {row}  max={stats['max_ms']:.1f}ms")
+        for kind, count in self.errors.most_common():
+            print(f"    {kind}: {count}")
+
+
+def _error_kind(result):
+    if result.ok:
+        return None
+    return f"{result.status}: {result.error_title}" if result.error_title else result.status
+
+
+def make_stub_target(latency_ms=800.0, ttft_ms=250.0, jitter=0.3, error_rate=0.0):
+    """
+    Creates a local stand-in for a provider so the harness can be exercised offline.
+
+    Args:
+        latency_ms (float): Median total response time.
+        ttft_ms (float): Median time to the first token.
+        jitter (float): Sigma of the log-normal noise applied to both times.
+        error_rate (float): Fraction of calls that return an error response.
+
+    Returns:
+        callable: A target taking ``(prompt, on_first_token)`` and returning a GenerationResult.
+    """
+    def stub_target(prompt, on_first_token):
+        first = ttft_ms * random.lognormvariate(0, jitter)
+        total = max(first, latency_ms * random.lognormvariate(0, jitter))
+        time.sleep(first / 1000.0)
+        on_first_token()
+        time.sleep((total - first) / 1000.0)
+        if random.random() < error_rate:
+            return GenerationResult.failure(SERVER_ERROR, "HTTP Error", "Simulated failure from stub target.")
+        return GenerationResult(payload={"title": "Stub Story", "story": "x" * len(prompt)}, provider="STUB")
+
+    return stub_target
+
+
+def make_provider_target(provider, api_key):
+    """
+    Wraps a gai_lib provider function as a load-test target.
+
+    The provider is called in streaming mode, so time-to-first-token is measured when
+    the first non-empty text delta arrives and latency when the stream is complete.
+    """
+    if provider not in PROVIDERS:
+        raise ValueError(f"Unknown provider: {provider}. Choose from: {list(PROVIDERS)}")
+
+    def provider_target(prompt, on_first_token):
+        stream = generate_stream(provider, prompt, api_key)
+        for delta in stream:
+            if delta:
+                on_first_token()
+        return stream.result
+
+    return provider_target
+
+
+def run_load_test(target, rate, duration, prompt=DEFAULT_PROMPT, max_workers=256, target_name="target"):
+    """
+    Drives ``target`` at a fixed arrival rate and collects latency statistics.
+
+    Args:
+        target (callable): Called as ``target(prompt, on_first_token)``, returns a GenerationResult.
+        rate (float): Requests started per second.
+        duration (float): Length of the arrival schedule in seconds.
+        prompt (str): Prompt sent with every request.
+        max_workers (int): Upper bound on concurrently running requests. Requests
+                           beyond it wait in a queue and that wait counts as latency.
+        target_name (str): Label used in the report.
+
+    Returns:
+        LoadTestReport: Aggregated latency, time-to-first-token and error counts.
+    """
+    if rate <= 0 or duration <= 0:
+        raise ValueError("rate and duration must be positive.")
+
+    report = LoadTestReport(target_name, rate, duration)
+    interval = 1.0 / rate
+    total_requests = int(rate * duration)
+
+    def run_one(intended_start):
+        first_token = []
+        error_kind = None
+        try:
+            result = target(prompt, lambda: first_token or first_token.append(time.perf_counter()))
+            error_kind = _error_kind(result)
+        except Exception as e:
+            error_kind = type(e).__name__
+        done = time.perf_counter()
+        ttft_us = (first_token[0] - intended_start) * 1e6 if first_token else None
+        report.add((done - intended_start) * 1e6, ttft_us, error_kind)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for i in range(total_requests):
+            intended_start = start + i * interval
+            delay = intended_start - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            executor.submit(run_one, intended_start)
+            report.sent += 1
+    report.elapsed = time.perf_counter() - start
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Open-loop load test for gai_lib providers.")
+    parser.add_argument("--target", default="stub", help="stub, GROQ, GEMINI or OPENAI")
+    parser.add_argument("--rate", type=float, default=5.0, help="requests started per second")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds of arrivals")
+    parser.add_argument("--max-workers", type=int, default=256)
+    parser.add_argument("--prompt", default=DEFAULT_PROMPT)
+    parser.add_argument("--stub-latency-ms", type=float, default=800.0)
+    parser.add_argument("--stub-ttft-ms", type=float, default=250.0)
+    parser.add_argument("--stub-error-rate", type=float, default=0.0)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    if args.target == "stub":
+        target = make_stub_target(args.stub_latency_ms, args.stub_ttft_ms, error_rate=args.stub_error_rate)
+    else:
+        try:
+            from dotenv import load_dotenv, find_dotenv
+            load_dotenv(find_dotenv(usecwd=True))
+        except ImportError:
+            pass
+        provider = args.target.upper()
+        api_keys = read_api_keys()
+        if provider not in api_keys:
+            print(f"API key for {provider} not found in environment variables")
+            return 1
+        target = make_provider_target(provider, api_keys[provider])
+
+    report = run_load_test(target, args.rate, args.duration, prompt=args.prompt,
+                           max_workers=args.max_workers, target_name=args.target)
+    if args.json:
+        print(json.dumps(report.to_dict(), indent=2))
+    else:
+        report.print_summary()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
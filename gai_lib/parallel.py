@@ -0,0 +1,48 @@
+"""
+Run independent generation calls concurrently.
+
+Provider calls spend nearly all their time waiting on the network, so a small
+thread pool is enough to overlap them. Each task runs in a copy of the caller's
+context, so telemetry spans opened around ``run_parallel`` stay the parent of
+the spans created inside the tasks.
+
+    results = gai_lib.parallel.run_parallel(
+        lambda section: gai_lib.generate("GROQ", section_prompt(section), key, deadline=deadline),
+        sections,
+    )
+"""
+
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_MAX_WORKERS = 8
+
+
+def run_parallel(function, items, max_workers=DEFAULT_MAX_WORKERS):
+    """
+    Calls ``function(item)`` for every item concurrently.
+
+    Args:
+        function (callable): Called once per item, from a worker thread.
+        items (iterable): Inputs; one task per item.
+        max_workers (int): Upper bound on concurrent calls (e.g. a provider's rate limit).
+
+    Raises:
+        Exception: The first exception raised by a task, after all tasks finished.
+
+    Returns:
+        list: Return values in the same order as ``items``.
+    """
+    items = list(items)
+    if not items:
+        return []
+    if len(items) == 1 or max_workers <= 1:
+        return [function(item) for item in items]
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items)), thread_name_prefix="gai-parallel") as pool:
+        futures = [pool.submit(contextvars.copy_context().run, function, item) for item in items]
+        errors = [future.exception() for future in futures]
+    for error in errors:
+        if error is not None:
+            raise error
+    return [future.result() for future in futures]
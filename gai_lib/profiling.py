@@ -0,0 +1,159 @@
+"""
+Opt-in profiling for gai_lib generation calls.
+
+Profiling is switched on with the ``GAI_PROFILE=1`` environment variable (output
+goes to ``GAI_PROFILE_DIR``, default ``gai_profiles``) or for a block of code with
+the ``profile()`` context manager. While enabled, every generation call gets:
+
+- a cProfile dump (``.prof``, open with ``python -m pstats`` or snakeviz), which
+  shows where connection time goes (``getaddrinfo`` for DNS, ``do_handshake`` for
+  TLS) and how much is SDK overhead,
+- a tracemalloc snapshot (``.tracemalloc``, load with ``tracemalloc.Snapshot.load``),
+- per-phase wall-clock timers appended to ``phases.jsonl``.
+
+When disabled, ``profiled`` functions cost one global check and ``phase()`` returns
+a shared no-op context manager.
+"""
+
+import contextlib
+import cProfile
+import functools
+import itertools
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+_enabled = False
+_memory = True
+_run_dir = None
+_sequence = itertools.count(1)
+_local = threading.local()
+_write_lock = threading.Lock()
+_NULL_PHASE = contextlib.nullcontext()
+
+
+def is_enabled():
+    return _enabled
+
+
+def enable(directory=None, memory=True):
+    """
+    Turns profiling on for all subsequent generation calls.
+
+    Args:
+        directory (str, optional): Parent directory for profile output. Defaults to
+                                   ``GAI_PROFILE_DIR`` or ``gai_profiles``.
+        memory (bool): Also record tracemalloc snapshots (slower).
+
+    Returns:
+        str: The directory this run's profiles are written to.
+    """
+    global _enabled, _memory, _run_dir
+    directory = directory or os.environ.get("GAI_PROFILE_DIR", "gai_profiles")
+    _run_dir = os.path.join(directory, f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}")
+    os.makedirs(_run_dir, exist_ok=True)
+    _memory = memory
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    _enabled = True
+    return _run_dir
+
+
+def disable():
+    """Turns profiling off. Files already written are kept."""
+    global _enabled
+    _enabled = False
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+@contextlib.contextmanager
+def profile(directory=None, memory=True):
+    """Enables profiling for the duration of a ``with`` block."""
+    was_enabled = _enabled
+    run_dir = _run_dir if was_enabled else enable(directory, memory)
+    try:
+        yield run_dir
+    finally:
+        if not was_enabled:
+            disable()
+
+
+def _record_phases(entry):
+    with _write_lock:
+        with open(os.path.join(_run_dir, "phases.jsonl"), "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+
+
+class _Phase:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.start
+        phases = getattr(_local, "phases", None)
+        if phases is not None:
+            phases[self.name] = phases.get(self.name, 0.0) + elapsed
+        else:
+            _record_phases({"call": None, "phases": {self.name: elapsed}})
+        return False
+
+
+def phase(name):
+    """
+    Times a named phase (e.g. "groq.http", "story.save") when profiling is enabled.
+
+    Phases inside a profiled call are reported with that call, others on their own line.
+    """
+    if not _enabled:
+        return _NULL_PHASE
+    return _Phase(name)
+
+
+def _profile_call(name, function, args, kwargs):
+    label = f"{next(_sequence):04d}_{name}"
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Another profiler is already active (e.g. a concurrent call on Python 3.12+)
+        profiler = None
+    _local.phases = phases = {}
+    start = time.perf_counter()
+    try:
+        return function(*args, **kwargs)
+    finally:
+        total = time.perf_counter() - start
+        if profiler is not None:
+            profiler.disable()
+        _local.phases = None
+        if _enabled:
+            if profiler is not None:
+                profiler.dump_stats(os.path.join(_run_dir, f"{label}.prof"))
+            if _memory and tracemalloc.is_tracing():
+                tracemalloc.take_snapshot().dump(os.path.join(_run_dir, f"{label}.tracemalloc"))
+            _record_phases({"call": label, "total": total, "phases": phases})
+
+
+def profiled(name):
+    """Decorator that profiles every call of the wrapped function while profiling is enabled."""
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _enabled or getattr(_local, "phases", None) is not None:
+                return function(*args, **kwargs)
+            return _profile_call(name, function, args, kwargs)
+        return wrapper
+    return decorator
+
+
+if os.environ.get("GAI_PROFILE", "").lower() in ("1", "true", "yes"):
+    enable()
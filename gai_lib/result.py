@@ -0,0 +1,93 @@
+"""
+Typed result of a generation call.
+
+Every provider call in gai_lib produces a ``GenerationResult``. Callers branch on
+``result.ok`` / ``result.status`` instead of matching error titles, and
+``to_dict()`` gives the ``{"title": ..., "story": ...}`` dict the original
+``call_*_api`` functions return.
+"""
+
+# Status values
+OK = "ok"
+PARSE_ERROR = "parse_error"          # Response arrived but was not valid JSON
+EMPTY = "empty"                      # No content / unexpected response shape
+BLOCKED = "blocked"                  # Refused by the provider's safety filters
+AUTH_ERROR = "auth_error"
+RATE_LIMITED = "rate_limited"
+INVALID_REQUEST = "invalid_request"
+SERVER_ERROR = "server_error"        # HTTP 5xx
+HTTP_ERROR = "http_error"            # Other HTTP errors
+TIMEOUT = "timeout"
+CONNECTION_ERROR = "connection_error"
+ERROR = "error"                      # Anything else
+
+# Failures that may succeed if the same request is sent again
+RETRYABLE_STATUSES = frozenset({RATE_LIMITED, SERVER_ERROR, TIMEOUT, CONNECTION_ERROR, EMPTY})
+
+
+class GenerationResult:
+    """
+    Outcome of one provider call.
+
+    Attributes:
+        payload: Parsed JSON response (usually a dict), or None on failure.
+        raw_text (str): Text returned by the model, if any.
+        status (str): One of the status constants in this module.
+        error (str): Human readable error description, None on success.
+        error_title (str): Short error label, used as "title" by ``to_dict()``.
+        usage (dict): Token counts (prompt_tokens, completion_tokens, total_tokens) if reported.
+        latency (float): Wall-clock seconds spent in the call.
+        provider (str): "GROQ", "GEMINI" or "OPENAI".
+        model (str): Model name used for the call.
+        cached (bool): True if the result was served from a ResponseCache.
+    """
+
+    __slots__ = ("payload", "raw_text", "status", "error", "error_title", "usage", "latency", "provider", "model",
+                 "cached")
+
+    def __init__(self, status=OK, payload=None, raw_text=None, error=None, error_title=None, usage=None,
+                 latency=0.0, provider=None, model=None, cached=False):
+        self.payload = payload
+        self.raw_text = raw_text
+        self.status = status
+        self.error = error
+        self.error_title = error_title
+        self.usage = usage
+        self.latency = latency
+        self.provider = provider
+        self.model = model
+        self.cached = cached
+
+    @classmethod
+    def failure(cls, status, error_title, error, raw_text=None):
+        return cls(status=status, error=error, error_title=error_title, raw_text=raw_text)
+
+    @property
+    def ok(self):
+        return self.status == OK
+
+    @property
+    def retryable(self):
+        return self.status in RETRYABLE_STATUSES
+
+    def to_dict(self):
+        """Returns the legacy response dict: the payload on success, an error title/story otherwise."""
+        if self.status == OK and isinstance(self.payload, dict):
+            return self.payload
+        if self.status == OK:
+            return {"title": "Unexpected Response", "story": f"Response was not a JSON object: {self.raw_text}"}
+        return {"title": self.error_title or self.status, "story": self.error or ""}
+
+    def __repr__(self):
+        return (f"GenerationResult(status={self.status!r}, provider={self.provider!r}, model={self.model!r}, "
+                f"latency={self.latency:.3f})")
+
+
+def merge_usage(*usages):
+    """Adds up token counts of several calls; None if none of them reported usage."""
+    total = {}
+    for usage in usages:
+        for name, value in (usage or {}).items():
+            if isinstance(value, (int, float)):
+                total[name] = total.get(name, 0) + value
+    return total or None
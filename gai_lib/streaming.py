@@ -0,0 +1,110 @@
+"""
+Streamed generation: text deltas as the model produces them.
+
+``generate_stream()`` / ``stream_with_failover()`` (in core) return a ``TextStream``.
+Iterating it yields the text deltas; once it is exhausted ``result`` holds the usual
+``GenerationResult`` (status, full text as payload, usage, latency) and
+``time_to_first_delta`` how long the first text took:
+
+    stream = gai_lib.generate_stream("GROQ", prompt, api_keys["GROQ"])
+    for delta in stream:
+        print(delta, end="", flush=True)
+    stream.result.ok, stream.time_to_first_delta
+
+Provider errors do not raise: the iteration ends and ``result`` carries the failure.
+If the caller stops iterating early, ``result`` stays None.
+"""
+
+import time
+
+from . import telemetry
+from .result import GenerationResult, OK, EMPTY, TIMEOUT
+
+
+class TextStream:
+    """Iterator over the text deltas of one streamed generation."""
+
+    def __init__(self, source, provider=None, model=None, deadline=None, errors=None, on_result=None):
+        """
+        Args:
+            source (iterator): Yields text deltas; its return value (StopIteration.value)
+                               is the usage dict, if the provider reported one.
+            provider (str, optional): Provider name for the result.
+            model (str, optional): Model name for the result.
+            deadline (Deadline, optional): The stream is abandoned once it expires.
+            errors (callable, optional): ``errors(exception)`` -> (status, error title, message).
+            on_result (callable, optional): Called with ``result`` when the stream is complete.
+        """
+        self.provider = provider
+        self.model = model
+        self.result = None
+        self.time_to_first_delta = None
+        self._parts = []
+        self._iterator = self._run(source, deadline, errors, on_result)
+
+    @classmethod
+    def from_result(cls, result):
+        """A stream replaying an existing (e.g. cached) result as a single delta."""
+        stream = cls(iter(()), result.provider, result.model)
+        stream._parts = [result.raw_text] if result.ok and result.raw_text else []
+        stream._iterator = iter(list(stream._parts))
+        stream.result = result
+        stream.time_to_first_delta = 0.0
+        return stream
+
+    @property
+    def text(self):
+        """Text received so far."""
+        return "".join(self._parts)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._iterator)
+
+    def collect(self):
+        """Consumes the rest of the stream and returns ``result``."""
+        for _ in self:
+            pass
+        return self.result
+
+    def _run(self, source, deadline, errors, on_result):
+        start = time.perf_counter()
+        status, error_title, error, usage = OK, None, None, None
+        try:
+            iterator = iter(source)
+            while True:
+                if deadline is not None and deadline.expired:
+                    status, error_title, error = TIMEOUT, "Deadline Exceeded", f"{self.provider} stream abandoned"
+                    break
+                try:
+                    delta = next(iterator)
+                except StopIteration as stop:
+                    usage = stop.value
+                    break
+                if not delta:
+                    continue
+                if not self._parts:
+                    self.time_to_first_delta = time.perf_counter() - start
+                    if telemetry.active:
+                        telemetry.emit("request.first_byte", {"provider": self.provider})
+                self._parts.append(delta)
+                yield delta
+        except Exception as e:
+            if errors is None:
+                raise
+            status, error_title, error = errors(e)
+
+        text = self.text
+        if status == OK and not text:
+            status, error_title, error = EMPTY, "No Content", f"No content streamed by {self.provider}."
+        self.result = GenerationResult(status=status, payload=text if status == OK else None, raw_text=text or None,
+                                       error=error, error_title=error_title, usage=usage,
+                                       latency=time.perf_counter() - start, provider=self.provider, model=self.model)
+        if telemetry.active:
+            telemetry.emit("stream.end", {"provider": self.provider, "model": self.model, "status": status,
+                                          "time_to_first_delta": self.time_to_first_delta,
+                                          "duration": self.result.latency})
+        if on_result is not None:
+            on_result(self.result)
@@ -0,0 +1,286 @@
+"""
+Structured events and nested spans for gai_lib and the projects built on it.
+
+Subscribers are plain callables that receive ``Event`` objects::
+
+    exporter = gai_lib.telemetry.PrometheusExporter("metrics.prom")
+    gai_lib.telemetry.subscribe(exporter)
+
+Events emitted by gai_lib:
+
+- ``request.start`` / ``request.first_byte`` / ``request.end`` around provider calls
+- ``retry`` when a call is repeated, ``cache.hit`` when a cached result is served
+- ``stream.end`` with the time to the first delta and the duration of a streamed call
+- ``parse`` with the ``parse_llm_json`` path that succeeded
+- ``span.start`` / ``span.end`` for ``span()`` blocks (prompt build, generation, save, ...)
+
+Nothing is allocated while no subscriber is registered: ``span()`` returns a shared
+no-op context manager and call sites guard ``emit()`` with ``if telemetry.active:``.
+
+Setting ``GAI_METRICS_FILE`` writes Prometheus text metrics to that file at exit and
+``GAI_OTEL=1`` forwards spans to the OpenTelemetry API (``opentelemetry-api`` required).
+"""
+
+import atexit
+import contextlib
+import contextvars
+import itertools
+import os
+import threading
+import time
+
+active = False
+_subscribers = []
+_span_ids = itertools.count(1)
+_current_span = contextvars.ContextVar("gai_current_span", default=None)
+_NULL_SPAN = contextlib.nullcontext()
+
+
+class Event:
+    """One telemetry event. ``span`` is the innermost open span, if any."""
+
+    __slots__ = ("name", "timestamp_ns", "span", "attributes")
+
+    def __init__(self, name, span, attributes):
+        self.name = name
+        self.timestamp_ns = time.time_ns()
+        self.span = span
+        self.attributes = attributes
+
+    def __repr__(self):
+        return f"Event({self.name!r}, span={self.span and self.span.name!r}, attributes={self.attributes!r})"
+
+
+def subscribe(callback):
+    """Registers ``callback(event)`` for all future events and returns it."""
+    global active
+    _subscribers.append(callback)
+    active = True
+    return callback
+
+
+def unsubscribe(callback):
+    global active
+    if callback in _subscribers:
+        _subscribers.remove(callback)
+    active = bool(_subscribers)
+
+
+def emit(name, attributes=None):
+    """
+    Sends an event to every subscriber. Call sites on hot paths should check
+    ``telemetry.active`` first so the attribute dict is never built without a subscriber.
+    """
+    if not active:
+        return
+    event = Event(name, _current_span.get(), attributes or {})
+    for callback in list(_subscribers):
+        try:
+            callback(event)
+        except Exception as e:
+            print(f"Telemetry subscriber {callback!r} failed: {e}")
+
+
+class Span:
+    """A timed, nestable block. Created by ``span()``; do not instantiate directly."""
+
+    __slots__ = ("name", "span_id", "parent", "attributes", "start", "duration", "error", "_token")
+
+    def __init__(self, name, attributes):
+        self.name = name
+        self.attributes = attributes
+        self.span_id = next(_span_ids)
+        self.parent = None
+        self.duration = None
+        self.error = None
+
+    @property
+    def trace_id(self):
+        span = self
+        while span.parent is not None:
+            span = span.parent
+        return span.span_id
+
+    def __enter__(self):
+        self.parent = _current_span.get()
+        self._token = _current_span.set(self)
+        self.start = time.perf_counter()
+        emit("span.start")
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration = time.perf_counter() - self.start
+        if exc_type is not None:
+            self.error = exc_type.__name__
+        emit("span.end")
+        _current_span.reset(self._token)
+        return False
+
+
+def span(name, attributes=None):
+    """
+    Opens a span that nests inside the current one (per thread / asyncio task).
+
+    Args:
+        name (str): Stage name, e.g. "story.prompt_build" or "gai.request".
+        attributes (dict, optional): Extra labels such as {"provider": "GROQ"}.
+    """
+    if not active:
+        return _NULL_SPAN
+    return Span(name, attributes or {})
+
+
+class PrometheusExporter:
+    """
+    Aggregates events into counters and histograms in the Prometheus text format.
+
+    Call ``write()`` to (atomically) rewrite the metrics file, e.g. for the node
+    exporter's textfile collector, or ``render()`` to serve the text directly.
+    """
+
+    BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+    def __init__(self, path=None, prefix="gai"):
+        self.path = path
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self._request_starts = {}
+
+    def _count(self, name, labels, value=1):
+        key = (name, tuple(sorted(labels.items())))
+        self._counters[key] = self._counters.get(key, 0) + value
+
+    def _observe(self, name, labels, value):
+        key = (name, tuple(sorted(labels.items())))
+        buckets = self._histograms.get(key)
+        if buckets is None:
+            buckets = self._histograms[key] = [0] * len(self.BUCKETS) + [0, 0.0]
+        for i, bound in enumerate(self.BUCKETS):
+            if value <= bound:
+                buckets[i] += 1
+        buckets[-2] += 1
+        buckets[-1] += value
+
+    def __call__(self, event):
+        attributes = event.attributes
+        with self._lock:
+            if event.name == "request.start":
+                self._request_starts[event.span] = event.timestamp_ns
+            elif event.name == "request.first_byte":
+                started = self._request_starts.get(event.span)
+                if started is not None:
+                    self._observe("time_to_first_byte_seconds", {"provider": attributes.get("provider", "")},
+                                  (event.timestamp_ns - started) / 1e9)
+            elif event.name == "request.end":
+                started = self._request_starts.pop(event.span, None)
+                labels = {"provider": attributes.get("provider", ""), "status": attributes.get("status", "")}
+                self._count("requests_total", labels)
+                if started is not None:
+                    self._observe("request_duration_seconds", {"provider": labels["provider"]},
+                                  (event.timestamp_ns - started) / 1e9)
+            elif event.name == "retry":
+                self._count("retries_total", {"provider": attributes.get("provider", "")})
+            elif event.name == "parse":
+                self._count("parse_total", {"path": attributes.get("path", "")})
+            elif event.name == "cache.hit":
+                self._count("cache_hits_total", {"cache": attributes.get("cache", "")})
+            elif event.name == "span.end":
+                self._observe("span_duration_seconds", {"span": event.span.name}, event.span.duration)
+
+    @staticmethod
+    def _labels(labels, extra=()):
+        pairs = list(labels) + list(extra)
+        if not pairs:
+            return ""
+        escaped = []
+        for key, value in pairs:
+            value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+            escaped.append(f'{key}="{value}"')
+        return "{" + ",".join(escaped) + "}"
+
+    def render(self):
+        """Returns all metrics in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            seen = set()
+            for (name, labels), value in sorted(self._counters.items()):
+                metric = f"{self.prefix}_{name}"
+                if metric not in seen:
+                    lines.append(f"# TYPE {metric} counter")
+                    seen.add(metric)
+                lines.append(f"{metric}{self._labels(labels)} {value}")
+            for (name, labels), buckets in sorted(self._histograms.items()):
+                metric = f"{self.prefix}_{name}"
+                if metric not in seen:
+                    lines.append(f"# TYPE {metric} histogram")
+                    seen.add(metric)
+                for bound, count in zip(self.BUCKETS, buckets):
+                    lines.append(f"{metric}_bucket{self._labels(labels, [('le', bound)])} {count}")
+                lines.append(f"{metric}_bucket{self._labels(labels, [('le', '+Inf')])} {buckets[-2]}")
+                lines.append(f"{metric}_count{self._labels(labels)} {buckets[-2]}")
+                lines.append(f"{metric}_sum{self._labels(labels)} {buckets[-1]}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path=None):
+        """Writes the metrics file atomically (temp file + rename)."""
+        path = path or self.path
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(self.render())
+        os.replace(temp_path, path)
+
+
+class OpenTelemetryExporter:
+    """
+    Forwards spans (with their nesting) and events to an OpenTelemetry tracer.
+
+    Requires the ``opentelemetry-api`` package; configure the SDK and exporter
+    (OTLP, console, ...) as usual before subscribing.
+    """
+
+    def __init__(self, tracer=None):
+        try:
+            from opentelemetry import trace
+        except ImportError as e:
+            raise ImportError("OpenTelemetryExporter requires 'opentelemetry-api'. "
+                              "Install it with: pip install opentelemetry-api opentelemetry-sdk") from e
+        self._trace = trace
+        self._tracer = tracer or trace.get_tracer("gai_lib")
+        self._spans = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, event):
+        span = event.span
+        if event.name == "span.start":
+            parent = self._spans.get(span.parent.span_id) if span.parent is not None else None
+            context = self._trace.set_span_in_context(parent) if parent is not None else None
+            otel_span = self._tracer.start_span(span.name, context=context, attributes=span.attributes,
+                                                start_time=event.timestamp_ns)
+            with self._lock:
+                self._spans[span.span_id] = otel_span
+        elif event.name == "span.end":
+            with self._lock:
+                otel_span = self._spans.pop(span.span_id, None)
+            if otel_span is not None:
+                if span.error:
+                    otel_span.set_attribute("error.type", span.error)
+                otel_span.end(end_time=event.timestamp_ns)
+        elif span is not None:
+            otel_span = self._spans.get(span.span_id)
+            if otel_span is not None:
+                attributes = {k: v for k, v in event.attributes.items() if isinstance(v, (str, bool, int, float))}
+                otel_span.add_event(event.name, attributes=attributes, timestamp=event.timestamp_ns)
+
+
+def _configure_from_env():
+    metrics_file = os.environ.get("GAI_METRICS_FILE")
+    if metrics_file:
+        exporter = subscribe(PrometheusExporter(metrics_file))
+        atexit.register(exporter.write)
+    if os.environ.get("GAI_OTEL", "").lower() in ("1", "true", "yes"):
+        subscribe(OpenTelemetryExporter())
+
+
+_configure_from_env()
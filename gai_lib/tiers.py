@@ -0,0 +1,118 @@
+"""
+Model tiers for cheap-first generation.
+
+``generate_tiered()`` (in core) calls a provider's fastest, cheapest model first,
+validates the answer locally and escalates to the next tier only if validation
+fails. This module holds the tier lists, a validator for title/story style
+payloads and the per-provider escalation statistics.
+
+    validate = gai_lib.tiers.payload_validator(("title", "story"), text_field="story",
+                                               min_chars=500, language="fr")
+    result = gai_lib.generate_tiered("GROQ", prompt, api_keys["GROQ"], validate=validate)
+    gai_lib.tiers.escalations.summary()
+"""
+
+import threading
+
+from . import telemetry
+from .validation import check_text
+
+# Provider name -> models from cheapest/fastest to strongest
+MODEL_TIERS = {
+    "GROQ": ["llama-3.1-8b-instant", "meta-llama/llama-4-scout-17b-16e-instruct"],
+    "GEMINI": ["gemini-1.5-flash-8b", "gemini-1.5-flash-latest"],
+    "OPENAI": ["gpt-4o-mini", "gpt-4o"],
+}
+
+
+def payload_validator(fields=("title", "story"), text_field=None, min_chars=None, max_chars=None, language=None):
+    """
+    Builds a validator for ``generate_tiered``.
+
+    Args:
+        fields (tuple): Keys the JSON payload must contain as non-empty strings.
+        text_field (str, optional): Field whose length and language are checked.
+        min_chars (int, optional): Minimum length of ``text_field``.
+        max_chars (int, optional): Maximum length of ``text_field``.
+        language (str, optional): Expected language (name or ISO code) of ``text_field``.
+
+    Returns:
+        callable: ``validate(result)`` returning None if the result is acceptable, or
+                  the failure reason: "schema", "length" or "language".
+    """
+    def validate(result):
+        payload = result.payload
+        if not isinstance(payload, dict) or not all(isinstance(payload.get(field), str) and payload[field].strip()
+                                                    for field in fields):
+            return "schema"
+        if text_field is None:
+            return None
+        report = check_text(payload.get(text_field, ""), min_chars, max_chars, language)
+        if not report.language_ok:
+            return "language"
+        if not report.length_ok:
+            return "length"
+        return None
+    return validate
+
+
+class EscalationStats:
+    """Per-provider counts of which tier served each request and why tiers were skipped."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._providers = {}
+
+    def record(self, provider, served_tier, reasons, valid=True):
+        """
+        Args:
+            provider (str): Provider name.
+            served_tier (int): Index of the tier that produced the final result, or None
+                               if every tier failed.
+            reasons (list): Failure reason of each tier that was rejected, the last one included.
+            valid (bool): False if no tier passed validation and the final result is the
+                          best answer that did not; it is counted as "invalid", not served.
+        """
+        # Every rejection escalated except the last one when no tier was accepted
+        escalated = max(0, len(reasons) - (served_tier is None or not valid))
+        with self._lock:
+            stats = self._providers.setdefault(provider, {"requests": 0, "served": {}, "invalid": 0, "failed": 0,
+                                                          "reasons": {}})
+            stats["requests"] += 1
+            if served_tier is None:
+                stats["failed"] += 1
+            elif not valid:
+                stats["invalid"] += 1
+            else:
+                stats["served"][served_tier] = stats["served"].get(served_tier, 0) + 1
+            for reason in reasons:
+                stats["reasons"][reason] = stats["reasons"].get(reason, 0) + 1
+        if telemetry.active:
+            telemetry.emit("escalation", {"provider": provider, "served_tier": served_tier, "valid": valid,
+                                          "escalations": escalated, "reasons": ",".join(reasons)})
+
+    def summary(self):
+        """
+        Returns {provider: {"requests", "escalation_rate", "served" (tier -> count of valid
+        results), "invalid", "failed", "reasons"}}.
+        """
+        with self._lock:
+            return {
+                provider: {
+                    "requests": stats["requests"],
+                    "escalation_rate": 1 - stats["served"].get(0, 0) / stats["requests"],
+                    "served": dict(stats["served"]),
+                    "invalid": stats["invalid"],
+                    "failed": stats["failed"],
+                    "reasons": dict(stats["reasons"]),
+                }
+                for provider, stats in self._providers.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._providers.clear()
+
+
+# Process-wide statistics
+escalations = EscalationStats()
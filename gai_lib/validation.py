@@ -0,0 +1,220 @@
+"""
+Checks generated text against the requested length and language.
+
+    report = gai_lib.validation.check_text(story, min_chars=500, max_chars=1500, language="fr")
+    if report.too_long:
+        story = gai_lib.validation.trim_to_sentence(story, 1500)
+    gai_lib.validation.compliance.record("GROQ", report, action="trimmed")
+
+Language detection is local and cheap: the dominant Unicode script of the text is
+compared with the expected language's script, and for a few common Latin-script
+languages a stopword count tells them apart. Anything it cannot tell is accepted.
+"""
+
+import re
+import threading
+import unicodedata
+
+from . import languages, telemetry
+
+# Letters sampled for detection; enough to be stable, small enough to stay fast
+SAMPLE_CHARACTERS = 2000
+
+# First word of the Unicode character name -> ISO 15924 script
+_SCRIPT_PREFIXES = {
+    "LATIN": "Latn", "CYRILLIC": "Cyrl", "GREEK": "Grek", "ARABIC": "Arab", "HEBREW": "Hebr",
+    "DEVANAGARI": "Deva", "BENGALI": "Beng", "GURMUKHI": "Guru", "GUJARATI": "Gujr", "TAMIL": "Taml",
+    "TELUGU": "Telu", "KANNADA": "Knda", "MALAYALAM": "Mlym", "SINHALA": "Sinh", "THAI": "Thai",
+    "KHMER": "Khmr", "MYANMAR": "Mymr", "GEORGIAN": "Geor", "ARMENIAN": "Armn", "ETHIOPIC": "Ethi",
+    "CJK": "Hani", "HIRAGANA": "Kana", "KATAKANA": "Kana", "HANGUL": "Hang",
+}
+# Scripts a language's text is written in (default: just its own script)
+_ACCEPTED_SCRIPTS = {
+    "Jpan": {"Hani", "Kana"},
+    "Hans": {"Hani"},
+    "Kore": {"Hang", "Hani"},
+}
+# Very common words that tell Latin-script languages apart
+_STOPWORDS = {
+    "en": {"the", "and", "of", "to", "was", "he", "she", "it", "in", "that", "with", "his", "her"},
+    "es": {"el", "la", "de", "que", "y", "los", "las", "en", "un", "una", "por", "con", "su"},
+    "fr": {"le", "la", "de", "et", "les", "des", "un", "une", "il", "elle", "est", "que", "dans"},
+    "de": {"der", "die", "das", "und", "ist", "nicht", "ein", "eine", "er", "sie", "mit", "zu", "den"},
+    "it": {"il", "la", "di", "che", "e", "un", "una", "non", "per", "con", "del", "della", "era"},
+    "pt": {"o", "a", "de", "que", "e", "do", "da", "um", "uma", "não", "para", "com", "os"},
+    "nl": {"de", "het", "een", "en", "van", "ik", "je", "niet", "dat", "is", "zijn", "op", "met"},
+}
+# The best stopword score must beat the runner-up by this factor to name a language
+_STOPWORD_MARGIN = 1.5
+_WORD = re.compile(r"\w+", re.UNICODE)
+# Sentence end: punctuation, optionally followed by closing quotes/brackets
+_SENTENCE_END = re.compile(r"[.!?…。！？][\"'»”’)\]]*(?=\s|$)")
+
+
+def _script_of(character):
+    name = unicodedata.name(character, "")
+    return _SCRIPT_PREFIXES.get(name.split(" ", 1)[0])
+
+
+def dominant_script(text):
+    """Returns the ISO 15924 script of most letters in ``text``, or None."""
+    counts = {}
+    seen = 0
+    for character in text:
+        if character.isalpha():
+            script = _script_of(character)
+            if script:
+                counts[script] = counts.get(script, 0) + 1
+            seen += 1
+            if seen >= SAMPLE_CHARACTERS:
+                break
+    return max(counts, key=counts.get) if counts else None
+
+
+def detect_language(text):
+    """
+    Guesses the language of ``text``.
+
+    Returns:
+        str: An ISO 639-1 code for the Latin-script languages with a stopword list,
+             otherwise the dominant script (e.g. "Cyrl", or "Latn" when no stopword
+             language clearly wins), or None for no letters.
+    """
+    script = dominant_script(text)
+    if script != "Latn":
+        return script
+    words = [word.casefold() for word in _WORD.findall(text[:SAMPLE_CHARACTERS * 2])]
+    scores = {code: sum(word in stopwords for word in words) for code, stopwords in _STOPWORDS.items()}
+    best, runner_up = sorted(scores, key=scores.get, reverse=True)[:2]
+    # Stopwords make up a fifth or more of typical prose; a few hits prove nothing. Close
+    # languages (Catalan, Galician) share many of them, so the winner must stand out.
+    if scores[best] >= max(3, 0.08 * len(words)) and scores[best] >= _STOPWORD_MARGIN * scores[runner_up]:
+        return best
+    return script
+
+
+def language_matches(text, language):
+    """
+    True unless ``text`` is clearly not in ``language`` (a name or ISO code).
+
+    Unknown languages and texts the detector cannot place are accepted.
+    """
+    expected = languages.get(language) if language else None
+    if expected is None:
+        return True
+    detected = detect_language(text)
+    if detected is None:
+        return True
+    if detected in _SCRIPT_PREFIXES.values():
+        # Only the script is known
+        return detected in _ACCEPTED_SCRIPTS.get(expected.script, {expected.script})
+    if expected.script != "Latn":
+        return False
+    # Both are Latin-script. Without a stopword list for the expected language, a close
+    # language may be detected instead (Catalan as Spanish), so only the script counts.
+    return detected == expected.code or expected.code not in _STOPWORDS
+
+
+def trim_to_sentence(text, max_chars):
+    """
+    Shortens ``text`` to at most ``max_chars``, ending on a sentence boundary.
+
+    Falls back to the last word boundary if no sentence ends within the limit.
+    """
+    if len(text) <= max_chars:
+        return text
+    head = text[:max_chars]
+    ends = [match.end() for match in _SENTENCE_END.finditer(head)]
+    if ends:
+        return head[:ends[-1]].rstrip()
+    return head.rsplit(None, 1)[0].rstrip() if " " in head else head
+
+
+class ValidationReport:
+    """Result of ``check_text``."""
+
+    __slots__ = ("length", "min_chars", "max_chars", "language", "language_ok")
+
+    def __init__(self, length, min_chars, max_chars, language, language_ok):
+        self.length = length
+        self.min_chars = min_chars
+        self.max_chars = max_chars
+        self.language = language
+        self.language_ok = language_ok
+
+    @property
+    def too_short(self):
+        return self.min_chars is not None and self.length < self.min_chars
+
+    @property
+    def too_long(self):
+        return self.max_chars is not None and self.length > self.max_chars
+
+    @property
+    def length_ok(self):
+        return not self.too_short and not self.too_long
+
+    @property
+    def ok(self):
+        return self.length_ok and self.language_ok
+
+    def to_dict(self):
+        return {"length": self.length, "min_chars": self.min_chars, "max_chars": self.max_chars,
+                "language": self.language, "length_ok": self.length_ok, "language_ok": self.language_ok}
+
+    def __repr__(self):
+        return f"ValidationReport(length={self.length}, length_ok={self.length_ok}, language_ok={self.language_ok})"
+
+
+def check_text(text, min_chars=None, max_chars=None, language=None):
+    """Checks the length (in characters) and language of ``text``."""
+    return ValidationReport(len(text), min_chars, max_chars, language, language_matches(text, language))
+
+
+class ComplianceStats:
+    """
+    Per-provider counts of how often output met the constraints, and what it took.
+
+    ``record()`` is called once per final output with the report of the provider's
+    first answer and the repair action that was needed ("none", "continued",
+    "trimmed", "regenerated" or "failed").
+    """
+
+    ACTIONS = ("none", "continued", "trimmed", "regenerated", "failed")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._providers = {}
+
+    def record(self, provider, report, action="none"):
+        with self._lock:
+            stats = self._providers.setdefault(provider, dict.fromkeys(
+                ("checked", "length_ok", "language_ok") + self.ACTIONS, 0))
+            stats["checked"] += 1
+            stats["length_ok"] += report.length_ok
+            stats["language_ok"] += report.language_ok
+            stats[action] += 1
+        if telemetry.active:
+            telemetry.emit("validation", {"provider": provider, "length_ok": report.length_ok,
+                                          "language_ok": report.language_ok, "action": action})
+
+    def summary(self):
+        """Returns {provider: {"checked", "length_rate", "language_rate", <action counts>}}."""
+        with self._lock:
+            return {
+                provider: {
+                    "checked": stats["checked"],
+                    "length_rate": stats["length_ok"] / stats["checked"],
+                    "language_rate": stats["language_ok"] / stats["checked"],
+                    **{action: stats[action] for action in self.ACTIONS},
+                }
+                for provider, stats in self._providers.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._providers.clear()
+
+
+# Process-wide statistics
+compliance = ComplianceStats()
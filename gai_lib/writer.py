@@ -0,0 +1,199 @@
+"""
+Background persistence for generated output.
+
+``BackgroundWriter`` moves file and archive writes off the generation path. Jobs go
+into a bounded queue (``submit`` blocks when it is full, so generation cannot run
+unboundedly ahead of the disk) and a single thread drains them in batches:
+
+- ``write_file`` jobs are written to a temp file next to the target, fsynced and
+  renamed into place, so readers never see a partial file; each touched directory
+  is fsynced once per batch,
+- ``append_record`` jobs append to a ``RecordArchive`` whose ``sync()`` runs once per batch.
+
+Failures are collected and raised as ``WriterError`` from ``close()``.
+
+    with gai_lib.BackgroundWriter() as writer:
+        writer.write_file("story.txt", text)
+        writer.append_record(archive, record)
+"""
+
+import os
+import queue
+import threading
+import uuid
+
+_STOP = object()
+
+
+class WriterError(Exception):
+    """Raised by BackgroundWriter.close() when one or more writes failed."""
+
+    def __init__(self, failures):
+        self.failures = failures
+        details = "; ".join(f"{description}: {error}" for description, error in failures)
+        super().__init__(f"{len(failures)} write(s) failed: {details}")
+
+
+def _write_temp(path, text, encoding):
+    # Writes ``text`` to a new temp file next to ``path``; returns (open file, temp path).
+    # If anything fails the temp file is removed, so the target is never replaced by it.
+    temp_path = os.path.join(os.path.dirname(os.path.abspath(path)), f".tmp-{uuid.uuid4().hex}.part")
+    # Created like a regular file (0666 minus the current umask), unlike mkstemp's 0600
+    fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+    try:
+        f = os.fdopen(fd, "w", encoding=encoding)
+    except BaseException:
+        os.close(fd)
+        os.unlink(temp_path)
+        raise
+    try:
+        f.write(text)
+        f.flush()
+    except BaseException:
+        try:
+            f.close()
+        except Exception:
+            pass
+        os.unlink(temp_path)
+        raise
+    return f, temp_path
+
+
+class BackgroundWriter:
+    """
+    Bounded, batching writer thread.
+
+    Args:
+        max_pending (int): Queue size; ``submit`` blocks while this many jobs are waiting.
+        batch_size (int): Maximum number of jobs handled per fsync round.
+    """
+
+    def __init__(self, max_pending=64, batch_size=16):
+        self.batch_size = batch_size
+        self.failures = []
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="gai-background-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, function, *args, sync=None, description=None):
+        """
+        Queues ``function(*args)`` for the writer thread.
+
+        Args:
+            sync (callable, optional): Called once per batch after all jobs ran, e.g. an
+                                       archive's ``sync`` method.
+            description (str, optional): Label used in error reports.
+        """
+        if self._closed:
+            raise RuntimeError("BackgroundWriter is closed.")
+        self._queue.put(("call", function, args, sync, description or getattr(function, "__name__", "job")))
+
+    def write_file(self, path, text, encoding="utf-8"):
+        """Queues an atomic write of ``text`` to ``path``."""
+        if self._closed:
+            raise RuntimeError("BackgroundWriter is closed.")
+        self._queue.put(("file", path, text, encoding, path))
+
+    def append_record(self, archive, record):
+        """Queues ``archive.append(record)`` and returns the record id immediately."""
+        record = dict(record)
+        record.setdefault("id", uuid.uuid4().hex)
+        self.submit(archive.append, record, sync=archive.sync, description=f"archive record {record['id']}")
+        return record["id"]
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch = []
+            while len(batch) < self.batch_size:
+                try:
+                    job = self._queue.get_nowait() if batch else self._queue.get()
+                except queue.Empty:
+                    break
+                if job is _STOP:
+                    stopping = True
+                    break
+                batch.append(job)
+            self._process(batch)
+            for _ in range(len(batch) + stopping):
+                self._queue.task_done()
+
+    def _process(self, batch):
+        pending_files = []
+        syncs = []
+        for job in batch:
+            kind, description = job[0], job[-1]
+            try:
+                if kind == "file":
+                    _, path, text, encoding, _ = job
+                    pending_files.append((*_write_temp(path, text, encoding), path))
+                else:
+                    _, function, args, sync, _ = job
+                    function(*args)
+                    if sync is not None and sync not in syncs:
+                        syncs.append(sync)
+            except Exception as e:
+                self.failures.append((description, e))
+
+        directories = set()
+        for f, temp_path, path in pending_files:
+            try:
+                os.fsync(f.fileno())
+                f.close()
+                os.replace(temp_path, path)
+                directories.add(os.path.dirname(os.path.abspath(path)))
+            except Exception as e:
+                self.failures.append((path, e))
+                if not f.closed:
+                    f.close()
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+
+        # Make the renames durable: one fsync per directory per batch (POSIX only)
+        if hasattr(os, "O_DIRECTORY"):
+            for directory in directories:
+                try:
+                    fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+                    try:
+                        os.fsync(fd)
+                    finally:
+                        os.close(fd)
+                except OSError as e:
+                    self.failures.append((directory, e))
+
+        for sync in syncs:
+            try:
+                sync()
+            except Exception as e:
+                self.failures.append((getattr(sync, "__qualname__", "sync"), e))
+
+    def flush(self):
+        """Blocks until every queued job has been written."""
+        self._queue.join()
+
+    def close(self, raise_errors=True):
+        """
+        Writes all queued jobs and stops the thread.
+
+        Raises:
+            WriterError: If any write failed and ``raise_errors`` is True.
+
+        Returns:
+            list: (description, exception) pairs for failed writes.
+        """
+        if not self._closed:
+            self._closed = True
+            self._queue.put(_STOP)
+            self._thread.join()
+        if self.failures and raise_errors:
+            raise WriterError(self.failures)
+        return self.failures
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # Do not mask an exception that is already propagating
+        self.close(raise_errors=exc_type is None)
+        return False
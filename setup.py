@@ -10,8 +10,7 @@ setup(
         "google-generativeai", 
         "openai==0.27.10",
         "requests",
-        "python-dotenv",
-        "langcodes"
+        "python-dotenv"
     ],
     author="KnightSri",
     description="Multi-provider AI library for various projects",
@@ -0,0 +1,38 @@
+import pytest
+
+from gai_lib.validation import detect_language, language_matches
+
+TEXTS = {
+    "en": "The old man walked to the river with his dog. It was late, and the light was fading over the hills "
+          "that he had known since he was a child.",
+    "es": "El viejo caminó hasta el río con su perro. Era tarde y la luz se apagaba sobre las colinas que "
+          "conocía desde que era un niño, y los pájaros volvían a sus nidos.",
+    "pt": "O velho caminhou até o rio com o seu cão. Era tarde e a luz desaparecia sobre as colinas que ele "
+          "conhecia desde que era uma criança, e os pássaros voltavam para os ninhos.",
+    "fr": "Le vieil homme marchait vers la rivière avec son chien. Il était tard et la lumière baissait sur les "
+          "collines qu'il connaissait depuis qu'il était un enfant.",
+    "it": "Il vecchio camminava verso il fiume con il suo cane. Era tardi e la luce si spegneva sulle colline "
+          "che conosceva da quando era un bambino, e gli uccelli tornavano ai nidi.",
+    # No stopword lists: only the script can be checked
+    "ca": "El vell caminava cap al riu amb el seu gos. Era tard i la llum s'apagava sobre els turons que "
+          "coneixia des que era un nen, i els ocells tornaven als seus nius.",
+    "gl": "O vello camiñaba cara ao río co seu can. Era tarde e a luz apagábase sobre os outeiros que "
+          "coñecía desde que era un neno, e os paxaros volvían aos seus niños.",
+}
+
+
+@pytest.mark.parametrize("code", ["en", "es", "pt", "fr", "it"])
+def test_stopword_languages_are_detected(code):
+    assert detect_language(TEXTS[code]) == code
+    assert language_matches(TEXTS[code], code)
+
+
+@pytest.mark.parametrize("code", ["ca", "gl"])
+def test_latin_languages_without_stopwords_are_accepted(code):
+    assert language_matches(TEXTS[code], code)
+
+
+def test_wrong_language_is_rejected():
+    assert not language_matches(TEXTS["en"], "fr")
+    assert not language_matches(TEXTS["es"], "ru")
+    assert not language_matches("Старик шёл к реке со своей собакой.", "ca")
@@ -0,0 +1,24 @@
+import os
+
+from gai_lib.writer import BackgroundWriter
+
+
+def test_write_file_replaces_target(tmp_path):
+    target = tmp_path / "story.txt"
+    target.write_text("ORIGINAL")
+    with BackgroundWriter() as writer:
+        writer.write_file(str(target), "new text")
+    assert target.read_text() == "new text"
+    assert os.listdir(tmp_path) == ["story.txt"]
+
+
+def test_failed_write_leaves_target_unchanged(tmp_path):
+    target = tmp_path / "story.txt"
+    target.write_bytes(b"ORIGINAL")
+    writer = BackgroundWriter()
+    writer.write_file(str(target), "abc€def", encoding="ascii")
+    failures = writer.close(raise_errors=False)
+    assert [description for description, _ in failures] == [str(target)]
+    assert target.read_bytes() == b"ORIGINAL"
+    # The temp file is removed as well
+    assert os.listdir(tmp_path) == ["story.txt"]